@@ -1,15 +1,17 @@
 import asyncio
+from typing import Any, Dict, List
 
 from dotenv import load_dotenv
 
 from chatbot.ai.assistants.course_assistant.prompts.general_course_assistant_prompt import \
     GENERAL_COURSE_ASSISTANT_SYSTEM_TEMPLATE
+from chatbot.ai.llm_client_registry import get_llm_client, OPENAI_CHAT_PROVIDER, OPENAI_PROVIDER
 
 load_dotenv()
-from langchain import LLMChain, OpenAI
-from langchain.callbacks.streaming_stdout import StreamingStdOutCallbackHandler
-from langchain.chat_models import ChatOpenAI
+from langchain import LLMChain
+from langchain.callbacks.base import BaseCallbackHandler
 from langchain.memory import ConversationSummaryBufferMemory
+from langchain.schema import messages_from_dict, messages_to_dict
 from langchain.prompts import (
     HumanMessagePromptTemplate,
     ChatPromptTemplate, SystemMessagePromptTemplate,
@@ -23,12 +25,10 @@ class CourseAssistant:
                  prompt: str = GENERAL_COURSE_ASSISTANT_SYSTEM_TEMPLATE,
                  student_summary: str = None,
                  ):
-        self._chat_llm = ChatOpenAI(
-            streaming=True,
-            callbacks=[StreamingStdOutCallbackHandler()],
-            temperature=temperature,
-            model_name=model_name,
-        )
+        self._chat_llm = get_llm_client(provider=OPENAI_CHAT_PROVIDER,
+                                        model_name=model_name,
+                                        temperature=temperature,
+                                        streaming=True)
         if student_summary is None:
             student_summary = ""
         self._student_summary = student_summary
@@ -41,7 +41,7 @@ class CourseAssistant:
     def _configure_memory(self):
 
         return ConversationSummaryBufferMemory(memory_key="chat_history",
-                                               llm=OpenAI(temperature=0),
+                                               llm=get_llm_client(provider=OPENAI_PROVIDER, temperature=0),
                                                max_token_limit=1000)
 
     def _create_llm_chain(self):
@@ -69,10 +69,11 @@ class CourseAssistant:
 
         return chat_prompt
 
-    async def async_process_input(self, input_text):
+    async def async_process_input(self, input_text, callbacks: List[BaseCallbackHandler] = None):
+        # `callbacks` are added to the chain's for this call only, e.g. to stream the response into a discord message
         print(f"Input: {input_text}")
         print("Streaming response...\n")
-        ai_response = await self._chain.arun(human_input=input_text)
+        ai_response = await self._chain.arun(human_input=input_text, callbacks=callbacks)
         return ai_response
 
     async def demo(self):
@@ -91,8 +92,17 @@ class CourseAssistant:
 
             print("\n")
 
-    async def load_memory_from_thread(self, thread, bot_name: str):
-        async for message in thread.history(limit=None, oldest_first=True):
+    def dump_memory(self) -> Dict[str, Any]:
+        return {"moving_summary_buffer": self._memory.moving_summary_buffer,
+                "messages": messages_to_dict(self._memory.chat_memory.messages)}
+
+    def load_memory(self, memory_state: Dict[str, Any]):
+        self._memory.moving_summary_buffer = memory_state.get("moving_summary_buffer", "")
+        self._memory.chat_memory.messages = messages_from_dict(memory_state.get("messages", []))
+
+    async def load_memory_from_thread(self, thread, bot_name: str, after=None):
+        # pass `after` (a message or snowflake) to only replay the messages since then
+        async for message in thread.history(limit=None, after=after, oldest_first=True):
             if message.content == "":
                 continue
             if str(message.author) == bot_name:
@@ -3,11 +3,10 @@ import asyncio
 from dotenv import load_dotenv
 
 from chatbot.ai.assistants.paper_chatter.paper_chatter_prompt import PAPER_CHATTER_SYSTEM_TEMPLATE
+from chatbot.ai.llm_client_registry import get_llm_client, OPENAI_CHAT_PROVIDER, OPENAI_PROVIDER
 
 load_dotenv()
-from langchain import LLMChain, OpenAI
-from langchain.callbacks.streaming_stdout import StreamingStdOutCallbackHandler
-from langchain.chat_models import ChatOpenAI
+from langchain import LLMChain
 from langchain.memory import ConversationSummaryBufferMemory, VectorStoreRetrieverMemory, CombinedMemory
 from langchain.prompts import (
     HumanMessagePromptTemplate,
@@ -30,12 +29,10 @@ class PaperChatter:
                      temperature=0.8,
                      model_name="gpt-4",
                      prompt_template=PAPER_CHATTER_SYSTEM_TEMPLATE):
-        chat_llm = ChatOpenAI(
-            streaming=True,
-            callbacks=[StreamingStdOutCallbackHandler()],
-            temperature=temperature,
-            model_name=model_name,
-        )
+        chat_llm = get_llm_client(provider=OPENAI_CHAT_PROVIDER,
+                                  model_name=model_name,
+                                  temperature=temperature,
+                                  streaming=True)
 
         prompt = cls._create_prompt(prompt_template=prompt_template)
         memory = await cls._configure_memory(cls)
@@ -65,7 +62,7 @@ class PaperChatter:
     def _configure_conversation_memory(self):
         return ConversationSummaryBufferMemory(memory_key="chat_memory",
                                                input_key="human_input",
-                                               llm=OpenAI(temperature=0),
+                                               llm=get_llm_client(provider=OPENAI_PROVIDER, temperature=0),
                                                max_token_limit=1000)
 
     def _create_llm_chain(self):
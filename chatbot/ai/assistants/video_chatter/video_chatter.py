@@ -1,14 +1,16 @@
 import asyncio
+from typing import Any, Dict, List
 
 from dotenv import load_dotenv
 
 from chatbot.ai.assistants.video_chatter.prompts.video_chatter_prompt import VIDEO_CHATTER_SYSTEM_TEMPLATE
+from chatbot.ai.llm_client_registry import get_llm_client, OPENAI_CHAT_PROVIDER, OPENAI_PROVIDER
 
 load_dotenv()
-from langchain import LLMChain, OpenAI
-from langchain.callbacks.streaming_stdout import StreamingStdOutCallbackHandler
-from langchain.chat_models import ChatOpenAI
+from langchain import LLMChain
+from langchain.callbacks.base import BaseCallbackHandler
 from langchain.memory import ConversationSummaryBufferMemory
+from langchain.schema import messages_from_dict, messages_to_dict
 from langchain.prompts import (
     HumanMessagePromptTemplate,
     ChatPromptTemplate, SystemMessagePromptTemplate,
@@ -21,12 +23,10 @@ class VideoChatter:
                  model_name="gpt-4",
                  prompt: str = VIDEO_CHATTER_SYSTEM_TEMPLATE,
                  ):
-        self._chat_llm = ChatOpenAI(
-            streaming=True,
-            callbacks=[StreamingStdOutCallbackHandler()],
-            temperature=temperature,
-            model_name=model_name,
-        )
+        self._chat_llm = get_llm_client(provider=OPENAI_CHAT_PROVIDER,
+                                        model_name=model_name,
+                                        temperature=temperature,
+                                        streaming=True)
 
         self._prompt = self._create_prompt(prompt_template=prompt)
         self._memory = self._configure_memory()
@@ -37,7 +37,7 @@ class VideoChatter:
     def _configure_memory(self):
 
         return ConversationSummaryBufferMemory(memory_key="chat_history",
-                                               llm=OpenAI(temperature=0),
+                                               llm=get_llm_client(provider=OPENAI_PROVIDER, temperature=0),
                                                max_token_limit=1000)
 
     def _create_llm_chain(self):
@@ -63,10 +63,11 @@ class VideoChatter:
 
         return chat_prompt
 
-    async def async_process_input(self, input_text):
+    async def async_process_input(self, input_text, callbacks: List[BaseCallbackHandler] = None):
+        # `callbacks` are added to the chain's for this call only, e.g. to stream the response into a discord message
         print(f"Input: {input_text}")
         print("Streaming response...\n")
-        ai_response = await self._chain.arun(human_input=input_text)
+        ai_response = await self._chain.arun(human_input=input_text, callbacks=callbacks)
         return ai_response
 
     async def demo(self):
@@ -84,8 +85,17 @@ class VideoChatter:
 
             print("\n")
 
-    async def load_memory_from_thread(self, thread, bot_name: str):
-        async for message in thread.history(limit=None, oldest_first=True):
+    def dump_memory(self) -> Dict[str, Any]:
+        return {"moving_summary_buffer": self._memory.moving_summary_buffer,
+                "messages": messages_to_dict(self._memory.chat_memory.messages)}
+
+    def load_memory(self, memory_state: Dict[str, Any]):
+        self._memory.moving_summary_buffer = memory_state.get("moving_summary_buffer", "")
+        self._memory.chat_memory.messages = messages_from_dict(memory_state.get("messages", []))
+
+    async def load_memory_from_thread(self, thread, bot_name: str, after=None):
+        # pass `after` (a message or snowflake) to only replay the messages since then
+        async for message in thread.history(limit=None, after=after, oldest_first=True):
             if message.content == "":
                 continue
             if str(message.author) == bot_name:
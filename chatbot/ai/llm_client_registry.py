@@ -0,0 +1,88 @@
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+import aiohttp
+import openai
+from dotenv import load_dotenv
+from langchain import OpenAI
+from langchain.base_language import BaseLanguageModel
+from langchain.callbacks.streaming_stdout import StreamingStdOutCallbackHandler
+from langchain.chat_models import ChatOpenAI, ChatAnthropic
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+OPENAI_CHAT_PROVIDER = "openai_chat"
+OPENAI_PROVIDER = "openai"
+ANTHROPIC_PROVIDER = "anthropic"
+
+_llm_clients: Dict[Tuple, BaseLanguageModel] = {}
+_shared_aiosession: Optional[aiohttp.ClientSession] = None
+
+
+def get_llm_client(provider: str,
+                   model_name: str = None,
+                   temperature: float = 0,
+                   streaming: bool = False,
+                   **kwargs: Any) -> BaseLanguageModel:
+    """
+    Returns the process-wide LLM client for this provider, model, temperature and streaming setting, building it the
+    first time it's asked for. The clients don't hold any per-conversation state (per-call callbacks are passed to the
+    chain instead) so every assistant and worker can share them. Any other `kwargs` (e.g. `max_tokens`) are part of
+    the key too
+    """
+    llm_client_key = (provider, model_name, temperature, streaming, tuple(sorted(kwargs.items())))
+    if llm_client_key not in _llm_clients:
+        logger.info(f"Creating {provider} LLM client - model: {model_name}, temperature: {temperature}, "
+                    f"streaming: {streaming}")
+        _llm_clients[llm_client_key] = _create_llm_client(provider=provider,
+                                                          model_name=model_name,
+                                                          temperature=temperature,
+                                                          streaming=streaming,
+                                                          **kwargs)
+    return _llm_clients[llm_client_key]
+
+
+def _create_llm_client(provider: str,
+                       model_name: str,
+                       temperature: float,
+                       streaming: bool,
+                       **kwargs: Any) -> BaseLanguageModel:
+    if streaming:
+        kwargs["callbacks"] = [StreamingStdOutCallbackHandler()]
+
+    if provider == OPENAI_CHAT_PROVIDER:
+        if model_name is not None:
+            kwargs["model_name"] = model_name
+        return ChatOpenAI(temperature=temperature, streaming=streaming, **kwargs)
+    if provider == OPENAI_PROVIDER:
+        if model_name is not None:
+            kwargs["model_name"] = model_name
+        return OpenAI(temperature=temperature, streaming=streaming, **kwargs)
+    if provider == ANTHROPIC_PROVIDER:
+        if model_name is not None:
+            kwargs["model"] = model_name
+        return ChatAnthropic(temperature=temperature, streaming=streaming, **kwargs)
+    raise ValueError(f"Unknown LLM provider: {provider}")
+
+
+async def open_shared_aiosession() -> aiohttp.ClientSession:
+    """
+    Gives the openai client one keep-alive HTTP session for its async requests, instead of a new session (and
+    connection) per request. `openai.aiosession` is a context variable, so call this before starting the tasks that
+    make requests, e.g. before starting the discord bot
+    """
+    global _shared_aiosession
+    if _shared_aiosession is None or _shared_aiosession.closed:
+        _shared_aiosession = aiohttp.ClientSession()
+    openai.aiosession.set(_shared_aiosession)
+    return _shared_aiosession
+
+
+async def close_shared_aiosession():
+    global _shared_aiosession
+    if _shared_aiosession is not None:
+        await _shared_aiosession.close()
+        _shared_aiosession = None
+    openai.aiosession.set(None)
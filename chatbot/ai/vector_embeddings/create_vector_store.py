@@ -8,6 +8,7 @@ from langchain.schema import Document
 from langchain.vectorstores import Chroma
 
 from chatbot.ai.vector_embeddings.plot_vector_clusters import visualize_clusters
+from chatbot.mongo_database.data_getters import load_thread_messages
 from chatbot.mongo_database.mongo_database_manager import MongoDatabaseManager
 from chatbot.system.filenames_and_paths import get_thread_backups_collection_name
 
@@ -17,6 +18,9 @@ async def get_or_create_student_message_vector_store(
     mongo_database = MongoDatabaseManager()
     collection = mongo_database.get_collection(thread_collection_name)
     all_thread_entries = await collection.find().to_list(length=None)
+    all_thread_entries = await load_thread_messages(mongo_database_manager=mongo_database,
+                                                    thread_entries=all_thread_entries,
+                                                    thread_collection_name=thread_collection_name)
 
     print(f"Creating document list from {thread_collection_name} collection with {len(all_thread_entries)} entries")
 
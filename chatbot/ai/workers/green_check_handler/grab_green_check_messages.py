@@ -1,5 +1,6 @@
 import logging
 
+from chatbot.mongo_database.data_getters import load_thread_messages
 from chatbot.mongo_database.mongo_database_manager import MongoDatabaseManager
 from chatbot.system.filenames_and_paths import get_thread_backups_collection_name
 
@@ -17,7 +18,11 @@ async def grab_green_check_messages(server_name: str,
         all_thread_collection_name = get_thread_backups_collection_name(server_name=server_name)
 
     all_thread_collection = mongo_database.get_collection(all_thread_collection_name)
-    all_threads = await all_thread_collection.find().to_list(length=None)
+    all_threads = await all_thread_collection.find(
+        {"thread_statistics.green_check_emoji_present": True}).to_list(length=None)
+    all_threads = await load_thread_messages(mongo_database_manager=mongo_database,
+                                             thread_entries=all_threads,
+                                             thread_collection_name=all_thread_collection_name)
 
     total_cost = 0
     for thread_entry in all_threads:
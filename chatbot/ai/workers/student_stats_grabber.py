@@ -9,6 +9,8 @@ import pandas as pd
 from dotenv import load_dotenv
 from pydantic import BaseModel
 
+from chatbot.mongo_database.data_getters import load_thread_messages
+from chatbot.mongo_database.incremental_backups import backup_collection
 from chatbot.mongo_database.mongo_database_manager import MongoDatabaseManager
 from chatbot.student_info.load_student_info import load_student_info
 from chatbot.system.filenames_and_paths import get_thread_backups_collection_name, STUDENT_STATISTICS_COLLECTION_NAME, \
@@ -147,6 +149,9 @@ async def grab_student_statistics(mongo_database: MongoDatabaseManager,
               f"-----------------------------------------------------------------------------\n")
 
         student_threads = await  thread_collection.find({'_student_name': student_name}).to_list(length=None)
+        student_threads = await load_thread_messages(mongo_database_manager=mongo_database,
+                                                     thread_entries=student_threads,
+                                                     thread_collection_name=thread_collection_name)
 
         one_student_statistics = calculate_student_statistics(student_threads)
         all_student_statistics[student_name] = one_student_statistics
@@ -163,7 +168,8 @@ async def grab_student_statistics(mongo_database: MongoDatabaseManager,
                                 query={"student_name": "class_statistics"},
                                 data={"$set": class_stats.dict()})
 
-    await mongo_database.save_json(collection_name=STUDENT_STATISTICS_COLLECTION_NAME)
+    await backup_collection(mongo_database_manager=mongo_database,
+                            collection_name=STUDENT_STATISTICS_COLLECTION_NAME)
 
     save_to_csv(all_student_statistics)
 
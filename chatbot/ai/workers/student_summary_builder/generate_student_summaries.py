@@ -5,6 +5,7 @@ from langchain.callbacks import get_openai_callback
 
 from chatbot.ai.workers.student_summary_builder.student_summary_builder import time_since_last_summary, \
     StudentSummaryBuilder
+from chatbot.mongo_database.incremental_backups import backup_collection
 from chatbot.mongo_database.mongo_database_manager import MongoDatabaseManager
 from chatbot.system.filenames_and_paths import get_thread_backups_collection_name, STUDENT_SUMMARIES_COLLECTION_NAME
 
@@ -91,7 +92,8 @@ async def generate_student_summaries(mongo_database: MongoDatabaseManager,
                                                   "student_summary"]}}
                                               )
 
-    await mongo_database.save_json(collection_name=student_summaries_collection_name, )
+    await backup_collection(mongo_database_manager=mongo_database,
+                            collection_name=student_summaries_collection_name)
 
 if __name__ == '__main__':
     server_name = "Neural Control of Real World Human Movement 2023 Summer1"
@@ -1,6 +1,6 @@
 from typing import List, Any, Dict
 
-from langchain import OpenAI
+from chatbot.ai.llm_client_registry import get_llm_client, OPENAI_PROVIDER
 
 
 def split_thread_data_into_chunks(messages: List[str],
@@ -8,9 +8,10 @@ def split_thread_data_into_chunks(messages: List[str],
     chunk = ""
     chunks = []
     token_count = 0
+    token_counter = get_llm_client(provider=OPENAI_PROVIDER, temperature=0)
     for message in messages:
         chunk += message + "\n"
-        token_count = OpenAI().get_num_tokens(chunk)
+        token_count = token_counter.get_num_tokens(chunk)
         if token_count > max_tokens_per_chunk * .9:  # avoid spilling over token buffer to avoid warnings
             chunks.append({"text": chunk,
                            "token_count": token_count, })
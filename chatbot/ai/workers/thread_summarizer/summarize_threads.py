@@ -1,8 +1,11 @@
 import logging
 from datetime import datetime
 
+from chatbot.ai.llm_client_registry import open_shared_aiosession, close_shared_aiosession
 from chatbot.ai.workers.thread_summarizer.split_thread_data_into_chunks import split_thread_data_into_chunks
 from chatbot.ai.workers.thread_summarizer.thread_summarizer import logger, ThreadSummarizer
+from chatbot.mongo_database.data_getters import load_thread_messages
+from chatbot.mongo_database.incremental_backups import backup_collection
 from chatbot.mongo_database.mongo_database_manager import MongoDatabaseManager
 from chatbot.student_info.load_student_info import load_student_info
 from chatbot.system.filenames_and_paths import get_thread_backups_collection_name
@@ -27,68 +30,85 @@ async def summarize_threads(server_name: str,
     total_cost = 0
 
     all_threads = await all_thread_collection.find().to_list(length=None)
+    all_threads = await load_thread_messages(mongo_database_manager=mongo_database,
+                                             thread_entries=all_threads,
+                                             thread_collection_name=all_thread_collection_name)
     number_of_threads = len(all_threads)
-    for thread_number, thread_entry in enumerate(all_threads):
-
-        if channel_name is not None and thread_entry["channel"] != channel_name:
-            logger.info(
-                f"Skipping thread: `{thread_entry['thread_title']}` created at {str(thread_entry['created_at'])} because it is not in channel: {channel_name}")
-            continue
-
-        print("=====================================================================================================")
-        print(
-            f"Thread: {thread_entry['thread_title']}, Channel: {thread_entry['channel']}, Created at: {thread_entry['created_at']}")
-        print(f"{thread_entry['thread_url']}")
-        print(f"Thread number: {thread_number + 1} of {number_of_threads}")
-        print("=====================================================================================================")
-
-        if "summary" in thread_entry and not overwrite:
-            logger.info(
-                f"Thread summary already exists, skipping thread: `{thread_entry['thread_title']}` created at {str(thread_entry['created_at'])}")
-            continue
-
-        logger.info(f"Summarizing: `{thread_entry['thread_title']}` created at {str(thread_entry['created_at'])}")
-
-        thread_chunks = split_thread_data_into_chunks(messages=thread_entry["thread_as_list_of_strings"])
-
-        try:
-            thread_summarizer = ThreadSummarizer(use_anthropic=True)
-            thread_summary = await thread_summarizer.summarize(thread_chunks=thread_chunks)
-        except Exception as e:
-            logger.error(f"Summary generation failed with error: {e}. Trying again with OpenAI API")
-            thread_summarizer = ThreadSummarizer(use_anthropic=False)
-            thread_summary = await thread_summarizer.summarize(thread_chunks=thread_chunks)
-
-        # logger.info(f"Saving thread summary to mongo database, summary: {thread_summary}")
-        thread_cost = 0
-        for chunk in thread_chunks:
-            thread_cost += chunk["token_count"] * thread_summarizer.dollars_per_token
-        total_cost += thread_cost
-
-        await mongo_database.upsert(
-            collection=get_thread_backups_collection_name(server_name=server_name),
-            query={"_id": thread_entry["_id"]},
-            data={
-                "$set": {
-                    "summary": {"summary": thread_summary["output_text"],
-                                "intermediate_steps": thread_summary["intermediate_steps"],
-                                "thread_chunks": thread_chunks,
-                                "cost": thread_cost,
-                                "model": thread_summarizer.llm_model,
-                                "created_at": datetime.now().isoformat(),
-                                }
-                }
-            }
-        )
-        print(f"Thread summary: {thread_summary['output_text']}\n"
-              f"Thread summary cost: ${thread_cost:.5f}\n"
-              f"Total cost (so far): ${total_cost:.5f}\n"
-              f"----------------------------\n")
-
 
+    # the summarizers don't keep anything between threads, so build them once rather than once per thread
+    try:
+        anthropic_thread_summarizer = ThreadSummarizer(use_anthropic=True)
+    except Exception as e:
+        logger.error(f"Couldn't set up the Anthropic summarizer: {e}. Using the OpenAI API")
+        anthropic_thread_summarizer = None
+    openai_thread_summarizer = ThreadSummarizer(use_anthropic=False)
+
+    await open_shared_aiosession()
+    try:
+        for thread_number, thread_entry in enumerate(all_threads):
+
+            if channel_name is not None and thread_entry["channel"] != channel_name:
+                logger.info(
+                    f"Skipping thread: `{thread_entry['thread_title']}` created at {str(thread_entry['created_at'])} because it is not in channel: {channel_name}")
+                continue
+
+            print("=====================================================================================================")
+            print(
+                f"Thread: {thread_entry['thread_title']}, Channel: {thread_entry['channel']}, Created at: {thread_entry['created_at']}")
+            print(f"{thread_entry['thread_url']}")
+            print(f"Thread number: {thread_number + 1} of {number_of_threads}")
+            print("=====================================================================================================")
+
+            if "summary" in thread_entry and not overwrite:
+                logger.info(
+                    f"Thread summary already exists, skipping thread: `{thread_entry['thread_title']}` created at {str(thread_entry['created_at'])}")
+                continue
+
+            logger.info(f"Summarizing: `{thread_entry['thread_title']}` created at {str(thread_entry['created_at'])}")
+
+            thread_chunks = split_thread_data_into_chunks(messages=thread_entry["thread_as_list_of_strings"])
+
+            try:
+                if anthropic_thread_summarizer is None:
+                    raise ValueError("Anthropic summarizer not available")
+                thread_summarizer = anthropic_thread_summarizer
+                thread_summary = await thread_summarizer.summarize(thread_chunks=thread_chunks)
+            except Exception as e:
+                logger.error(f"Summary generation failed with error: {e}. Trying again with OpenAI API")
+                thread_summarizer = openai_thread_summarizer
+                thread_summary = await thread_summarizer.summarize(thread_chunks=thread_chunks)
+
+            # logger.info(f"Saving thread summary to mongo database, summary: {thread_summary}")
+            thread_cost = 0
+            for chunk in thread_chunks:
+                thread_cost += chunk["token_count"] * thread_summarizer.dollars_per_token
+            total_cost += thread_cost
+
+            await mongo_database.upsert(
+                collection=get_thread_backups_collection_name(server_name=server_name),
+                query={"_id": thread_entry["_id"]},
+                data={
+                    "$set": {
+                        "summary": {"summary": thread_summary["output_text"],
+                                    "intermediate_steps": thread_summary["intermediate_steps"],
+                                    "thread_chunks": thread_chunks,
+                                    "cost": thread_cost,
+                                    "model": thread_summarizer.llm_model,
+                                    "created_at": datetime.now().isoformat(),
+                                    }
+                    }
+                }
+            )
+            print(f"Thread summary: {thread_summary['output_text']}\n"
+                  f"Thread summary cost: ${thread_cost:.5f}\n"
+                  f"Total cost (so far): ${total_cost:.5f}\n"
+                  f"----------------------------\n")
+    finally:
+        await close_shared_aiosession()
     print(f"Done summarizing threads!\n\n Total estimated cost (final): ${total_cost:.2f}\n\n")
     if save_to_json:
-        await mongo_database.save_json(collection_name=all_thread_collection_name)
+        await backup_collection(mongo_database_manager=mongo_database,
+                                collection_name=all_thread_collection_name)
 
 
 if __name__ == "__main__":
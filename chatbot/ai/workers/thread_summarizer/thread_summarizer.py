@@ -2,12 +2,12 @@ import logging
 import os
 from typing import List, Any, Dict
 
-from langchain import OpenAI, PromptTemplate
-from langchain.callbacks.streaming_stdout import StreamingStdOutCallbackHandler
+from langchain import PromptTemplate
 from langchain.chains.summarize import load_summarize_chain
-from langchain.chat_models import ChatAnthropic
 from langchain.schema import Document
 
+from chatbot.ai.llm_client_registry import get_llm_client, ANTHROPIC_PROVIDER, OPENAI_PROVIDER
+
 
 # os.environ["LANGCHAIN_TRACING"] = "true"
 
@@ -41,14 +41,13 @@ class ThreadSummarizer:
         if use_anthropic:
             if os.getenv("ANTHROPIC_API_KEY") is None:
                 raise ValueError("ANTHROPIC_API_KEY not found in environment variables")
-            self.llm = ChatAnthropic(temperature=0,
-                                     max_tokens_to_sample=1000,
-                                     callbacks=[StreamingStdOutCallbackHandler()],
-)
+            self.llm = get_llm_client(provider=ANTHROPIC_PROVIDER,
+                                      temperature=0,
+                                      max_tokens_to_sample=1000)
             self.llm_model = self.llm.model
             self.dollars_per_token = 0.00000163
         if not use_anthropic or self.llm is None:
-            self.llm = OpenAI(temperature=0, max_tokens=1000)
+            self.llm = get_llm_client(provider=OPENAI_PROVIDER, temperature=0, max_tokens=1000)
             self.llm_model = self.llm.model_name
             self.dollars_per_token = 0.00002
 
@@ -0,0 +1,163 @@
+import asyncio
+import os
+import resource
+import sys
+import tempfile
+import time
+from collections import Counter
+from typing import Dict, Any, List
+
+from chatbot.benchmarks.fake_discord import ADMIN_ID, FakeApplicationContext, FakeBot, FakeUser, build_fake_guild
+from chatbot.discord_bot.cogs.thread_scraper_cog.thread_scraper_cog import ThreadScraperCog
+from chatbot.mongo_database.mongo_database_manager import MongoDatabaseManager
+
+BENCHMARK_DATABASE_NAME = "thread_scraper_benchmark"
+NUMBER_OF_STUDENTS = 20
+
+# the collection methods that each cost (at least) one round trip to the database
+MONGO_OPERATION_NAMES = {"find", "find_one", "find_one_and_update", "count_documents", "insert_one", "insert_many",
+                         "update_one", "update_many", "replace_one", "delete_one", "delete_many", "bulk_write",
+                         "create_indexes"}
+
+
+class CountingCollection:
+    def __init__(self, collection, counts: Counter):
+        self._collection = collection
+        self._counts = counts
+
+    def __getattr__(self, name):
+        attribute = getattr(self._collection, name)
+        if name not in MONGO_OPERATION_NAMES:
+            return attribute
+
+        def counted_operation(*args, **kwargs):
+            self._counts["round_trips"] += 1
+            if name == "bulk_write":
+                self._counts["bulk_write_operations"] += len(args[0])
+            return attribute(*args, **kwargs)
+
+        return counted_operation
+
+
+class CountingDatabase:
+    """Wraps a (motor) database to count the operations the scraper sends to it"""
+
+    def __init__(self, database):
+        self._database = database
+        self.counts = Counter()
+
+    def __getitem__(self, collection_name: str):
+        return CountingCollection(self._database[collection_name], self.counts)
+
+
+def set_up_benchmark_environment(benchmark_folder: str) -> List[FakeUser]:
+    # point everything the scraper reads from the environment at throwaway files
+    students = [FakeUser(user_id=100 + student_number, name=f"student{student_number}#0001")
+                for student_number in range(NUMBER_OF_STUDENTS)]
+    student_info_csv_path = os.path.join(benchmark_folder, "student_info.csv")
+    with open(student_info_csv_path, "w") as file:
+        file.write("full_name,discord_username,other_discord_usernames,discord_user_id\n")
+        for student in students:
+            file.write(f"Student Number{student.id},{student.name},,{student.id}\n")
+
+    os.environ["PATH_TO_STUDENT_INFO_CSV"] = student_info_csv_path
+    os.environ["UUID_MAP_JSON_PATH"] = os.path.join(benchmark_folder, "uuid_map.json")
+    os.environ["UUID_REGISTRY_BACKEND"] = "json"
+    os.environ["PATH_TO_COURSE_DATABASE_BACKUPS"] = os.path.join(benchmark_folder, "backups")
+    os.environ["ADMIN_USER_IDS"] = str(ADMIN_ID)
+    os.environ["MONGODB_DATABASE_NAME"] = BENCHMARK_DATABASE_NAME
+    return students
+
+
+async def create_mongo_database_manager(use_mock_mongo: bool) -> MongoDatabaseManager:
+    mongo_database_manager = MongoDatabaseManager()
+    if use_mock_mongo:
+        # only needed for the mock database, `pip install mongomock-motor`
+        from mongomock_motor import AsyncMongoMockClient
+        mongo_database_manager._client = AsyncMongoMockClient()
+        mongo_database_manager._database = mongo_database_manager._client[BENCHMARK_DATABASE_NAME]
+    else:
+        await mongo_database_manager._client.drop_database(BENCHMARK_DATABASE_NAME)
+        mongo_database_manager._database = mongo_database_manager._client[BENCHMARK_DATABASE_NAME]
+    mongo_database_manager._database = CountingDatabase(mongo_database_manager._database)
+    return mongo_database_manager
+
+
+def get_peak_rss_megabytes() -> float:
+    # peak for the whole process so far - kilobytes on linux, bytes on macos
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak_rss / 1024 ** 2 if sys.platform == "darwin" else peak_rss / 1024
+
+
+async def time_scrape(cog: ThreadScraperCog, guild, counts: Counter, **scrape_options) -> Dict[str, Any]:
+    counts.clear()
+    history_request_count = sum(thread.history_request_count for thread in guild.threads)
+    history_message_count = sum(thread.history_message_count for thread in guild.threads)
+
+    tic = time.perf_counter()
+    await cog.scrape_threads.callback(cog, FakeApplicationContext(guild), **scrape_options)
+    elapsed = time.perf_counter() - tic
+
+    # only the messages this scrape actually fetched, so rescrapes that skip threads aren't credited for them
+    messages_scraped = sum(thread.history_message_count for thread in guild.threads) - history_message_count
+    message_count = max(1, messages_scraped)
+    return {"seconds": elapsed,
+            "messages_scraped": messages_scraped,
+            "messages_per_second": messages_scraped / elapsed,
+            "mongo_round_trips_per_message": counts["round_trips"] / message_count,
+            "mongo_bulk_operations_per_message": counts["bulk_write_operations"] / message_count,
+            "history_requests": sum(thread.history_request_count for thread in guild.threads) - history_request_count,
+            "peak_rss_mb": get_peak_rss_megabytes()}
+
+
+async def benchmark_thread_scraper(number_of_channels: int = 4,
+                                   threads_per_channel: int = 25,
+                                   messages_per_thread: int = 100,
+                                   reactions_per_message: int = 1,
+                                   max_concurrent_threads: int = 4,
+                                   normalized_messages: bool = False,
+                                   history_page_delay_seconds: float = 0,
+                                   use_mock_mongo: bool = True,
+                                   changed_thread_fraction: float = 0.1) -> Dict[str, Dict[str, Any]]:
+    """
+    Scrapes a synthetic guild from scratch, then again after adding a message to `changed_thread_fraction` of the
+    threads, and prints the throughput, database traffic and memory use of both scrapes. The mock database has no
+    real indexes, so compare timings against a local mongo (`use_mock_mongo=False`) for upsert-heavy runs like
+    `normalized_messages`
+    """
+    benchmark_folder = tempfile.mkdtemp(prefix="thread_scraper_benchmark_")
+    students = set_up_benchmark_environment(benchmark_folder)
+    guild = build_fake_guild(students=students,
+                             number_of_channels=number_of_channels,
+                             threads_per_channel=threads_per_channel,
+                             messages_per_thread=messages_per_thread,
+                             reactions_per_message=reactions_per_message,
+                             history_page_delay_seconds=history_page_delay_seconds)
+    mongo_database_manager = await create_mongo_database_manager(use_mock_mongo=use_mock_mongo)
+    cog = ThreadScraperCog(bot=FakeBot(guild), mongo_database_manager=mongo_database_manager)
+    scrape_options = {"max_concurrent_threads": max_concurrent_threads,
+                      "normalized_messages": normalized_messages}
+
+    results = {"full scrape": await time_scrape(cog, guild, mongo_database_manager._database.counts,
+                                                **scrape_options)}
+
+    threads = guild.threads
+    for thread in threads[:int(len(threads) * changed_thread_fraction)]:
+        thread.add_message(author=guild.bot_user, content="one more message")
+    results["rescrape"] = await time_scrape(cog, guild, mongo_database_manager._database.counts, **scrape_options)
+
+    print(f"\n{number_of_channels} channels x {threads_per_channel} threads x {messages_per_thread} messages "
+          f"x {reactions_per_message} reactions ({'mock' if use_mock_mongo else 'local'} mongo, "
+          f"max_concurrent_threads={max_concurrent_threads}, normalized_messages={normalized_messages})")
+    print(f"{'':>12} | {'seconds':>8} | {'messages':>8} | {'messages/s':>10} | {'db ops/msg':>10} | {'bulk ops/msg':>12} | "
+          f"{'history reqs':>12} | {'peak RSS (MB)':>13}")
+    for scrape_name, result in results.items():
+        print(f"{scrape_name:>12} | {result['seconds']:>8.2f} | {result['messages_scraped']:>8} | "
+              f"{result['messages_per_second']:>10.0f} | "
+              f"{result['mongo_round_trips_per_message']:>10.3f} | {result['mongo_bulk_operations_per_message']:>12.3f} | "
+              f"{result['history_requests']:>12} | {result['peak_rss_mb']:>13.1f}")
+    return results
+
+
+if __name__ == "__main__":
+    asyncio.run(benchmark_thread_scraper())
@@ -0,0 +1,57 @@
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from chatbot.discord_bot.cogs.thread_scraper_cog.thread_stats import ThreadStats
+
+BOT_ID = 1
+STUDENT_ID = 2
+
+
+class FakeAuthor:
+    def __init__(self, author_id: int, name: str):
+        self.id = author_id
+        self.name = name
+
+    def __str__(self):
+        return self.name
+
+
+def make_fake_messages(number_of_messages: int, words_per_message: int = 50):
+    bot_author = FakeAuthor(author_id=BOT_ID, name="bot#0")
+    student_author = FakeAuthor(author_id=STUDENT_ID, name="student#0")
+    content = " ".join(["word"] * words_per_message)
+    start_time = datetime(2023, 6, 1)
+    return [SimpleNamespace(author=bot_author if message_number % 2 else student_author,
+                            content=content,
+                            created_at=start_time + timedelta(seconds=message_number),
+                            reactions=[])
+            for message_number in range(number_of_messages)]
+
+
+def time_thread_stats(number_of_messages: int) -> float:
+    messages = make_fake_messages(number_of_messages)
+    tic = time.perf_counter()
+    thread_stats = ThreadStats(bot_id=BOT_ID)
+    for message in messages:
+        thread_stats.update(message)
+    thread_stats.dict()
+    return time.perf_counter() - tic
+
+
+def benchmark_thread_stats(message_counts=(1_250, 2_500, 5_000, 10_000)):
+    print(f"{'messages':>10} | {'total (s)':>10} | {'per message (us)':>16}")
+    results = {}
+    for number_of_messages in message_counts:
+        elapsed = time_thread_stats(number_of_messages)
+        results[number_of_messages] = elapsed
+        print(f"{number_of_messages:>10} | {elapsed:>10.4f} | {elapsed / number_of_messages * 1e6:>16.2f}")
+
+    # if building the stats is linear, doubling the thread length should roughly double the time
+    smallest, largest = min(message_counts), max(message_counts)
+    print(f"\n{largest // smallest}x the messages took {results[largest] / results[smallest]:.1f}x the time")
+    return results
+
+
+if __name__ == "__main__":
+    benchmark_thread_stats()
@@ -0,0 +1,212 @@
+import asyncio
+import itertools
+from datetime import datetime, timedelta
+from typing import List
+
+import discord
+
+BOT_ID = 1
+ADMIN_ID = 2
+HISTORY_PAGE_SIZE = 100
+
+# discord ids are snowflakes, so later ids are always bigger
+_snowflakes = itertools.count(1_000_000)
+
+
+class FakeUser:
+    def __init__(self, user_id: int, name: str, bot: bool = False):
+        self.id = user_id
+        self.name = name
+        self.bot = bot
+
+    def __str__(self):
+        return self.name
+
+
+class FakeReaction:
+    def __init__(self, emoji: str):
+        self.emoji = emoji
+
+    def __str__(self):
+        return self.emoji
+
+
+class FakeMessage:
+    def __init__(self, author: FakeUser, content: str, created_at: datetime, channel, reactions: List[str] = ()):
+        self.id = next(_snowflakes)
+        self.author = author
+        self.content = content
+        self.created_at = created_at
+        self.channel = channel
+        self.guild = channel.guild
+        self.reactions = [FakeReaction(emoji) for emoji in reactions]
+        self.reference = None
+        self.thread = None
+
+    @property
+    def jump_url(self):
+        return f"https://discord.com/channels/{self.guild.id}/{self.channel.id}/{self.id}"
+
+
+class FakeThread(discord.Thread):
+    # subclasses the real classes (without calling their __init__) so the scraper's isinstance checks still work
+
+    def __init__(self, name: str, guild, parent, history_page_delay_seconds: float = 0):
+        self.id = next(_snowflakes)
+        self.name = name
+        self.guild = guild
+        self.owner_id = BOT_ID
+        self.parent_id = parent.id
+        self.archived = True
+        self.created_at = datetime(2023, 6, 1)
+        self.message_count = 0
+        self.last_message_id = None
+        self.history_request_count = 0
+        self.history_message_count = 0
+        self._parent = parent
+        self._messages: List[FakeMessage] = []
+        self._history_page_delay_seconds = history_page_delay_seconds
+
+    @property
+    def parent(self):
+        return self._parent
+
+    @property
+    def jump_url(self):
+        return f"https://discord.com/channels/{self.guild.id}/{self.id}"
+
+    def add_message(self, author: FakeUser, content: str, reactions: List[str] = ()) -> FakeMessage:
+        message = FakeMessage(author=author,
+                              content=content,
+                              created_at=self.created_at + timedelta(minutes=len(self._messages)),
+                              channel=self,
+                              reactions=reactions)
+        self._messages.append(message)
+        self.message_count += 1
+        self.last_message_id = message.id
+        return message
+
+    def history(self, limit=100, before=None, after=None, around=None, oldest_first=None):
+        return self._iterate_history(after=after)
+
+    async def _iterate_history(self, after=None):
+        messages = [message for message in self._messages if after is None or message.id > after.id]
+        for page_start in range(0, len(messages), HISTORY_PAGE_SIZE):
+            # one "request" per page, like the real history iterator
+            self.history_request_count += 1
+            await asyncio.sleep(self._history_page_delay_seconds)
+            for message in messages[page_start:page_start + HISTORY_PAGE_SIZE]:
+                self.history_message_count += 1
+                yield message
+
+    async def fetch_message(self, message_id: int) -> FakeMessage:
+        return next(message for message in self._messages if message.id == message_id)
+
+
+class FakeTextChannel(discord.TextChannel):
+    def __init__(self, name: str, guild):
+        self.id = next(_snowflakes)
+        self.name = name
+        self.guild = guild
+        self.threads_in_channel: List[FakeThread] = []
+
+    def __str__(self):
+        return self.name
+
+    def archived_threads(self, private=False, joined=False, limit=50, before=None):
+        async def iterate_archived_threads():
+            if private:
+                return
+            for thread in self.threads_in_channel:
+                yield thread
+
+        return iterate_archived_threads()
+
+
+class FakeGuild:
+    def __init__(self, name: str = "Benchmark Server"):
+        self.id = next(_snowflakes)
+        self.name = name
+        self.channels: List[FakeTextChannel] = []
+        self.bot_user = FakeUser(user_id=BOT_ID, name="bot#0000", bot=True)
+
+    async def fetch_channels(self):
+        return self.channels
+
+    async def active_threads(self):
+        return []
+
+    @property
+    def threads(self) -> List[FakeThread]:
+        return [thread for channel in self.channels for thread in channel.threads_in_channel]
+
+
+class FakeStatusMessage:
+    def __init__(self, content: str):
+        self.content = content
+
+    async def edit(self, content: str = None, **kwargs):
+        self.content = content
+        return self
+
+
+class FakeAdmin:
+    def __init__(self):
+        self.id = ADMIN_ID
+        self.sent_messages: List[FakeStatusMessage] = []
+
+    async def send(self, content: str) -> FakeStatusMessage:
+        self.sent_messages.append(FakeStatusMessage(content))
+        return self.sent_messages[-1]
+
+
+class FakeApplicationContext:
+    def __init__(self, guild: FakeGuild):
+        self.guild = guild
+        self.author = FakeAdmin()
+        self.user = self.author
+        self.user_id = self.author.id
+        self.channel = guild.channels[0]
+
+
+class FakeBot:
+    def __init__(self, guild: FakeGuild):
+        self.guild = guild
+        self.user = guild.bot_user
+
+    def get_channel(self, channel_id: int):
+        return next((thread for thread in self.guild.threads if thread.id == channel_id), None)
+
+    async def fetch_channel(self, channel_id: int):
+        return next((channel for channel in self.guild.channels if channel.id == channel_id), None)
+
+
+def build_fake_guild(students: List[FakeUser],
+                     number_of_channels: int = 2,
+                     threads_per_channel: int = 10,
+                     messages_per_thread: int = 50,
+                     reactions_per_message: int = 0,
+                     words_per_message: int = 30,
+                     history_page_delay_seconds: float = 0) -> FakeGuild:
+    guild = FakeGuild()
+    filler = " ".join(["word"] * words_per_message)
+    for channel_number in range(number_of_channels):
+        channel = FakeTextChannel(name=f"channel-{channel_number}", guild=guild)
+        guild.channels.append(channel)
+        for thread_number in range(threads_per_channel):
+            student = students[(channel_number * threads_per_channel + thread_number) % len(students)]
+            thread = FakeThread(name=f"{student}'s chat with bot",
+                                guild=guild,
+                                parent=channel,
+                                history_page_delay_seconds=history_page_delay_seconds)
+            channel.threads_in_channel.append(thread)
+            for message_number in range(messages_per_thread):
+                if message_number % 2 == 0:
+                    thread.add_message(author=student,
+                                       content=f"Hi bot, my name is {student.name.split('#')[0]}. {filler}",
+                                       reactions=["✅"] * reactions_per_message)
+                else:
+                    thread.add_message(author=guild.bot_user,
+                                       content=f"Hello {student.name.split('#')[0]}! {filler}",
+                                       reactions=["👍"] * reactions_per_message)
+    return guild
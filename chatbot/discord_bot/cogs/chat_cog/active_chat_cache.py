@@ -0,0 +1,115 @@
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional
+
+from chatbot.discord_bot.cogs.chat_cog.chat_model import Chat
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ACTIVE_CHATS = 200
+DEFAULT_MAX_CHAT_IDLE_SECONDS = 60 * 60
+MAX_IDLE_EVICTION_INTERVAL_SECONDS = 60
+
+
+def get_max_active_chats() -> int:
+    return int(os.getenv("MAX_ACTIVE_CHATS", DEFAULT_MAX_ACTIVE_CHATS))
+
+
+def get_max_chat_idle_seconds() -> float:
+    return float(os.getenv("MAX_CHAT_IDLE_SECONDS", DEFAULT_MAX_CHAT_IDLE_SECONDS))
+
+
+class ActiveChatCache:
+    """
+    The live `Chat`s (and their assistants, LLM clients and memory) keyed by thread id, bounded to `max_size` chats and
+    `max_idle_seconds` without a message. The least recently used chats are evicted first, and every evicted chat is
+    handed to `on_evict` so its memory can be saved and restored the next time someone talks in the thread. Idle chats
+    are evicted on a timer once `start_idle_eviction` has been called, so they don't wait on new traffic to go
+    """
+
+    def __init__(self,
+                 on_evict: Callable[[int, Chat], Awaitable[None]] = None,
+                 max_size: int = None,
+                 max_idle_seconds: float = None):
+        self._on_evict = on_evict
+        self._max_size = max(1, max_size if max_size is not None else get_max_active_chats())
+        self._max_idle_seconds = max_idle_seconds if max_idle_seconds is not None else get_max_chat_idle_seconds()
+
+        # oldest use first, each value is (chat, last used at)
+        self._chats: OrderedDict = OrderedDict()
+        self._idle_eviction_task: Optional[asyncio.Task] = None
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __contains__(self, thread_id: int) -> bool:
+        return thread_id in self._chats
+
+    def __len__(self) -> int:
+        return len(self._chats)
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {"size": len(self._chats),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions}
+
+    async def get(self, thread_id: int) -> Optional[Chat]:
+        # idle chats are left to the eviction timer, so a chat that's in the cache is always handed back
+        if thread_id not in self._chats:
+            self.misses += 1
+            return None
+        self.hits += 1
+        chat, _ = self._chats.pop(thread_id)
+        self._chats[thread_id] = (chat, time.monotonic())
+        return chat
+
+    async def put(self, thread_id: int, chat: Chat):
+        self._chats.pop(thread_id, None)
+        self._chats[thread_id] = (chat, time.monotonic())
+        await self.evict_idle()
+        while len(self._chats) > self._max_size:
+            await self._evict_oldest()
+
+    async def evict_idle(self):
+        # the chats are kept in order of last use, so we only ever look at the idle ones at the front
+        idle_before = time.monotonic() - self._max_idle_seconds
+        while self._chats and next(iter(self._chats.values()))[1] < idle_before:
+            await self._evict_oldest()
+
+    def start_idle_eviction(self, interval_seconds: float = None):
+        if interval_seconds is None:
+            interval_seconds = min(self._max_idle_seconds, MAX_IDLE_EVICTION_INTERVAL_SECONDS)
+        if self._idle_eviction_task is None or self._idle_eviction_task.done():
+            self._idle_eviction_task = asyncio.create_task(self._evict_idle_periodically(interval_seconds))
+
+    def stop_idle_eviction(self):
+        if self._idle_eviction_task is not None:
+            self._idle_eviction_task.cancel()
+            self._idle_eviction_task = None
+
+    async def _evict_idle_periodically(self, interval_seconds: float):
+        while True:
+            await asyncio.sleep(interval_seconds)
+            await self.evict_idle()
+
+    async def evict_all(self):
+        while self._chats:
+            await self._evict_oldest()
+
+    async def _evict_oldest(self):
+        thread_id, (chat, _) = self._chats.popitem(last=False)
+        self.evictions += 1
+        logger.info(f"Evicting chat for thread {thread_id} - chat cache stats: {self.stats}")
+        if self._on_evict is None:
+            return
+        try:
+            await self._on_evict(thread_id, chat)
+        except Exception as e:
+            # the chat can still be rebuilt from the thread's history
+            logger.error(f"Failed to save memory for evicted chat in thread {thread_id}: {e}")
@@ -0,0 +1,124 @@
+import logging
+from typing import Union
+
+import discord
+
+from chatbot.ai.assistants.course_assistant.course_assistant import CourseAssistant
+from chatbot.ai.assistants.video_chatter.video_chatter import VideoChatter
+from chatbot.discord_bot.cogs.chat_cog.active_chat_cache import ActiveChatCache
+from chatbot.discord_bot.cogs.chat_cog.chat_memory_store import save_chat_memory, load_chat_memory
+from chatbot.discord_bot.cogs.chat_cog.chat_model import Chat
+from chatbot.discord_bot.cogs.chat_cog.thread_work_queue import SingleFlight, ThreadWorkQueue
+from chatbot.discord_bot.cogs.chat_cog.update_discord_message_callback_manager import UpdateDiscordMessageHandler
+from chatbot.mongo_database.mongo_database_manager import MongoDatabaseManager
+
+logger = logging.getLogger(__name__)
+
+
+class BaseChatCog(discord.Cog):
+    """
+    What the chat cogs share - the live chats, building (or restoring) a chat for a thread, streaming the assistant's
+    replies into the thread one message at a time, and checkpointing the chats' memory. Subclasses supply the chat
+    titles and the assistant
+    """
+
+    def __init__(self,
+                 bot: discord.Bot,
+                 mongo_database_manager: MongoDatabaseManager):
+        self._discord_bot = bot
+        self._mongo_database = mongo_database_manager
+        self._active_chats = ActiveChatCache(on_evict=self._save_chat_memory)
+        self._chat_creation = SingleFlight()
+        self._thread_work_queue = ThreadWorkQueue()
+
+    @discord.Cog.listener()
+    async def on_ready(self):
+        self._active_chats.start_idle_eviction()
+
+    def cog_unload(self):
+        self._active_chats.stop_idle_eviction()
+        self._thread_work_queue.cancel()
+
+    def _create_chat_title_string(self, user_name: str, task_type: str = None) -> str:
+        raise NotImplementedError
+
+    async def _get_assistant(self,
+                             thread: discord.Thread,
+                             student_discord_username: str,
+                             use_project_manager_prompt: bool = False,
+                             saved_chat_memory: dict = None) -> Union[CourseAssistant, VideoChatter]:
+        raise NotImplementedError
+
+    async def _respond_to_message(self, message: discord.Message):
+        chat = await self._get_or_create_chat(thread=message.channel,
+                                              student_discord_username=str(message.author))
+
+        await self._async_send_message_to_bot(chat=chat, input_text=message.content)
+
+    async def _async_send_message_to_bot(self, chat: Chat, input_text: str):
+        response_message = await chat.thread.send("`Awaiting bot response...`")
+        update_discord_message_handler = UpdateDiscordMessageHandler(response_message=response_message,
+                                                                     send_message=chat.thread.send)
+        try:
+            async with response_message.channel.typing():
+                bot_response = await chat.assistant.async_process_input(input_text=input_text,
+                                                                        callbacks=[update_discord_message_handler])
+
+            await update_discord_message_handler.finish(final_text=bot_response)
+            await self._checkpoint_chat_memory(chat=chat, last_message_id=update_discord_message_handler.messages[-1].id)
+
+        except Exception as e:
+            logger.error(e)
+            await update_discord_message_handler.cancel()
+            await response_message.edit(content=f"Whoops! Something went wrong! 😅 \nHere is the error:\n ```\n{e}\n```")
+
+    async def _get_or_create_chat(self,
+                                  thread: discord.Thread,
+                                  student_discord_username: str,
+                                  use_project_manager_prompt: bool = False) -> Chat:
+
+        chat = await self._active_chats.get(thread.id)
+        if chat is not None:
+            return chat
+
+        # if a few messages come in before the chat exists, they all wait on the same assistant being built
+        return await self._chat_creation.run(thread.id,
+                                             lambda: self._build_chat(thread=thread,
+                                                                      student_discord_username=student_discord_username,
+                                                                      use_project_manager_prompt=use_project_manager_prompt))
+
+    async def _build_chat(self,
+                          thread: discord.Thread,
+                          student_discord_username: str,
+                          use_project_manager_prompt: bool = False) -> Chat:
+        # chats come back with the memory from their last checkpoint, falling back to replaying the thread's history
+        saved_chat_memory = await load_chat_memory(self._mongo_database, thread_id=thread.id)
+        if saved_chat_memory is not None:
+            use_project_manager_prompt = saved_chat_memory.get("use_project_manager_prompt", False)
+
+        assistant = await self._get_assistant(thread, student_discord_username=student_discord_username,
+                                              use_project_manager_prompt=use_project_manager_prompt,
+                                              saved_chat_memory=saved_chat_memory)
+
+        chat = Chat(
+            title=self._create_chat_title_string(user_name=student_discord_username),
+            thread=thread,
+            assistant=assistant,
+            use_project_manager_prompt=use_project_manager_prompt,
+        )
+
+        await self._active_chats.put(thread.id, chat)
+        return chat
+
+    async def _save_chat_memory(self, thread_id: int, chat: Chat):
+        await save_chat_memory(self._mongo_database, thread_id=thread_id, chat=chat)
+
+    async def _checkpoint_chat_memory(self, chat: Chat, last_message_id: int):
+        # saved after every turn, so a restart loads this one document instead of replaying the thread's history
+        try:
+            await save_chat_memory(self._mongo_database,
+                                   thread_id=chat.thread.id,
+                                   chat=chat,
+                                   last_message_id=last_message_id)
+        except Exception as e:
+            logger.error(f"Failed to checkpoint memory for chat in thread {chat.thread.id}: {e}")
@@ -8,7 +8,7 @@ from chatbot.ai.assistants.course_assistant.course_assistant import CourseAssist
 from chatbot.ai.assistants.course_assistant.prompts.general_course_assistant_prompt import \
     GENERAL_COURSE_ASSISTANT_SYSTEM_TEMPLATE
 from chatbot.ai.assistants.course_assistant.prompts.project_manager_prompt import PROJECT_MANAGER_TASK_PROMPT
-from chatbot.discord_bot.cogs.chat_cog.chat_model import Chat
+from chatbot.discord_bot.cogs.chat_cog.base_chat_cog import BaseChatCog
 from chatbot.discord_bot.cogs.video_chatter_cog import VIDEO_CHAT_CHANNEL_ID
 from chatbot.mongo_database.mongo_database_manager import MongoDatabaseManager
 from chatbot.system.environment_variables import get_admin_users
@@ -22,13 +22,11 @@ TIME_PASSED_MESSAGE = """
 logger = logging.getLogger(__name__)
 
 
-class ChatCog(discord.Cog):
+class ChatCog(BaseChatCog):
     def __init__(self,
                  bot: discord.Bot,
                  mongo_database_manager: MongoDatabaseManager):
-        self._discord_bot = bot
-        self._mongo_database = mongo_database_manager
-        self._active_threads = {}
+        super().__init__(bot=bot, mongo_database_manager=mongo_database_manager)
         self._allowed_channels = os.getenv("ALLOWED_CHANNELS").split(",")
         self._allowed_channels = [int(channel) for channel in self._allowed_channels]
         self._course_assistant_llm_chains = {}
@@ -124,29 +122,10 @@ class ChatCog(discord.Cog):
         # ignore if first character is ~
         if message.content[0] == "~":
             return
-        try:
-            chat = self._active_threads[thread.id]
-        except KeyError:
-            chat = await self._create_chat(thread=thread,
-                                           student_discord_username=str(message.author)
-                                           )
-
         logger.info(f"Sending message to the agent: {message.content}")
 
-        await self._async_send_message_to_bot(chat=chat, input_text=message.content)
-
-    async def _async_send_message_to_bot(self, chat: Chat, input_text: str):
-        response_message = await chat.thread.send("`Awaiting bot response...`")
-        try:
-
-            async with response_message.channel.typing():
-                bot_response = await chat.assistant.async_process_input(input_text=input_text)
-
-            await response_message.edit(content=bot_response)
-
-        except Exception as e:
-            logger.error(e)
-            await response_message.edit(content=f"Whoops! Something went wrong! 😅 \nHere is the error:\n ```\n{e}\n```")
+        # messages in a thread are answered one at a time, in the order they were sent
+        await self._thread_work_queue.run(thread.id, lambda: self._respond_to_message(message=message))
 
     def _create_chat_title_string(self, user_name: str, task_type: str = None) -> str:
         if task_type is None:
@@ -164,9 +143,9 @@ class ChatCog(discord.Cog):
         chat_title = self._create_chat_title_string(user_name=student_user_name)
         thread = await message.create_thread(name=chat_title)
 
-        chat = await self._create_chat(thread=thread,
-                                       student_discord_username=student_user_name,
-                                       use_project_manager_prompt=use_project_manager_prompt)
+        chat = await self._get_or_create_chat(thread=thread,
+                                              student_discord_username=student_user_name,
+                                              use_project_manager_prompt=use_project_manager_prompt)
 
         if initial_text_input is None:
             initial_text_input = f"A human has requested a chat!"
@@ -175,34 +154,15 @@ class ChatCog(discord.Cog):
             await chat.thread.send(
                 embed=self._initial_message_embed(message=message, initial_message=initial_text_input))
 
-        await self._async_send_message_to_bot(chat=chat,
-                                              input_text=initial_text_input)
-
-    async def _create_chat(self,
-                           thread: discord.Thread,
-                           student_discord_username: str,
-                           use_project_manager_prompt: bool = False) -> Chat:
-
-        if thread.id in self._active_threads:
-            logger.warning(f"Thread {thread.id} already exists! Returning existing chat")
-            return self._active_threads[thread.id]
-
-        assistant = await self._get_assistant(thread, student_discord_username=student_discord_username,
-                                              use_project_manager_prompt=use_project_manager_prompt)
-
-        chat = Chat(
-            title=self._create_chat_title_string(user_name=student_discord_username),
-            thread=thread,
-            assistant=assistant
-        )
-
-        self._active_threads[thread.id] = chat
-        return chat
+        await self._thread_work_queue.run(thread.id,
+                                          lambda: self._async_send_message_to_bot(chat=chat,
+                                                                                  input_text=initial_text_input))
 
     async def _get_assistant(self,
                              thread: discord.Thread,
                              student_discord_username: str,
-                             use_project_manager_prompt: bool = False) -> CourseAssistant:
+                             use_project_manager_prompt: bool = False,
+                             saved_chat_memory: dict = None) -> CourseAssistant:
 
         student_summary = self._mongo_database.get_student_summary(discord_username=student_discord_username)
 
@@ -214,7 +174,13 @@ class ChatCog(discord.Cog):
         assistant = CourseAssistant(prompt=prompt,
                                     student_summary=student_summary,
                                     )
-        if thread.message_count > 0:
+        if saved_chat_memory is not None:
+            assistant.load_memory(saved_chat_memory["memory"])
+            if saved_chat_memory.get("last_message_id") is not None:
+                await assistant.load_memory_from_thread(thread=thread,
+                                                        bot_name=str(self._discord_bot.user),
+                                                        after=discord.Object(id=saved_chat_memory["last_message_id"]))
+        elif thread.message_count > 0:
             message = await thread.send(
                 f"> Reloading bot memory from thread history...")
             await assistant.load_memory_from_thread(thread=thread,
@@ -0,0 +1,39 @@
+import logging
+from typing import Any, Dict, Optional
+
+from pymongo import IndexModel
+
+from chatbot.discord_bot.cogs.chat_cog.chat_model import Chat
+from chatbot.mongo_database.mongo_database_manager import MongoDatabaseManager
+from chatbot.system.filenames_and_paths import CHAT_MEMORIES_COLLECTION_NAME
+
+logger = logging.getLogger(__name__)
+
+CHAT_MEMORIES_COLLECTION_INDEXES = [IndexModel([("thread_id", 1)], unique=True)]
+
+
+async def save_chat_memory(mongo_database_manager: MongoDatabaseManager,
+                           thread_id: int,
+                           chat: Chat,
+                           last_message_id: int = None):
+    """
+    Checkpoints the chat's memory (the summary buffer plus the recent messages) as one small document per thread.
+    `last_message_id` marks how much of the thread the saved memory has seen (the thread's latest message by default),
+    so a restore only replays what came after it
+    """
+    if last_message_id is None:
+        last_message_id = chat.thread.last_message_id
+    await mongo_database_manager.ensure_indexes(collection=CHAT_MEMORIES_COLLECTION_NAME,
+                                                indexes=CHAT_MEMORIES_COLLECTION_INDEXES)
+    await mongo_database_manager.upsert(collection=CHAT_MEMORIES_COLLECTION_NAME,
+                                        query={"thread_id": thread_id},
+                                        data={"$set": {"thread_id": thread_id,
+                                                       "chat_title": chat.title,
+                                                       "use_project_manager_prompt": chat.use_project_manager_prompt,
+                                                       "last_message_id": last_message_id,
+                                                       "memory": chat.assistant.dump_memory()}})
+    logger.debug(f"Saved memory for chat in thread {thread_id}")
+
+
+async def load_chat_memory(mongo_database_manager: MongoDatabaseManager, thread_id: int) -> Optional[Dict[str, Any]]:
+    return await mongo_database_manager.get_collection(CHAT_MEMORIES_COLLECTION_NAME).find_one({"thread_id": thread_id})
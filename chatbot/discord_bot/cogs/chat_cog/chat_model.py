@@ -13,6 +13,7 @@ class Chat(BaseModel):
     title: str
     thread: discord.Thread
     assistant: Union[CourseAssistant, VideoChatter]
+    use_project_manager_prompt: bool = False
 
     started_at: str = datetime.now().isoformat()
     chat_id: str = uuid.uuid4()
@@ -0,0 +1,82 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """
+    Makes sure only one `make_coroutine()` runs per key at a time - callers that come in while one is running just
+    await its result instead of starting their own
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+
+    async def run(self, key: Hashable, make_coroutine: Callable[[], Awaitable[Any]]) -> Any:
+        if key not in self._in_flight:
+            in_flight = asyncio.ensure_future(make_coroutine())
+            self._in_flight[key] = in_flight
+            in_flight.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        # shielded, so a caller being cancelled doesn't cancel the work the other callers are waiting on
+        return await asyncio.shield(self._in_flight[key])
+
+
+class ThreadWorkQueue:
+    """
+    Runs the work submitted for each thread one at a time, in the order it was submitted, while different threads run
+    concurrently. Each thread's queue and worker only exist while it has work waiting
+    """
+
+    def __init__(self):
+        self._queues: Dict[Hashable, asyncio.Queue] = {}
+        self._workers: Dict[Hashable, asyncio.Task] = {}
+
+    def __contains__(self, thread_id: Hashable) -> bool:
+        return thread_id in self._workers
+
+    async def run(self, thread_id: Hashable, make_coroutine: Callable[[], Awaitable[Any]]) -> Any:
+        result = asyncio.get_running_loop().create_future()
+        if thread_id not in self._queues:
+            self._queues[thread_id] = asyncio.Queue()
+        self._queues[thread_id].put_nowait((make_coroutine, result))
+        if thread_id not in self._workers:
+            self._workers[thread_id] = asyncio.create_task(self._work(thread_id))
+        return await result
+
+    def cancel(self):
+        # e.g. when the cog unloads - everyone waiting on the cancelled work gets a `CancelledError`
+        for worker in list(self._workers.values()):
+            worker.cancel()
+
+    async def _work(self, thread_id: Hashable):
+        queue = self._queues[thread_id]
+        result = None
+        try:
+            while not queue.empty():
+                make_coroutine, result = queue.get_nowait()
+                await self._run_one(make_coroutine, result)
+        finally:
+            # if the worker was cancelled, the work it was running and everything still queued behind it never will
+            if result is not None and not result.done():
+                result.cancel()
+            while not queue.empty():
+                _, queued_result = queue.get_nowait()
+                queued_result.cancel()
+            # nothing can be queued between the empty check and here, since there's no await in between
+            del self._queues[thread_id]
+            del self._workers[thread_id]
+
+    @staticmethod
+    async def _run_one(make_coroutine: Callable[[], Awaitable[Any]], result: asyncio.Future):
+        if result.cancelled():
+            return
+        try:
+            value = await make_coroutine()
+        except Exception as e:
+            if not result.cancelled():
+                result.set_exception(e)
+            return
+        if not result.cancelled():
+            result.set_result(value)
@@ -1,9 +1,118 @@
-from langchain.callbacks.base import BaseCallbackHandler
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, List, Optional
 
+import discord
+from discord import HTTPException
+from langchain.callbacks.base import AsyncCallbackHandler
 
-class UpdateDiscordMessageHandler(BaseCallbackHandler):
+logger = logging.getLogger(__name__)
+
+DEFAULT_EDIT_INTERVAL_SECONDS = 0.75
+DEFAULT_EDIT_EVERY_N_CHARACTERS = 200
+MAX_DISCORD_MESSAGE_LENGTH = 2000
+
+
+def find_message_split_index(text: str, max_length: int = MAX_DISCORD_MESSAGE_LENGTH) -> int:
+    # prefer to break on a newline, then a space, so words don't get cut in half across messages
+    if len(text) <= max_length:
+        return len(text)
+    for separator in ("\n", " "):
+        split_index = text.rfind(separator, 0, max_length)
+        if split_index > max_length // 2:
+            return split_index + 1
+    return max_length
+
+
+class UpdateDiscordMessageHandler(AsyncCallbackHandler):
+    """
+    Streams the LLM's tokens into a discord message. Tokens are buffered and the message is edited at most every
+    `edit_interval_seconds` or every `edit_every_n_characters` new characters, whichever comes first, so we stay well
+    inside discord's edit rate limits. Edits run in the background so the token stream never waits on discord, and
+    text past discord's 2000 character limit continues in follow-up messages sent with `send_message`
+    """
     name = "update_discord_message_handler"
 
-    def handle_llm_new_token(self, token: str):
-        # Send the token to your desired destination here (e.g., Discord bot)
-        print("token", token)
+    def __init__(self,
+                 response_message: discord.Message,
+                 send_message: Callable[[str], Awaitable[discord.Message]],
+                 edit_interval_seconds: float = DEFAULT_EDIT_INTERVAL_SECONDS,
+                 edit_every_n_characters: int = DEFAULT_EDIT_EVERY_N_CHARACTERS):
+        self._send_message = send_message
+        self._edit_interval_seconds = edit_interval_seconds
+        self._edit_every_n_characters = max(1, edit_every_n_characters)
+
+        self.response_text = ""
+        self.messages: List[discord.Message] = [response_message]
+        # where the current (last) message starts in `response_text`, and what it last showed
+        self._message_start_index = 0
+        self._message_content: Optional[str] = None
+
+        self._last_edit_at = 0.0
+        self._edited_length = 0
+        self._edit_task: Optional[asyncio.Task] = None
+        self._edit_lock = asyncio.Lock()
+        self._cancelled = False
+
+    async def on_llm_new_token(self, token: str, **kwargs: Any) -> None:
+        self.response_text += token
+        if self._cancelled:
+            return
+        if self._edit_task is not None and not self._edit_task.done():
+            # an edit is already in flight, it'll pick up this token or the next one will
+            return
+        if (len(self.response_text) - self._edited_length >= self._edit_every_n_characters or
+                time.monotonic() - self._last_edit_at >= self._edit_interval_seconds):
+            self._edit_task = asyncio.create_task(self._update_messages())
+
+    async def finish(self, final_text: str = None):
+        """
+        Waits for any in-flight edit and writes out the rest of the response. Pass `final_text` (e.g. the chain's
+        return value) to make sure the messages match the full response even if some tokens were never streamed
+        """
+        if self._edit_task is not None:
+            await self._edit_task
+        if final_text:
+            self.response_text = final_text
+        await self._update_messages()
+
+    async def cancel(self):
+        """
+        Stops streaming into the messages and waits for any in-flight edit to stop, so that e.g. an error message
+        written to the response message afterwards doesn't get overwritten by a late edit
+        """
+        self._cancelled = True
+        if self._edit_task is not None and not self._edit_task.done():
+            self._edit_task.cancel()
+        # taking the lock waits out an edit that's already past the point of being cancelled
+        async with self._edit_lock:
+            pass
+
+    async def _update_messages(self):
+        async with self._edit_lock:
+            self._last_edit_at = time.monotonic()
+            self._edited_length = len(self.response_text)
+            response_text = self.response_text
+
+            message_text = response_text[self._message_start_index:]
+            while len(message_text) > MAX_DISCORD_MESSAGE_LENGTH:
+                split_index = find_message_split_index(message_text)
+                await self._edit_current_message(message_text[:split_index])
+                self._message_start_index += split_index
+                message_text = response_text[self._message_start_index:]
+                self.messages.append(await self._send_message(message_text[:MAX_DISCORD_MESSAGE_LENGTH]))
+                self._message_content = message_text[:MAX_DISCORD_MESSAGE_LENGTH]
+
+            if message_text:
+                await self._edit_current_message(message_text)
+
+    async def _edit_current_message(self, content: str):
+        if content == self._message_content:
+            return
+        try:
+            await self.messages[-1].edit(content=content)
+            self._message_content = content
+        except HTTPException as e:
+            # the next edit will catch the message up
+            logger.warning(f"Failed to update the response message: {e}")
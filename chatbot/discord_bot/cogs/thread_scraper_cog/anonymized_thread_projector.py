@@ -0,0 +1,167 @@
+import asyncio
+import logging
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Tuple
+
+from dotenv import load_dotenv
+from pymongo import ReplaceOne, UpdateOne, DeleteMany, IndexModel
+
+from chatbot.discord_bot.cogs.thread_scraper_cog.message_anonymizer import MessageAnonymizer
+from chatbot.discord_bot.cogs.thread_scraper_cog.roster_name_redactor import RosterNameRedactor
+from chatbot.discord_bot.cogs.thread_scraper_cog.thread_stats import ThreadStats, build_thread_stats_fields
+from chatbot.mongo_database.data_getters import load_thread_messages
+from chatbot.mongo_database.mongo_database_manager import MongoDatabaseManager, add_updated_at
+from chatbot.student_info.load_student_info import load_student_info
+from chatbot.system.filenames_and_paths import ANONYMIZATION_PROJECTIONS_COLLECTION_NAME, \
+    get_anonymized_collection_name, get_thread_messages_collection_name, get_thread_backups_collection_name
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROJECTION_BATCH_SIZE = 100
+
+# the raw and anonymized thread documents are both looked up and upserted by `thread_id`
+THREAD_COLLECTION_INDEXES = [IndexModel([("thread_id", 1)])]
+
+REDACTED_THREAD_FIELDS = ["_student_name", "_student_username", "thread_title"]
+# the only raw thread fields copied across as they are - anything else (e.g. a `summary`, which quotes the raw
+# transcript) stays out of the anonymized copy
+ANONYMIZED_THREAD_FIELDS = ["_student_uuid", "_student_initials", "server_name", "thread_id", "thread_url",
+                            "created_at", "channel", "high_water_mark", "normalized_messages", "thread_metadata"]
+REDACTED_MESSAGE_FIELDS = ["author", "author_id", "user_id"]
+
+
+def anonymize_thread_entry(thread_entry: Dict[str, Any],
+                           bot_id: int,
+                           message_anonymizer: MessageAnonymizer) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """
+    Builds the anonymized copy of a raw thread backup (with its `messages` loaded) and its anonymized messages
+    """
+    normalized_messages = thread_entry.get("normalized_messages", False)
+
+    thread_stats = ThreadStats(bot_id=bot_id)
+    anonymized_messages = []
+    for message in thread_entry["messages"]:
+        anonymized_content = message_anonymizer.anonymize_text(message["content"])
+        thread_stats.update_from_message_package({**message, "author": "REDACTED", "content": anonymized_content})
+
+        anonymized_message = {key: value for key, value in message.items() if key != "_id"}
+        anonymized_message.update({field: "REDACTED" for field in REDACTED_MESSAGE_FIELDS})
+        anonymized_message["content"] = anonymized_content
+        anonymized_messages.append(anonymized_message)
+
+    anonymized_thread_entry = {field: thread_entry[field] for field in ANONYMIZED_THREAD_FIELDS if field in thread_entry}
+    anonymized_thread_entry.update({field: "REDACTED" for field in REDACTED_THREAD_FIELDS})
+    anonymized_thread_entry.update(build_thread_stats_fields(thread_stats, normalized_messages=normalized_messages))
+    if not normalized_messages:
+        anonymized_thread_entry["messages"] = anonymized_messages
+
+    return anonymized_thread_entry, anonymized_messages
+
+
+async def project_anonymized_threads(mongo_database_manager: MongoDatabaseManager,
+                                     collection_name: str,
+                                     bot_id: int,
+                                     message_anonymizer: MessageAnonymizer = None,
+                                     incremental: bool = True,
+                                     batch_size: int = DEFAULT_PROJECTION_BATCH_SIZE) -> int:
+    """
+    Rebuilds the anonymized copy of the `collection_name` thread backups from the raw ones. With `incremental`, only
+    the threads that have been written since the last projection are reprocessed. Returns the number of threads
+    """
+    if message_anonymizer is None:
+        message_anonymizer = MessageAnonymizer(
+            roster_name_redactor=RosterNameRedactor.from_student_info(load_student_info()))
+    anonymized_collection_name = get_anonymized_collection_name(collection_name)
+    projection_query = {"collection_name": collection_name,
+                        "anonymized_collection_name": anonymized_collection_name}
+
+    thread_query = {}
+    if incremental:
+        projection_entry = await mongo_database_manager.get_collection(
+            ANONYMIZATION_PROJECTIONS_COLLECTION_NAME).find_one(projection_query)
+        if projection_entry is not None:
+            thread_query = {"updated_at": {"$gte": projection_entry["projected_until"]}}
+
+    # anything written after this point gets picked up again by the next incremental projection
+    projection_started_at = datetime.now()
+
+    thread_count = 0
+    thread_entries = []
+    async for thread_entry in mongo_database_manager.get_collection(collection_name).find(thread_query).batch_size(
+            batch_size):
+        thread_entries.append(thread_entry)
+        if len(thread_entries) >= batch_size:
+            thread_count += await _project_thread_entries(mongo_database_manager=mongo_database_manager,
+                                                          thread_entries=thread_entries,
+                                                          collection_name=collection_name,
+                                                          bot_id=bot_id,
+                                                          message_anonymizer=message_anonymizer)
+            thread_entries = []
+    if len(thread_entries) > 0:
+        thread_count += await _project_thread_entries(mongo_database_manager=mongo_database_manager,
+                                                      thread_entries=thread_entries,
+                                                      collection_name=collection_name,
+                                                      bot_id=bot_id,
+                                                      message_anonymizer=message_anonymizer)
+
+    await mongo_database_manager.upsert(collection=ANONYMIZATION_PROJECTIONS_COLLECTION_NAME,
+                                        query=projection_query,
+                                        data={"$set": {"projected_until": projection_started_at,
+                                                       "last_thread_count": thread_count}})
+    logger.info(f"Projected {thread_count} threads from {collection_name} into {anonymized_collection_name}")
+    return thread_count
+
+
+async def _project_thread_entries(mongo_database_manager: MongoDatabaseManager,
+                                  thread_entries: List[Dict[str, Any]],
+                                  collection_name: str,
+                                  bot_id: int,
+                                  message_anonymizer: MessageAnonymizer) -> int:
+    anonymized_collection_name = get_anonymized_collection_name(collection_name)
+    thread_entries = await load_thread_messages(mongo_database_manager=mongo_database_manager,
+                                                thread_entries=thread_entries,
+                                                thread_collection_name=collection_name)
+
+    updated_at = datetime.now()
+    thread_operations = []
+    message_operations = []
+    for thread_entry in thread_entries:
+        anonymized_thread_entry, anonymized_messages = anonymize_thread_entry(thread_entry=thread_entry,
+                                                                              bot_id=bot_id,
+                                                                              message_anonymizer=message_anonymizer)
+        thread_operations.append(ReplaceOne({"thread_id": thread_entry["thread_id"]},
+                                            {**anonymized_thread_entry, "updated_at": updated_at},
+                                            upsert=True))
+        if not thread_entry.get("normalized_messages", False):
+            continue
+        message_operations.extend(UpdateOne({"id": anonymized_message["id"]},
+                                            add_updated_at({"$set": anonymized_message}, updated_at),
+                                            upsert=True)
+                                  for anonymized_message in anonymized_messages)
+        # drop any anonymized messages that have since been deleted from the raw backup
+        message_operations.append(DeleteMany({"thread_id": thread_entry["thread_id"],
+                                              "id": {"$nin": [message["id"] for message in anonymized_messages]}}))
+
+    # same order as the scraper - messages first, then the thread documents
+    if len(message_operations) > 0:
+        await mongo_database_manager.bulk_write(collection=get_thread_messages_collection_name(anonymized_collection_name),
+                                                operations=message_operations,
+                                                ordered=False)
+    await mongo_database_manager.ensure_indexes(collection=anonymized_collection_name,
+                                                indexes=THREAD_COLLECTION_INDEXES)
+    await mongo_database_manager.bulk_write(collection=anonymized_collection_name,
+                                            operations=thread_operations,
+                                            ordered=False)
+    return len(thread_operations)
+
+
+if __name__ == "__main__":
+    asyncio.run(project_anonymized_threads(
+        mongo_database_manager=MongoDatabaseManager(),
+        collection_name=get_thread_backups_collection_name(
+            server_name="Neural Control of Real World Human Movement 2023 Summer1"),
+        bot_id=int(os.getenv("DISCORD_BOT_ID")),
+    ))
@@ -1,43 +1,43 @@
 import re
+from typing import Dict, Optional
 
+import discord
 
-def redact_named_greeting(message):
-    # This regex will match named greetings like 'Hi [name]!', 'Hello {name}.' and 'Hey [name], '
-    pattern = r'(?i)(Hi|Hello|Hey)\s+([\w]+)[,.!]'
-    if re.search(pattern, message.content):
-        # Substitute matched pattern with "Hi REDACTED!"
-        message.content = re.sub(pattern, r'\1 REDACTED', message.content)
+from chatbot.discord_bot.cogs.thread_scraper_cog.roster_name_redactor import RosterNameRedactor
 
-    return message
+THREAD_OWNER_TEXT = "is the thread owner"
 
+# This regex matches the various phrases that someone might use to state their name (like 'my name is [name]') and
+# named greetings (like 'Hi [name]!', 'Hello {name}.' and 'Hey [name], '). They're all in one pattern so that each
+# message only gets scanned once, and the named groups tell us which kind of phrase we matched
+REDACTION_PATTERN = re.compile(r"(?P<introduction>my name is|my name['`´’]s) \w+"
+                               r"|(?P<greeting>Hi|Hello|Hey)\s+\w+[,.!]",
+                               flags=re.IGNORECASE)
 
-def anonymize_message(message):
-    message = redact_message_owner_text(message)
 
-    message = redact_introduction(message)
+def _redact_match(match: re.Match) -> str:
+    # Substitute matched pattern with "___ REDACTED"
+    if match.group("introduction") is not None:
+        return f"{match.group('introduction')} REDACTED"
+    return f"{match.group('greeting')} REDACTED"
 
-    message = redact_named_greeting(message)
 
-    return message
+class MessageAnonymizer:
+    def __init__(self, roster_name_redactor: Optional[RosterNameRedactor] = None):
+        self._roster_name_redactor = roster_name_redactor
+        self._anonymized_content_by_message_id: Dict[int, str] = {}
 
+    def anonymize_text(self, text: str) -> str:
+        if THREAD_OWNER_TEXT in text:
+            return ""
+        text = REDACTION_PATTERN.sub(_redact_match, text)
+        if self._roster_name_redactor is not None:
+            text = self._roster_name_redactor.redact(text)
+        return text
 
-def redact_message_owner_text(message):
-    if "is the thread owner" in message.content:
-        message.content = ""
-    return message
-
-
-def redact_introduction(message):
-    # This regex will match various phrases that someone might use to state their name.
-    # The parentheses create groups that can be referenced in the replacement string.
-    patterns = [
-        r"(my name is) (\w+)",
-        r"(my name['`´’]s) (\w+)",
-    ]
-    for pattern in patterns:
-        if re.search(pattern, message.content, flags=re.IGNORECASE):
-            # Substitute matched pattern with "___ REDACTED"
-            message.content = re.sub(pattern, r'\1 REDACTED', message.content, flags=re.IGNORECASE)
-
-    return message
-
+    def anonymize_message(self, message: discord.Message) -> str:
+        # returns the redacted content without touching the original message, and remembers it so each message only
+        # gets anonymized once
+        if message.id not in self._anonymized_content_by_message_id:
+            self._anonymized_content_by_message_id[message.id] = self.anonymize_text(message.content)
+        return self._anonymized_content_by_message_id[message.id]
@@ -0,0 +1,129 @@
+from collections import deque
+from typing import Dict, Any, Iterable, List, Tuple
+
+from chatbot.student_info.find_student_name import find_user_names_to_check
+
+# names shorter than this are too likely to show up as (parts of) ordinary words
+MINIMUM_NAME_LENGTH = 3
+
+
+class NameAutomaton:
+    """
+    An Aho-Corasick automaton over a set of (lowercase) names, so we can find every occurrence of every name in a piece
+    of text with one linear scan, no matter how many names there are
+    """
+
+    def __init__(self, names: Iterable[str]):
+        self._transitions: List[Dict[str, int]] = [{}]
+        self._failure_links: List[int] = [0]
+        self._output_lengths: List[List[int]] = [[]]
+
+        for name in names:
+            self._add_name(name)
+        self._build_failure_links()
+
+    def _add_name(self, name: str):
+        state = 0
+        for character in name:
+            if character not in self._transitions[state]:
+                self._transitions.append({})
+                self._failure_links.append(0)
+                self._output_lengths.append([])
+                self._transitions[state][character] = len(self._transitions) - 1
+            state = self._transitions[state][character]
+        self._output_lengths[state].append(len(name))
+
+    def _build_failure_links(self):
+        # breadth first, so a state's failure link is always finished before we need it
+        queue = deque(self._transitions[0].values())
+        while queue:
+            state = queue.popleft()
+            for character, next_state in self._transitions[state].items():
+                queue.append(next_state)
+                failure_state = self._failure_links[state]
+                while failure_state and character not in self._transitions[failure_state]:
+                    failure_state = self._failure_links[failure_state]
+                self._failure_links[next_state] = self._transitions[failure_state].get(character, 0)
+                if self._failure_links[next_state] == next_state:
+                    self._failure_links[next_state] = 0
+                self._output_lengths[next_state] = (self._output_lengths[next_state] +
+                                                    self._output_lengths[self._failure_links[next_state]])
+
+    def find_matches(self, text: str) -> List[Tuple[int, int]]:
+        """Returns the (start, end) span of every name found in `text`"""
+        matches = []
+        state = 0
+        for index, character in enumerate(text):
+            while state and character not in self._transitions[state]:
+                state = self._failure_links[state]
+            state = self._transitions[state].get(character, 0)
+            for name_length in self._output_lengths[state]:
+                matches.append((index + 1 - name_length, index + 1))
+        return matches
+
+
+def capitalize_name(name: str) -> str:
+    return name[:1].upper() + name[1:]
+
+
+class RosterNameRedactor:
+    """
+    Redacts `names` wherever they show up as whole words, ignoring case, and `case_sensitive_names` only where they show
+    up exactly as given
+    """
+
+    def __init__(self, names: Iterable[str], replacement: str = "REDACTED", case_sensitive_names: Iterable[str] = ()):
+        self._replacement = replacement
+        self._automaton = NameAutomaton({name.strip().lower() for name in names
+                                         if len(name.strip()) >= MINIMUM_NAME_LENGTH})
+        self._case_sensitive_automaton = NameAutomaton({name.strip() for name in case_sensitive_names
+                                                        if len(name.strip()) >= MINIMUM_NAME_LENGTH})
+
+    @classmethod
+    def from_student_info(cls, student_info: Dict[str, Any]):
+        # every full name, first name and discord username (with and without the #discriminator) in the roster.
+        # A first name like "Will" or "Mark" is also an ordinary word, so on its own it's only redacted when it's
+        # capitalized. Full names and usernames (which discord lowercases) match in any case
+        names = []
+        first_names = []
+        for full_name, student_dict in student_info.items():
+            first_name = full_name.strip().split(" ")[0]
+            if full_name.strip() != first_name:
+                names.append(full_name)
+            if first_name.isalpha():
+                first_names.append(capitalize_name(first_name))
+            else:
+                names.append(first_name)
+            for discord_username in find_user_names_to_check(student_dict):
+                names.append(discord_username)
+                names.append(discord_username.split("#")[0])
+
+        return cls(names=names, case_sensitive_names=first_names)
+
+    def redact(self, text: str) -> str:
+        lowercase_text = text.lower()
+        if len(lowercase_text) != len(text):
+            # a few characters change length when lowercased, which would throw off the match positions
+            lowercase_text = "".join(character.lower() if len(character.lower()) == 1 else character
+                                     for character in text)
+
+        redacted_chunks = []
+        last_end = 0
+        # take the leftmost (and then longest) match first, skipping overlaps and matches inside other words
+        matches = self._automaton.find_matches(lowercase_text) + self._case_sensitive_automaton.find_matches(text)
+        for start, end in sorted(matches, key=lambda span: (span[0], -span[1])):
+            if start < last_end or not self._is_whole_word(text, start, end):
+                continue
+            redacted_chunks.append(text[last_end:start])
+            redacted_chunks.append(self._replacement)
+            last_end = end
+
+        if last_end == 0:
+            return text
+        redacted_chunks.append(text[last_end:])
+        return "".join(redacted_chunks)
+
+    def _is_whole_word(self, text: str, start: int, end: int) -> bool:
+        before_is_word_character = start > 0 and (text[start - 1].isalnum() or text[start - 1] == "_")
+        after_is_word_character = end < len(text) and (text[end].isalnum() or text[end] == "_")
+        return not before_is_word_character and not after_is_word_character
@@ -0,0 +1,88 @@
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+from chatbot.mongo_database.mongo_database_manager import MongoDatabaseManager
+from chatbot.system.filenames_and_paths import SCRAPE_CHECKPOINTS_COLLECTION_NAME
+
+
+class ScrapeCheckpoint(BaseModel):
+    server_name: str
+    collection_name: str
+    started_at: datetime = Field(default_factory=datetime.now)
+    updated_at: datetime = Field(default_factory=datetime.now)
+    finished: bool = False
+    channels_completed: List[int] = Field(default_factory=list)
+    completed_thread_ids: List[int] = Field(default_factory=list)
+    current_thread_id: Optional[int] = None
+    last_message_id: Optional[int] = None
+
+    @property
+    def query(self):
+        return {"server_name": self.server_name,
+                "collection_name": self.collection_name}
+
+
+async def load_scrape_checkpoint(mongo_database_manager: MongoDatabaseManager,
+                                 server_name: str,
+                                 collection_name: str) -> Optional[ScrapeCheckpoint]:
+    checkpoint_entry = await mongo_database_manager.get_collection(SCRAPE_CHECKPOINTS_COLLECTION_NAME).find_one(
+        {"server_name": server_name,
+         "collection_name": collection_name})
+    if checkpoint_entry is None:
+        return None
+    del checkpoint_entry["_id"]
+    return ScrapeCheckpoint(**checkpoint_entry)
+
+
+async def start_scrape_checkpoint(mongo_database_manager: MongoDatabaseManager,
+                                  server_name: str,
+                                  collection_name: str) -> ScrapeCheckpoint:
+    checkpoint = ScrapeCheckpoint(server_name=server_name,
+                                  collection_name=collection_name)
+    await mongo_database_manager.upsert(collection=SCRAPE_CHECKPOINTS_COLLECTION_NAME,
+                                        query=checkpoint.query,
+                                        data={"$set": checkpoint.dict()})
+    return checkpoint
+
+
+async def record_thread_completed(mongo_database_manager: MongoDatabaseManager,
+                                  checkpoint: ScrapeCheckpoint,
+                                  thread_id: int,
+                                  last_message_id: Optional[int]):
+    checkpoint.completed_thread_ids.append(thread_id)
+    checkpoint.current_thread_id = thread_id
+    if last_message_id is not None:
+        checkpoint.last_message_id = last_message_id
+    checkpoint.updated_at = datetime.now()
+
+    await mongo_database_manager.upsert(collection=SCRAPE_CHECKPOINTS_COLLECTION_NAME,
+                                        query=checkpoint.query,
+                                        data={"$addToSet": {"completed_thread_ids": thread_id},
+                                              "$set": {"current_thread_id": checkpoint.current_thread_id,
+                                                       "last_message_id": checkpoint.last_message_id,
+                                                       "updated_at": checkpoint.updated_at}})
+
+
+async def record_channel_completed(mongo_database_manager: MongoDatabaseManager,
+                                   checkpoint: ScrapeCheckpoint,
+                                   channel_id: int):
+    checkpoint.channels_completed.append(channel_id)
+    checkpoint.updated_at = datetime.now()
+
+    await mongo_database_manager.upsert(collection=SCRAPE_CHECKPOINTS_COLLECTION_NAME,
+                                        query=checkpoint.query,
+                                        data={"$addToSet": {"channels_completed": channel_id},
+                                              "$set": {"updated_at": checkpoint.updated_at}})
+
+
+async def record_scrape_finished(mongo_database_manager: MongoDatabaseManager,
+                                 checkpoint: ScrapeCheckpoint):
+    checkpoint.finished = True
+    checkpoint.updated_at = datetime.now()
+
+    await mongo_database_manager.upsert(collection=SCRAPE_CHECKPOINTS_COLLECTION_NAME,
+                                        query=checkpoint.query,
+                                        data={"$set": {"finished": True,
+                                                       "updated_at": checkpoint.updated_at}})
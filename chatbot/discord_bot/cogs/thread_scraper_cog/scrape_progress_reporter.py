@@ -0,0 +1,91 @@
+import logging
+import time
+from datetime import timedelta
+from typing import Awaitable, Callable, List
+
+import discord
+from discord import HTTPException
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FLUSH_INTERVAL_SECONDS = 2.0
+DEFAULT_FLUSH_EVERY_N_THREADS = 25
+# discord's limit is 2000 characters, leave some room for the progress line
+MAX_STATUS_MESSAGE_LENGTH = 1900
+ROLLOVER_MESSAGE_TEXT = "`--2000 character limit reached, sending new message--`"
+
+
+class ScrapeProgressReporter:
+    """
+    Collects a line per scraped thread and writes them into the admin's status message in batches - every
+    `flush_interval_seconds` or every `flush_every_n_threads` threads, whichever comes first - along with the scrape's
+    throughput and ETA. Starts a new status message when the current one gets close to discord's character limit
+    """
+
+    def __init__(self,
+                 status_message: discord.Message,
+                 send_message: Callable[[str], Awaitable[discord.Message]],
+                 total_thread_count: int,
+                 flush_interval_seconds: float = DEFAULT_FLUSH_INTERVAL_SECONDS,
+                 flush_every_n_threads: int = DEFAULT_FLUSH_EVERY_N_THREADS):
+        self._status_message = status_message
+        self._send_message = send_message
+        self._total_thread_count = total_thread_count
+        self._flush_interval_seconds = flush_interval_seconds
+        self._flush_every_n_threads = max(1, flush_every_n_threads)
+
+        # only the lines in the current status message, so each edit is bounded by the message length
+        self._status_lines: List[str] = [status_message.content]
+        self._status_length = len(status_message.content)
+        self._pending_lines: List[str] = []
+
+        self._started_at = time.monotonic()
+        self._last_flush_at = self._started_at
+        self.thread_count = 0
+        self.message_count = 0
+
+    async def record_thread(self, status_line: str, message_count: int = 0):
+        self.thread_count += 1
+        self.message_count += message_count
+        self._pending_lines.append(status_line)
+
+        if (len(self._pending_lines) >= self._flush_every_n_threads or
+                time.monotonic() - self._last_flush_at >= self._flush_interval_seconds):
+            await self.flush()
+
+    async def flush(self, final_line: str = None):
+        for status_line in self._pending_lines:
+            if self._status_length + len(status_line) + 1 >= MAX_STATUS_MESSAGE_LENGTH:
+                await self._edit_status_message("\n".join(self._status_lines))
+                self._status_message = await self._send_message(ROLLOVER_MESSAGE_TEXT)
+                self._status_lines = ["---"]
+                self._status_length = len(self._status_lines[0])
+            self._status_lines.append(status_line)
+            self._status_length += len(status_line) + 1
+        self._pending_lines = []
+        self._last_flush_at = time.monotonic()
+
+        await self._edit_status_message("\n".join(self._status_lines) + "\n" +
+                                        (final_line if final_line is not None else self.get_progress_line()))
+
+    async def finish(self, final_line: str):
+        await self.flush(final_line=final_line)
+
+    def get_progress_line(self) -> str:
+        elapsed_seconds = max(time.monotonic() - self._started_at, 1e-6)
+        threads_per_second = self.thread_count / elapsed_seconds
+        messages_per_second = self.message_count / elapsed_seconds
+
+        eta = "unknown"
+        if threads_per_second > 0:
+            remaining_seconds = (self._total_thread_count - self.thread_count) / threads_per_second
+            eta = str(timedelta(seconds=round(max(remaining_seconds, 0))))
+        return (f"`{self.thread_count}/{self._total_thread_count} threads "
+                f"({threads_per_second:.2f} threads/s, {messages_per_second:.1f} messages/s) - ETA {eta}`")
+
+    async def _edit_status_message(self, content: str):
+        try:
+            self._status_message = await self._status_message.edit(content=content)
+        except HTTPException as e:
+            # the status message is just for show, so don't let it take the scrape down
+            logger.warning(f"Failed to update scrape status message: {e}")
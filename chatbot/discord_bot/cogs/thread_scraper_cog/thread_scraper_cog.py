@@ -1,24 +1,74 @@
+import asyncio
 import logging
 import os
+from collections import deque, defaultdict, OrderedDict
 from copy import deepcopy
 from datetime import datetime
+from typing import Optional, Dict, List, NamedTuple, Union
 
 import discord
-from discord import Forbidden
+from discord import Forbidden, HTTPException
 from discord.ext import commands
-
-from chatbot.discord_bot.cogs.thread_scraper_cog.message_anonymizer import anonymize_message
-from chatbot.discord_bot.cogs.thread_scraper_cog.thread_stats import ThreadStats
-from chatbot.mongo_database.mongo_database_manager import MongoDatabaseManager
-from chatbot.student_info.find_student_name import find_student_info, get_initials
-from chatbot.student_info.load_student_info import load_student_info
+from pymongo import UpdateOne, IndexModel
+
+from chatbot.discord_bot.cogs.thread_scraper_cog.anonymized_thread_projector import project_anonymized_threads, \
+    THREAD_COLLECTION_INDEXES
+from chatbot.discord_bot.cogs.thread_scraper_cog.message_anonymizer import MessageAnonymizer
+from chatbot.discord_bot.cogs.thread_scraper_cog.roster_name_redactor import RosterNameRedactor
+from chatbot.discord_bot.cogs.thread_scraper_cog.scrape_progress_reporter import ScrapeProgressReporter, \
+    DEFAULT_FLUSH_INTERVAL_SECONDS
+from chatbot.discord_bot.cogs.thread_scraper_cog.scrape_checkpoint import load_scrape_checkpoint, \
+    start_scrape_checkpoint, record_thread_completed, record_channel_completed, record_scrape_finished
+from chatbot.discord_bot.cogs.thread_scraper_cog.thread_stats import ThreadStats, build_thread_stats_fields
+from chatbot.mongo_database.data_getters import load_thread_messages
+from chatbot.mongo_database.incremental_backups import backup_collection
+from chatbot.mongo_database.mongo_database_manager import MongoDatabaseManager, add_updated_at
+from chatbot.student_info.find_student_name import async_find_student_info, get_initials
+from chatbot.student_info.student_directory import get_student_directory
+from chatbot.student_info.uuid_registry import async_flush_uuid_registry
 from chatbot.system.environment_variables import get_admin_users
-from chatbot.system.filenames_and_paths import get_thread_backups_collection_name
+from chatbot.system.filenames_and_paths import get_thread_backups_collection_name, \
+    get_thread_messages_collection_name, get_anonymized_collection_name
 
 logger = logging.getLogger(__name__)
 
 logging.getLogger('discord').setLevel(logging.INFO)
 
+MAX_RATE_LIMIT_RETRIES = 5
+RATE_LIMIT_BASE_BACKOFF_SECONDS = 2
+# edits, deletions and reactions in a thread within this long of each other share one statistics rebuild
+THREAD_STATS_REBUILD_DELAY_SECONDS = 5.0
+# how many live threads to remember the stored state of, see `StoredThreadState`
+MAX_LIVE_THREAD_STATES = 100
+
+MESSAGES_COLLECTION_INDEXES = [IndexModel([("id", 1)], unique=True),
+                               IndexModel([("thread_id", 1), ("created_at", 1)])]
+
+
+async def iterate_messages(messages: List[discord.Message]):
+    for message in messages:
+        yield message
+
+
+class StoredThreadState(NamedTuple):
+    # the parts of a thread document needed to append messages to it. kept for live threads, so each new message
+    # doesn't have to read the thread documents back first
+    high_water_mark: Optional[dict]
+    normalized_messages: bool
+    thread_stats: ThreadStats
+    anonymized_thread_stats: ThreadStats
+
+
+class ThreadUpdates(NamedTuple):
+    # the anonymized updates are None when the anonymized copy is left to `project_anonymized_threads`
+    thread_update: UpdateOne
+    anonymized_thread_update: Optional[UpdateOne]
+    message_updates: List[UpdateOne]
+    anonymized_message_updates: Optional[List[UpdateOne]]
+    high_water_mark: dict
+    new_message_count: int
+    stored_thread_state: StoredThreadState
+
 
 class ThreadScraperCog(commands.Cog):
     def __init__(self,
@@ -26,7 +76,14 @@ class ThreadScraperCog(commands.Cog):
                  mongo_database_manager: MongoDatabaseManager):
         self.bot = bot
         self.mongo_database_manager = mongo_database_manager
-        self.student_info = load_student_info()
+        self.student_info = None
+        self.roster_name_redactor = None
+        self.message_anonymizer = None
+        self.refresh_roster()
+        self._live_synced_thread_ids = set()
+        self._thread_ingestion_locks = defaultdict(asyncio.Lock)
+        self._live_thread_states: OrderedDict[int, StoredThreadState] = OrderedDict()
+        self._pending_thread_stats_rebuilds: Dict[int, asyncio.Task] = {}
 
     @discord.slash_command(name='scrape_threads', description='(ADMIN ONLY) Scrape all threads in the current server')
     @discord.option(name="timestamp_backup",
@@ -37,17 +94,48 @@ class ThreadScraperCog(commands.Cog):
                     description="Whether or not to backup the entire server",
                     input_type=bool,
                     default=True)
+    @discord.option(name="full_rescan",
+                    description="Ignore the stored high-water marks and re-scrape every thread from the beginning",
+                    input_type=bool,
+                    default=False)
+    @discord.option(name="max_concurrent_threads",
+                    description="How many thread histories to fetch from discord at the same time",
+                    input_type=int,
+                    default=4)
+    @discord.option(name="resume",
+                    description="Pick up from the checkpoint left by an unfinished scrape of this server",
+                    input_type=bool,
+                    default=False)
+    @discord.option(name="normalized_messages",
+                    description="Store messages in a separate collection instead of embedding them in the thread documents",
+                    input_type=bool,
+                    default=False)
+    @discord.option(name="anonymize_inline",
+                    description="Write the anonymized copy while scraping, instead of projecting it from the raw backups afterwards",
+                    input_type=bool,
+                    default=True)
+    @discord.option(name="status_update_interval_seconds",
+                    description="How often to update the status message with the scrape's progress",
+                    input_type=float,
+                    default=DEFAULT_FLUSH_INTERVAL_SECONDS)
     async def scrape_threads(self,
                              ctx: discord.ApplicationContext,
                              timestamp_backup: bool = True,
                              full_server_backup: bool = True,
+                             full_rescan: bool = False,
+                             max_concurrent_threads: int = 4,
+                             resume: bool = False,
+                             normalized_messages: bool = False,
+                             anonymize_inline: bool = True,
+                             status_update_interval_seconds: float = DEFAULT_FLUSH_INTERVAL_SECONDS,
                              ):
 
         total_thread_count = 0
+        max_concurrent_threads = max(1, max_concurrent_threads)
 
         collection_name = get_thread_backups_collection_name(server_name=ctx.guild.name)
 
-        anonymized_collection_name = "anonymized_" + collection_name
+        anonymized_collection_name = get_anonymized_collection_name(collection_name)
 
         # Make sure we're only responding to the admin users
         if not ctx.user.id in get_admin_users():
@@ -57,56 +145,295 @@ class ThreadScraperCog(commands.Cog):
         status_message = await ctx.author.send(
             f"Starting thread scraping process for server: {ctx.guild.name} on {datetime.now().isoformat()}\n___________\n")
 
+        checkpoint = None
+        if resume:
+            checkpoint = await load_scrape_checkpoint(mongo_database_manager=self.mongo_database_manager,
+                                                      server_name=ctx.guild.name,
+                                                      collection_name=collection_name)
+            if checkpoint is None or checkpoint.finished:
+                logger.info(f"No unfinished scrape checkpoint for server: {ctx.guild.name}, starting from the beginning")
+                checkpoint = None
+            else:
+                logger.info(f"Resuming scrape started at {checkpoint.started_at} - "
+                            f"{len(checkpoint.channels_completed)} channels and "
+                            f"{len(checkpoint.completed_thread_ids)} threads already completed")
+        if checkpoint is None:
+            checkpoint = await start_scrape_checkpoint(mongo_database_manager=self.mongo_database_manager,
+                                                       server_name=ctx.guild.name,
+                                                       collection_name=collection_name)
+        completed_channel_ids = set(checkpoint.channels_completed)
+        completed_thread_ids = set(checkpoint.completed_thread_ids)
+
         channels = await self.get_channels(ctx, full_server_backup)
-        thread_count_per_channel = {}
-        for channel in channels:
-            if not isinstance(channel, discord.TextChannel):
-                continue
-            threads = await self.get_list_of_threads(channel)
+        text_channels = [channel for channel in channels
+                         if isinstance(channel, discord.TextChannel) and channel.id not in completed_channel_ids]
+        active_threads_by_channel_id = await self.get_active_threads_by_channel_id(ctx.guild)
+        threads_per_channel = await self.gather_with_concurrency(
+            [self.get_list_of_threads(channel=channel,
+                                      active_threads=active_threads_by_channel_id.get(channel.id))
+             for channel in text_channels],
+            max_concurrency=max_concurrent_threads)
+
+        for thread_collection_name in [collection_name, anonymized_collection_name]:
+            await self.mongo_database_manager.ensure_indexes(collection=thread_collection_name,
+                                                             indexes=THREAD_COLLECTION_INDEXES)
+        stored_thread_entries_by_id = {}
+        if not full_rescan:
+            stored_thread_entries_by_id = await self.load_stored_thread_entries(
+                collection_name=collection_name,
+                thread_ids=[thread.id for threads in threads_per_channel for thread in threads])
+
+        channels_and_threads = []
+        remaining_thread_count_per_channel = {}
+        skipped_thread_count = 0
+        for channel, threads in zip(text_channels, threads_per_channel):
+            threads = [thread for thread in threads if thread.id not in completed_thread_ids]
+            unchanged_thread_ids = {thread.id for thread in threads
+                                    if self.thread_is_unchanged(
+                                        thread=thread,
+                                        stored_thread_entry=stored_thread_entries_by_id.get(thread.id),
+                                        normalized_messages=normalized_messages)}
+            skipped_thread_count += len(unchanged_thread_ids)
+            threads = [thread for thread in threads if thread.id not in unchanged_thread_ids]
             if len(threads) == 0:
-                logger.info(f"No threads in channel: {channel.name}")
+                logger.info(f"No threads left to scrape in channel: {channel.name}")
+                await record_channel_completed(mongo_database_manager=self.mongo_database_manager,
+                                               checkpoint=checkpoint,
+                                               channel_id=channel.id)
                 continue
+            remaining_thread_count_per_channel[channel.id] = len(threads)
+            channels_and_threads.extend([(channel, thread) for thread in threads])
+
+        message_anonymizer = self.create_message_anonymizer()
+        progress_reporter = ScrapeProgressReporter(status_message=status_message,
+                                                   send_message=ctx.author.send,
+                                                   total_thread_count=len(channels_and_threads),
+                                                   flush_interval_seconds=status_update_interval_seconds)
+
+        # Fetch up to `max_concurrent_threads` thread histories at once, but write them to the database in the same
+        # order as the sequential scrape would, so the backups stay comparable between runs
+        in_flight = deque()
+        upcoming = iter(channels_and_threads)
+        previous_thread_written = None
+        try:
+            while True:
+                while len(in_flight) < max_concurrent_threads:
+                    next_channel_and_thread = next(upcoming, None)
+                    if next_channel_and_thread is None:
+                        break
+                    channel, thread = next_channel_and_thread
+                    thread_written = asyncio.Event()
+                    in_flight.append((channel, thread, asyncio.create_task(
+                        self.scrape_thread(thread=thread,
+                                           channel=channel,
+                                           server_name=ctx.guild.name,
+                                           collection_name=collection_name,
+                                           anonymized_collection_name=anonymized_collection_name,
+                                           full_rescan=full_rescan,
+                                           normalized_messages=normalized_messages,
+                                           message_anonymizer=message_anonymizer,
+                                           anonymize=anonymize_inline,
+                                           previous_thread_written=previous_thread_written,
+                                           thread_written=thread_written))))
+                    previous_thread_written = thread_written
+                if len(in_flight) == 0:
+                    break
 
-            thread_count_per_channel[channel.name] = 0
-            for thread in threads:  # Loop through each thread
-                thread_stats = ThreadStats(bot_id=self.bot.user.id)
-                anonymized_thread_stats = ThreadStats(bot_id=self.bot.user.id)
-
+                channel, thread, scrape_task = in_flight.popleft()
                 total_thread_count += 1
-                thread_count_per_channel[channel.name] += 1
 
                 saving_thread_string = f"{total_thread_count}: Channel:`{str(channel)}`:{thread.jump_url}"
                 logger.info(saving_thread_string)
 
-                status_message = await self.send_status_message_update(ctx, saving_thread_string, status_message)
-
-                thread_owner_username = thread.name.split("'")[0]
-                student_discord_username, \
-                    student_name, \
-                    student_uuid = find_student_info(
-                    thread_owner_username)
-
-                mongo_query = {
-                    "_student_name": student_name,
-                    "_student_username": student_discord_username,
-                    "_student_uuid": student_uuid,
-                    "_student_initials": get_initials(name=student_name),
-                    "server_name": ctx.guild.name,
-                    "thread_title": thread.name,
-                    "thread_id": thread.id,
-                    "thread_url": thread.jump_url,
-                    "created_at": thread.created_at,
-                    "channel": channel.name,
-                }
-
-                anonymized_mongo_query = deepcopy(mongo_query)
-                anonymized_mongo_query["_student_name"] = "REDACTED"
-                anonymized_mongo_query["_student_username"] = "REDACTED"
-                anonymized_mongo_query["thread_title"] = "REDACTED"
-
-                async for message in thread.history(limit=None, oldest_first=True):
+                thread_updates = await scrape_task
+
+                await record_thread_completed(
+                    mongo_database_manager=self.mongo_database_manager,
+                    checkpoint=checkpoint,
+                    thread_id=thread.id,
+                    last_message_id=thread_updates.high_water_mark["message_id"] if thread_updates else None)
+                await progress_reporter.record_thread(
+                    status_line=saving_thread_string,
+                    message_count=thread_updates.new_message_count if thread_updates else 0)
+                remaining_thread_count_per_channel[channel.id] -= 1
+                if remaining_thread_count_per_channel[channel.id] == 0:
+                    await record_channel_completed(mongo_database_manager=self.mongo_database_manager,
+                                                   checkpoint=checkpoint,
+                                                   channel_id=channel.id)
+        finally:
+            for _, _, scrape_task in in_flight:
+                scrape_task.cancel()
+
+        await record_scrape_finished(mongo_database_manager=self.mongo_database_manager,
+                                     checkpoint=checkpoint)
+        await async_flush_uuid_registry()
+
+        if not anonymize_inline:
+            # now that we're off discord, catch the anonymized copy up with every thread we just wrote
+            await project_anonymized_threads(mongo_database_manager=self.mongo_database_manager,
+                                             collection_name=collection_name,
+                                             bot_id=self.bot.user.id,
+                                             message_anonymizer=message_anonymizer,
+                                             incremental=True)
+
+        database_backup_path = os.getenv("PATH_TO_COURSE_DATABASE_BACKUPS")
+        if database_backup_path is None:
+            raise Exception("PATH_TO_COURSE_DATABASE_BACKUPS not set in .env file")
+
+        # only the documents written since the last backup, see `restore_collection` to put them back together. With
+        # `normalized_messages` the messages live in their own collections, so those need backing up too
+        backup_collection_names = [collection_name]
+        if normalized_messages:
+            backup_collection_names += [get_thread_messages_collection_name(collection_name),
+                                        get_thread_messages_collection_name(anonymized_collection_name)]
+        for backup_collection_name in backup_collection_names:
+            await backup_collection(mongo_database_manager=self.mongo_database_manager,
+                                    collection_name=backup_collection_name,
+                                    backup_folder=database_backup_path)
+
+        await progress_reporter.finish(f"Finished saving {total_thread_count} threads "
+                                       f"({progress_reporter.message_count} new messages), "
+                                       f"skipped {skipped_thread_count} unchanged threads")
+        print(f"Finished saving {total_thread_count} threads, skipped {skipped_thread_count} unchanged threads")
+
+    async def scrape_thread(self,
+                            thread: discord.Thread,
+                            channel: discord.TextChannel,
+                            server_name: str,
+                            collection_name: str,
+                            anonymized_collection_name: str,
+                            full_rescan: bool,
+                            normalized_messages: bool,
+                            message_anonymizer: MessageAnonymizer,
+                            anonymize: bool,
+                            previous_thread_written: Optional[asyncio.Event],
+                            thread_written: asyncio.Event) -> Optional[ThreadUpdates]:
+        # hold the same lock as the live ingestion from reading the thread documents until the new ones are written,
+        # so a message posted in the thread mid-scrape can't be written in between and then overwritten
+        async with self._thread_ingestion_locks[thread.id]:
+            thread_updates = await self.build_thread_updates(thread=thread,
+                                                             channel=channel,
+                                                             server_name=server_name,
+                                                             collection_name=collection_name,
+                                                             anonymized_collection_name=anonymized_collection_name,
+                                                             full_rescan=full_rescan,
+                                                             normalized_messages=normalized_messages,
+                                                             message_anonymizer=message_anonymizer,
+                                                             anonymize=anonymize)
+            if previous_thread_written is not None:
+                await previous_thread_written.wait()
+            await self.write_thread_updates(thread_updates=thread_updates,
+                                            collection_name=collection_name,
+                                            anonymized_collection_name=anonymized_collection_name)
+            # what the live ingestion remembers about this thread is out of date now
+            self._live_thread_states.pop(thread.id, None)
+        thread_written.set()
+        return thread_updates
+
+    async def build_thread_updates(self,
+                                   thread: discord.Thread,
+                                   channel: discord.TextChannel,
+                                   server_name: str,
+                                   collection_name: str,
+                                   anonymized_collection_name: str,
+                                   full_rescan: bool = False,
+                                   normalized_messages: bool = None,
+                                   new_messages: List[discord.Message] = None,
+                                   message_anonymizer: MessageAnonymizer = None,
+                                   anonymize: bool = True,
+                                   stored_thread_state: StoredThreadState = None) -> Optional[ThreadUpdates]:
+        if message_anonymizer is None:
+            message_anonymizer = self.create_message_anonymizer()
+
+        # taken before reading the history, so anything posted while we read it shows up as a change next time
+        thread_metadata = self.get_thread_metadata(thread) if new_messages is None else None
+
+        thread_owner_username = thread.name.split("'")[0]
+        try:
+            student_discord_username, \
+                student_name, \
+                student_uuid = await async_find_student_info(
+                thread_owner_username)
+        except ValueError as e:
+            # nobody on the roster to file the thread under (yet), so leave it until they've been added
+            logger.warning(f"Skipping thread {thread.id} ({thread.name}): {e}")
+            return None
+
+        # what the thread document says about the thread - it's matched on `thread_id` alone, so renames and roster
+        # changes update the existing document instead of starting a second one
+        thread_descriptor = {
+            "_student_name": student_name,
+            "_student_username": student_discord_username,
+            "_student_uuid": student_uuid,
+            "_student_initials": get_initials(name=student_name),
+            "server_name": server_name,
+            "thread_title": thread.name,
+            "thread_id": thread.id,
+            "thread_url": thread.jump_url,
+            "created_at": thread.created_at,
+            "channel": channel.name,
+        }
+
+        anonymized_thread_descriptor = deepcopy(thread_descriptor)
+        anonymized_thread_descriptor["_student_name"] = "REDACTED"
+        anonymized_thread_descriptor["_student_username"] = "REDACTED"
+        anonymized_thread_descriptor["thread_title"] = "REDACTED"
+
+        existing_thread_entry = None
+        if stored_thread_state is None and not full_rescan:
+            existing_thread_entry = await self.mongo_database_manager.get_collection(
+                collection_name).find_one({"thread_id": thread.id})
+            existing_anonymized_thread_entry = None
+            if anonymize:
+                existing_anonymized_thread_entry = await self.mongo_database_manager.get_collection(
+                    anonymized_collection_name).find_one({"thread_id": thread.id})
+            stored_thread_state = self.restore_stored_thread_state(existing_thread_entry,
+                                                                   existing_anonymized_thread_entry)
+
+        stored_normalized_messages = None
+        if stored_thread_state is not None:
+            stored_normalized_messages = stored_thread_state.normalized_messages
+        if normalized_messages is None:
+            normalized_messages = bool(stored_normalized_messages)
+
+        history_after = None
+        high_water_mark = stored_thread_state.high_water_mark if stored_thread_state is not None else None
+        if high_water_mark is None or stored_normalized_messages not in [None, normalized_messages]:
+            # no high-water mark means we can't trust the stored statistics, and if the messages are moving in or out
+            # of the thread document we need all of them, so rebuild everything from scratch
+            high_water_mark = None
+            existing_thread_entry = None
+            stored_thread_state = None
+            new_messages = None
+        else:
+            history_after = discord.Object(id=high_water_mark["message_id"])
+            if new_messages is not None:
+                new_messages = [message for message in new_messages if message.id > high_water_mark["message_id"]]
+            logger.info(f"Resuming thread {thread.id} after message {high_water_mark['message_id']} "
+                        f"(created at {high_water_mark['created_at']})")
+
+        if stored_thread_state is None:
+            thread_stats = ThreadStats(bot_id=self.bot.user.id)
+            anonymized_thread_stats = ThreadStats(bot_id=self.bot.user.id)
+        else:
+            thread_stats = stored_thread_state.thread_stats
+            anonymized_thread_stats = stored_thread_state.anonymized_thread_stats
+
+        message_update_packages = []
+        anonymized_message_update_packages = []
+        for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+            try:
+                if new_messages is None:
+                    messages = thread.history(limit=None, after=history_after, oldest_first=True)
+                else:
+                    messages = iterate_messages(new_messages)
+                async for message in messages:
                     thread_stats.update(message)
-                    anonymized_thread_stats.update(anonymize_message(message))
+                    if anonymize:
+                        anonymized_content = message_anonymizer.anonymize_message(message)
+                        anonymized_thread_stats.update(message, content=anonymized_content, author_str="REDACTED")
+                    # if we get rate limited part way through, pick back up after the last message we've seen
+                    history_after = message
                     message_author_str = str(message.author)
 
                     message_content = message.content
@@ -126,68 +453,426 @@ class ThreadScraperCog(commands.Cog):
                         'parent_message_id': message.reference.message_id if message.reference else '',
                     }
 
-                    anonymized_message_update_package = deepcopy(message_update_package)
-                    anonymized_message_update_package['author'] = "REDACTED"
-                    anonymized_message_update_package['author_id'] = "REDACTED"
-                    anonymized_message_update_package['user_id'] = "REDACTED"
-                    anonymized_message_update_package['content'] = anonymize_message(message).content
-
-                    thread_stats_dict = thread_stats.dict()
-                    thread_as_list_of_strings = deepcopy(thread_stats_dict['thread_as_list_of_strings'])
-                    thread_as_one_string = deepcopy(thread_stats_dict['thread_as_one_string'])
-                    del thread_stats_dict['thread_as_list_of_strings']
-                    del thread_stats_dict['thread_as_one_string']
-
-                    anonymized_thread_stats_dict = anonymized_thread_stats.dict()
-                    anonymized_thread_as_list_of_strings = deepcopy(
-                        anonymized_thread_stats_dict['thread_as_list_of_strings'])
-                    anonymized_thread_as_one_string = deepcopy(anonymized_thread_stats_dict['thread_as_one_string'])
-                    del anonymized_thread_stats_dict['thread_as_list_of_strings']
-                    del anonymized_thread_stats_dict['thread_as_one_string']
-
-                    await self.mongo_database_manager.upsert(
-                        collection=collection_name,
-                        query=mongo_query,
-                        data={"$addToSet": {"messages": message_update_package},
-                              "$set": {"thread_as_list_of_strings": thread_as_list_of_strings,
-                                       "thread_as_one_string": thread_as_one_string,
-                                       "thread_statistics": thread_stats_dict,
-                                       }
-                              }
-                    )
-                    await self.mongo_database_manager.upsert(
-                        collection=anonymized_collection_name,
-                        query=anonymized_mongo_query,
-                        data={"$addToSet": {"messages": anonymized_message_update_package},
-                              "$set": {"thread_as_list_of_strings": anonymized_thread_as_list_of_strings,
-                                       "thread_as_one_string": anonymized_thread_as_one_string,
-                                       "thread_statistics": anonymized_thread_stats_dict,
-                                       }
-                              }
-                    )
-
-        file_name = f"{ctx.guild.name}_thread_backup_{datetime.now().isoformat(sep='_')}.json"
-        database_backup_path = os.getenv("PATH_TO_COURSE_DATABASE_BACKUPS")
-        if database_backup_path is None:
-            raise Exception("PATH_TO_COURSE_DATABASE_BACKUPS not set in .env file")
+                    message_update_packages.append(message_update_package)
+                    if anonymize:
+                        anonymized_message_update_package = deepcopy(message_update_package)
+                        anonymized_message_update_package['author'] = "REDACTED"
+                        anonymized_message_update_package['author_id'] = "REDACTED"
+                        anonymized_message_update_package['user_id'] = "REDACTED"
+                        anonymized_message_update_package['content'] = anonymized_content
+                        anonymized_message_update_packages.append(anonymized_message_update_package)
+
+                    high_water_mark = {"message_id": message.id,
+                                       "created_at": message.created_at}
+                break
+            except HTTPException as e:
+                # discord's HTTP client already waits out the per-route rate-limit buckets and retries 429s a few
+                # times, so if one still makes it up to here we back off a bit harder before trying again
+                if e.status != 429 or attempt == MAX_RATE_LIMIT_RETRIES:
+                    raise
+                backoff_seconds = RATE_LIMIT_BASE_BACKOFF_SECONDS * 2 ** attempt
+                logger.warning(f"Rate limited while scraping thread {thread.id}, "
+                               f"backing off for {backoff_seconds} seconds (attempt {attempt + 1})")
+                await asyncio.sleep(backoff_seconds)
+
+        stored_thread_state = StoredThreadState(high_water_mark=high_water_mark,
+                                                normalized_messages=normalized_messages,
+                                                thread_stats=thread_stats,
+                                                anonymized_thread_stats=anonymized_thread_stats)
+
+        if len(message_update_packages) == 0:
+            logger.info(f"No new messages in thread: {thread.name}")
+            if (thread_metadata is None or existing_thread_entry is None or
+                    existing_thread_entry.get("thread_metadata") == thread_metadata):
+                return None
+            # nothing new to store, but remember what the thread looks like now so the next scrape can skip it
+            return ThreadUpdates(thread_update=UpdateOne({"thread_id": thread.id},
+                                                         add_updated_at({"$set": {"thread_metadata": thread_metadata}},
+                                                                        datetime.now())),
+                                 anonymized_thread_update=None,
+                                 message_updates=[],
+                                 anonymized_message_updates=None,
+                                 high_water_mark=high_water_mark,
+                                 new_message_count=0,
+                                 stored_thread_state=stored_thread_state)
+
+        anonymized_thread_update = None
+        anonymized_message_updates = None
+        if anonymize:
+            anonymized_thread_update = self.build_thread_update(
+                thread_descriptor=anonymized_thread_descriptor,
+                message_update_packages=anonymized_message_update_packages,
+                thread_stats=anonymized_thread_stats,
+                high_water_mark=high_water_mark,
+                normalized_messages=normalized_messages)
+            anonymized_message_updates = self.build_message_updates(
+                thread_id=thread.id,
+                message_update_packages=anonymized_message_update_packages,
+                normalized_messages=normalized_messages)
+
+        return ThreadUpdates(
+            thread_update=self.build_thread_update(thread_descriptor=thread_descriptor,
+                                                   message_update_packages=message_update_packages,
+                                                   thread_stats=thread_stats,
+                                                   high_water_mark=high_water_mark,
+                                                   normalized_messages=normalized_messages,
+                                                   thread_metadata=thread_metadata),
+            anonymized_thread_update=anonymized_thread_update,
+            message_updates=self.build_message_updates(thread_id=thread.id,
+                                                       message_update_packages=message_update_packages,
+                                                       normalized_messages=normalized_messages),
+            anonymized_message_updates=anonymized_message_updates,
+            high_water_mark=high_water_mark,
+            new_message_count=len(message_update_packages),
+            stored_thread_state=stored_thread_state)
+
+    async def write_thread_updates(self,
+                                   thread_updates: Optional[ThreadUpdates],
+                                   collection_name: str,
+                                   anonymized_collection_name: str):
+        # write each thread document once, rather than re-writing the whole thing for every message
+        if thread_updates is None:
+            return
 
-        save_path = os.path.join(database_backup_path, file_name)
-        await self.mongo_database_manager.save_json(collection_name=collection_name, save_path=save_path)
+        # write the messages before the thread document, so the high-water mark never gets ahead of the messages
+        for messages_collection_name, message_updates in [
+            (get_thread_messages_collection_name(collection_name), thread_updates.message_updates),
+            (get_thread_messages_collection_name(anonymized_collection_name), thread_updates.anonymized_message_updates)]:
+            if not message_updates:
+                continue
+            await self.mongo_database_manager.ensure_indexes(collection=messages_collection_name,
+                                                             indexes=MESSAGES_COLLECTION_INDEXES)
+            await self.mongo_database_manager.bulk_write(collection=messages_collection_name,
+                                                         operations=message_updates,
+                                                         ordered=False)
+
+        await self.mongo_database_manager.ensure_indexes(collection=collection_name,
+                                                         indexes=THREAD_COLLECTION_INDEXES)
+        await self.mongo_database_manager.bulk_write(collection=collection_name,
+                                                     operations=[thread_updates.thread_update])
+        if thread_updates.anonymized_thread_update is not None:
+            await self.mongo_database_manager.ensure_indexes(collection=anonymized_collection_name,
+                                                             indexes=THREAD_COLLECTION_INDEXES)
+            await self.mongo_database_manager.bulk_write(collection=anonymized_collection_name,
+                                                         operations=[thread_updates.anonymized_thread_update])
+
+    def build_thread_update(self,
+                            thread_descriptor: dict,
+                            message_update_packages: list,
+                            thread_stats: ThreadStats,
+                            high_water_mark: dict,
+                            normalized_messages: bool = False,
+                            thread_metadata: dict = None) -> UpdateOne:
+        thread_fields = {**thread_descriptor,
+                         **build_thread_stats_fields(thread_stats, normalized_messages=normalized_messages),
+                         "high_water_mark": high_water_mark,
+                         "normalized_messages": normalized_messages,
+                         }
+        if thread_metadata is not None:
+            thread_fields["thread_metadata"] = thread_metadata
+        if normalized_messages:
+            # the thread document only holds the thread's metadata and aggregates, the messages live in their own
+            # collection (see `build_message_updates`)
+            return UpdateOne({"thread_id": thread_descriptor["thread_id"]},
+                             add_updated_at({"$set": thread_fields,
+                                             "$unset": {"messages": "",
+                                                        "thread_as_list_of_strings": "",
+                                                        "thread_as_one_string": ""}},
+                                            datetime.now()),
+                             upsert=True)
+
+        return UpdateOne({"thread_id": thread_descriptor["thread_id"]},
+                         add_updated_at({"$addToSet": {"messages": {"$each": message_update_packages}},
+                                         "$set": thread_fields
+                                         },
+                                        datetime.now()),
+                         upsert=True)
+
+    def build_message_updates(self,
+                              thread_id: int,
+                              message_update_packages: list,
+                              normalized_messages: bool = False) -> List[UpdateOne]:
+        if not normalized_messages:
+            return []
+        updated_at = datetime.now()
+        return [UpdateOne({"id": message_update_package["id"]},
+                          add_updated_at({"$set": {**message_update_package, "thread_id": thread_id}}, updated_at),
+                          upsert=True)
+                for message_update_package in message_update_packages]
+
+    @discord.Cog.listener()
+    async def on_ready(self):
+        # we may have missed events while disconnected, so catch every thread up from its high-water mark again
+        self._live_synced_thread_ids.clear()
+        self._live_thread_states.clear()
+
+    @discord.Cog.listener()
+    async def on_message(self, message: discord.Message):
+        if not self.is_bot_owned_thread(message.channel):
+            return
+        try:
+            await self.ingest_thread_messages(thread=message.channel, new_messages=[message])
+        except Exception as e:
+            logger.exception(f"Failed to ingest message {message.id} in thread {message.channel.id}: {e}")
+
+    @discord.Cog.listener()
+    async def on_raw_message_edit(self, payload: discord.RawMessageUpdateEvent):
+        new_content = payload.data.get("content")
+        if new_content is None:
+            return
+        if not self.is_bot_owned_thread(self.bot.get_channel(payload.channel_id)):
+            return
+        if new_content == '':
+            # the scraper doesn't store messages without text content
+            await self.on_raw_message_delete(payload)
+            return
+        self.refresh_roster()
+        await self.update_ingested_message(channel_id=payload.channel_id,
+                                           message_id=payload.message_id,
+                                           message_fields={"content": new_content},
+                                           anonymized_message_fields={"content": self.message_anonymizer.anonymize_text(new_content)})
+
+    @discord.Cog.listener()
+    async def on_raw_message_delete(self, payload: Union[discord.RawMessageDeleteEvent,
+                                                         discord.RawMessageUpdateEvent]):
+        await self.update_ingested_message(channel_id=payload.channel_id,
+                                           message_id=payload.message_id,
+                                           message_fields=None,
+                                           anonymized_message_fields=None)
+
+    @discord.Cog.listener()
+    async def on_raw_reaction_add(self, payload: discord.RawReactionActionEvent):
+        await self.update_ingested_reactions(payload)
+
+    @discord.Cog.listener()
+    async def on_raw_reaction_remove(self, payload: discord.RawReactionActionEvent):
+        await self.update_ingested_reactions(payload)
+
+    def refresh_roster(self):
+        # picks up students that have been added to the roster CSV since the redactor was built
+        student_info = get_student_directory().student_info
+        if student_info is self.student_info:
+            return
+        self.student_info = student_info
+        self.roster_name_redactor = RosterNameRedactor.from_student_info(student_info)
+        self.message_anonymizer = MessageAnonymizer(roster_name_redactor=self.roster_name_redactor)
+
+    def create_message_anonymizer(self) -> MessageAnonymizer:
+        self.refresh_roster()
+        return MessageAnonymizer(roster_name_redactor=self.roster_name_redactor)
+
+    def is_bot_owned_thread(self, channel) -> bool:
+        return isinstance(channel, discord.Thread) and channel.owner_id == self.bot.user.id
+
+    async def ingest_thread_messages(self,
+                                     thread: discord.Thread,
+                                     new_messages: List[discord.Message]):
+        collection_name = get_thread_backups_collection_name(server_name=thread.guild.name)
+        anonymized_collection_name = get_anonymized_collection_name(collection_name)
+
+        channel = thread.parent
+        if channel is None:
+            channel = await self.bot.fetch_channel(thread.parent_id)
+
+        async with self._thread_ingestion_locks[thread.id]:
+            if thread.id not in self._live_synced_thread_ids:
+                # the first time we see a thread, catch it up from its high-water mark, which will include
+                # `new_messages`. after that we can append messages straight from the gateway events
+                new_messages = None
+
+            # appending to the thread's statistics mutates them, so they're only remembered again once written
+            stored_thread_state = self._live_thread_states.pop(thread.id, None) if new_messages is not None else None
+            thread_updates = await self.build_thread_updates(thread=thread,
+                                                             channel=channel,
+                                                             server_name=thread.guild.name,
+                                                             collection_name=collection_name,
+                                                             anonymized_collection_name=anonymized_collection_name,
+                                                             new_messages=new_messages,
+                                                             stored_thread_state=stored_thread_state)
+            await self.write_thread_updates(thread_updates=thread_updates,
+                                            collection_name=collection_name,
+                                            anonymized_collection_name=anonymized_collection_name)
+            self._live_synced_thread_ids.add(thread.id)
+
+            if thread_updates is not None:
+                stored_thread_state = thread_updates.stored_thread_state
+            if stored_thread_state is not None:
+                self._live_thread_states[thread.id] = stored_thread_state
+                if len(self._live_thread_states) > MAX_LIVE_THREAD_STATES:
+                    self._live_thread_states.popitem(last=False)
+
+    async def update_ingested_reactions(self, payload: discord.RawReactionActionEvent):
+        thread = self.bot.get_channel(payload.channel_id)
+        if not self.is_bot_owned_thread(thread):
+            return
+        try:
+            message = await thread.fetch_message(payload.message_id)
+        except discord.NotFound:
+            return
+        reactions = [str(reaction) for reaction in message.reactions]
+        await self.update_ingested_message(channel_id=payload.channel_id,
+                                           message_id=payload.message_id,
+                                           message_fields={"reactions": reactions},
+                                           anonymized_message_fields={"reactions": reactions})
+
+    async def update_ingested_message(self,
+                                      channel_id: int,
+                                      message_id: int,
+                                      message_fields: Optional[dict],
+                                      anonymized_message_fields: Optional[dict]):
+        # `message_fields=None` means the message was deleted
+        thread = self.bot.get_channel(channel_id)
+        if not self.is_bot_owned_thread(thread):
+            return
 
-        await status_message.edit(content=f"Finished saving {total_thread_count} threads")
-        print(f"Finished saving {total_thread_count} threads")
+        collection_name = get_thread_backups_collection_name(server_name=thread.guild.name)
+        anonymized_collection_name = get_anonymized_collection_name(collection_name)
+        try:
+            async with self._thread_ingestion_locks[thread.id]:
+                thread_entry = await self.mongo_database_manager.get_collection(collection_name).find_one(
+                    {"thread_id": thread.id}, {"normalized_messages": 1})
+                if thread_entry is None:
+                    return
+
+                for this_collection_name, fields in [(collection_name, message_fields),
+                                                     (anonymized_collection_name, anonymized_message_fields)]:
+                    if thread_entry.get("normalized_messages", False):
+                        messages_collection_name = get_thread_messages_collection_name(this_collection_name)
+                        if fields is None:
+                            await self.mongo_database_manager.delete(collection=messages_collection_name,
+                                                                     query={"id": message_id})
+                        else:
+                            await self.mongo_database_manager.update(collection=messages_collection_name,
+                                                                     query={"id": message_id},
+                                                                     data={"$set": fields})
+                    else:
+                        if fields is None:
+                            update = {"$pull": {"messages": {"id": message_id}}}
+                        else:
+                            update = {"$set": {f"messages.$.{key}": value for key, value in fields.items()}}
+                        await self.mongo_database_manager.update(collection=this_collection_name,
+                                                                 query={"thread_id": thread.id,
+                                                                        "messages.id": message_id},
+                                                                 data=update)
+
+            self.schedule_thread_stats_rebuild(thread_id=thread.id,
+                                               collection_name=collection_name,
+                                               anonymized_collection_name=anonymized_collection_name)
+        except Exception as e:
+            logger.exception(f"Failed to update message {message_id} in thread {thread.id}: {e}")
+
+    def schedule_thread_stats_rebuild(self,
+                                      thread_id: int,
+                                      collection_name: str,
+                                      anonymized_collection_name: str,
+                                      delay_seconds: float = THREAD_STATS_REBUILD_DELAY_SECONDS):
+        # a streamed bot reply is edited every second or so, so rather than rebuilding the statistics from every
+        # stored message for each edit, wait a moment and rebuild once for everything that changed in the meantime
+        if thread_id in self._pending_thread_stats_rebuilds:
+            return
 
-    async def send_status_message_update(self, ctx, saving_thread_string, status_message):
-        update_status_message_string = status_message.content + f"\n{saving_thread_string}"
-        number_of_characters_in_status_message = len(update_status_message_string)
-        print(f"Number of characters in status message: {number_of_characters_in_status_message}")
-        if number_of_characters_in_status_message >= 1900:
-            print(f"Sending new message because {number_of_characters_in_status_message} characters")
-            status_message = await ctx.author.send(
-                "`--2000 character limit reached, sending new message--`")
-            update_status_message_string = f"---\n{saving_thread_string}"
-        status_message = await  status_message.edit(content=update_status_message_string)
-        return status_message
+        async def rebuild_after_delay():
+            await asyncio.sleep(delay_seconds)
+            # anything that changes from here on schedules another rebuild
+            self._pending_thread_stats_rebuilds.pop(thread_id, None)
+            try:
+                async with self._thread_ingestion_locks[thread_id]:
+                    await self.rebuild_thread_stats(thread_id=thread_id,
+                                                    collection_name=collection_name,
+                                                    anonymized_collection_name=anonymized_collection_name)
+            except Exception as e:
+                logger.exception(f"Failed to rebuild the statistics for thread {thread_id}: {e}")
+
+        self._pending_thread_stats_rebuilds[thread_id] = asyncio.create_task(rebuild_after_delay())
+
+    async def rebuild_thread_stats(self,
+                                   thread_id: int,
+                                   collection_name: str,
+                                   anonymized_collection_name: str):
+        # edits, deletions and reactions can change any message, so recompute the statistics from the stored messages
+        self._live_thread_states.pop(thread_id, None)
+        thread_entry = await self.mongo_database_manager.get_collection(collection_name).find_one(
+            {"thread_id": thread_id})
+        if thread_entry is None:
+            return
+        normalized_messages = thread_entry.get("normalized_messages", False)
+        await load_thread_messages(mongo_database_manager=self.mongo_database_manager,
+                                   thread_entries=[thread_entry],
+                                   thread_collection_name=collection_name)
+
+        thread_stats = ThreadStats(bot_id=self.bot.user.id)
+        anonymized_thread_stats = ThreadStats(bot_id=self.bot.user.id)
+        self.refresh_roster()
+        for message_package in thread_entry["messages"]:
+            thread_stats.update_from_message_package(message_package)
+            anonymized_thread_stats.update_from_message_package(
+                {**message_package,
+                 "author": "REDACTED",
+                 "content": self.message_anonymizer.anonymize_text(message_package["content"])})
+
+        await self.mongo_database_manager.update(
+            collection=collection_name,
+            query={"thread_id": thread_id},
+            data={"$set": build_thread_stats_fields(thread_stats, normalized_messages=normalized_messages)})
+        await self.mongo_database_manager.update(
+            collection=anonymized_collection_name,
+            query={"thread_id": thread_id},
+            data={"$set": build_thread_stats_fields(anonymized_thread_stats,
+                                                    normalized_messages=normalized_messages)})
+
+    def restore_stored_thread_state(self,
+                                    existing_thread_entry: Optional[dict],
+                                    existing_anonymized_thread_entry: Optional[dict]) -> Optional[StoredThreadState]:
+        if existing_thread_entry is None:
+            return None
+        return StoredThreadState(high_water_mark=existing_thread_entry.get("high_water_mark"),
+                                 normalized_messages=existing_thread_entry.get("normalized_messages", False),
+                                 thread_stats=self.restore_thread_stats(existing_thread_entry),
+                                 anonymized_thread_stats=self.restore_thread_stats(existing_anonymized_thread_entry))
+
+    def restore_thread_stats(self, existing_thread_entry: dict = None) -> ThreadStats:
+        if existing_thread_entry is None or "thread_statistics" not in existing_thread_entry:
+            return ThreadStats(bot_id=self.bot.user.id)
+
+        return ThreadStats(**{**existing_thread_entry["thread_statistics"],
+                              "bot_id": self.bot.user.id,
+                              "thread_as_list_of_strings": existing_thread_entry.get("thread_as_list_of_strings", []),
+                              })
+
+    def get_thread_metadata(self, thread: discord.Thread) -> dict:
+        # discord sends these with every thread, so comparing them is free compared to fetching the history
+        return {"message_count": thread.message_count,
+                "last_message_id": thread.last_message_id,
+                "archived": thread.archived}
+
+    def thread_is_unchanged(self,
+                            thread: discord.Thread,
+                            stored_thread_entry: Optional[dict],
+                            normalized_messages: bool) -> bool:
+        if stored_thread_entry is None or stored_thread_entry.get("high_water_mark") is None:
+            return False
+        if stored_thread_entry.get("normalized_messages", False) != normalized_messages:
+            return False
+        thread_metadata = self.get_thread_metadata(thread)
+        if thread_metadata["last_message_id"] is None:
+            return False
+        return stored_thread_entry.get("thread_metadata") == thread_metadata
+
+    async def load_stored_thread_entries(self, collection_name: str, thread_ids: List[int]) -> Dict[int, dict]:
+        stored_thread_entries = self.mongo_database_manager.get_collection(collection_name).find(
+            {"thread_id": {"$in": thread_ids}},
+            {"thread_id": 1, "thread_metadata": 1, "normalized_messages": 1, "high_water_mark": 1})
+        return {stored_thread_entry["thread_id"]: stored_thread_entry
+                async for stored_thread_entry in stored_thread_entries}
+
+    async def gather_with_concurrency(self, coroutines: list, max_concurrency: int) -> list:
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def run_with_semaphore(coroutine):
+            async with semaphore:
+                return await coroutine
+
+        return await asyncio.gather(*[run_with_semaphore(coroutine) for coroutine in coroutines])
 
     async def get_channels(self, ctx, full_server_backup):
         if full_server_backup:
@@ -198,17 +883,30 @@ class ThreadScraperCog(commands.Cog):
             logger.info(f"Saving all threads in channel: {ctx.channel.name}")
         return channels
 
-    async def get_list_of_threads(self, channel: discord.TextChannel):
-        threads = []
+    async def get_active_threads_by_channel_id(self, guild: discord.Guild) -> Dict[int, List[discord.Thread]]:
+        active_threads_by_channel_id = defaultdict(list)
         try:
-            async for message in channel.history():
-                if message.thread:
-                    if not message.thread in threads:
-                        threads.append(message.thread)
+            for thread in await guild.active_threads():
+                active_threads_by_channel_id[thread.parent_id].append(thread)
         except Forbidden:
-            logger.info(f"Could not access channel: {channel.name}")
-            pass
-        return threads
+            logger.info(f"Could not list active threads in server: {guild.name}")
+        return active_threads_by_channel_id
+
+    async def get_list_of_threads(self,
+                                  channel: discord.TextChannel,
+                                  active_threads: List[discord.Thread] = None) -> List[discord.Thread]:
+        threads_by_id = {thread.id: thread for thread in active_threads or []}
+
+        for private in [False, True]:
+            try:
+                async for thread in channel.archived_threads(private=private, limit=None):
+                    threads_by_id[thread.id] = thread
+            except Forbidden:
+                logger.info(f"Could not access {'private' if private else 'public'} "
+                            f"archived threads in channel: {channel.name}")
+
+        # thread ids are snowflakes, so this is oldest-first and stable between runs
+        return [threads_by_id[thread_id] for thread_id in sorted(threads_by_id)]
 
     def determine_if_green_check_present(self, message: discord.Message):
         reactions = message.reactions
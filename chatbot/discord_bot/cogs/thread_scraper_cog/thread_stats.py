@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Any, Generator
 
 from discord import Message
 from pydantic import BaseModel, Field
@@ -16,25 +16,63 @@ class ThreadStats(BaseModel):
     wordcount_by_datetimes_by_type: Dict[str, List[Tuple[datetime, int]]] = Field(
         default_factory=lambda: {"total": [], "student": [], "bot": []},
         description="A dictionary of lists of [datetime, word_count] pairs for each entry in the count_types list (total, student, bot)")
-    thread_as_one_string: str = Field(default="")
 
     class Config:
         orm_mode = True
 
-    def update(self, message: Message):
-        is_bot_user = message.author.id == self.bot_id
-        message_author_str = str(message.author)
+    @property
+    def thread_as_one_string(self) -> str:
+        # joined when it's read, rather than after every message
+        return "\n".join(self.thread_as_list_of_strings)
 
-        message_content = message.content
+    def _iter(self, *args, **kwargs) -> Generator[Tuple[str, Any], None, None]:
+        # `.dict()` and `.json()` both serialize what this yields (with `to_dict`, unlike `.copy()`), so
+        # `thread_as_one_string` goes out with the fields unless it's been left out with `include`/`exclude`
+        yield from super()._iter(*args, **kwargs)
+        include = kwargs.get("include")
+        exclude = kwargs.get("exclude")
+        if kwargs.get("to_dict") and \
+                (include is None or "thread_as_one_string" in include) and \
+                (exclude is None or "thread_as_one_string" not in exclude):
+            yield "thread_as_one_string", self.thread_as_one_string
+
+    def update(self, message: Message, content: str = None, author_str: str = None):
+        # pass `content` and `author_str` to count the message with different (e.g. anonymized) text and author
+        self._update(author_id=message.author.id,
+                     author_str=author_str if author_str is not None else str(message.author),
+                     content=content if content is not None else message.content,
+                     created_at=message.created_at,
+                     reaction_emojis=[reaction.emoji for reaction in message.reactions])
+
+    def update_from_message_package(self, message_package: Dict[str, Any]):
+        # `message_package` is one of the entries in a thread backup's `messages` list
+        self._update(author_id=message_package["author_id"],
+                     author_str=message_package["author"],
+                     content=message_package["content"],
+                     created_at=message_package["created_at"],
+                     reaction_emojis=message_package["reactions"])
+
+    def _update(self,
+                author_id: int,
+                author_str: str,
+                content: str,
+                created_at: datetime,
+                reaction_emojis: List[Any]):
+        is_bot_user = author_id == self.bot_id
+        message_author_str = author_str
+
+        message_content = content
         if message_content == '':
             return
 
-        green_check_emoji_present_in_message = self.determine_if_green_check_present(message)
+        green_check_emoji_present_in_message = self.determine_if_green_check_present(reaction_emojis=reaction_emojis,
+                                                                                      content=message_content)
         if green_check_emoji_present_in_message:
             self.green_check_emoji_present = True
 
+        # everything in here is an append or a counter increment, so building the stats for a thread is linear in
+        # the number of messages - the joined `thread_as_one_string` is only built when it's read
         self.thread_as_list_of_strings.append(f"{message_author_str} said: '{message_content}'")
-        self.thread_as_one_string = "\n".join(self.thread_as_list_of_strings)
 
         message_word_count = len(message_content.split(' '))
         message_character_count = len(message_content)
@@ -42,30 +80,39 @@ class ThreadStats(BaseModel):
         self.message_count_for_this_thread["total"] += 1
         self.word_count_for_this_thread["total"] += message_word_count
         self.character_count_for_this_thread["total"] += message_character_count
-        self.wordcount_by_datetimes_by_type["total"].append((message.created_at, message_word_count))
+        self.wordcount_by_datetimes_by_type["total"].append((created_at, message_word_count))
 
         if not is_bot_user:
             self.message_count_for_this_thread["student"] += 1
             self.word_count_for_this_thread["student"] += message_word_count
             self.character_count_for_this_thread["student"] += message_character_count
-            self.wordcount_by_datetimes_by_type["student"].append((message.created_at, message_word_count))
+            self.wordcount_by_datetimes_by_type["student"].append((created_at, message_word_count))
         else:
             self.message_count_for_this_thread["bot"] += 1
             self.word_count_for_this_thread["bot"] += message_word_count
             self.character_count_for_this_thread["bot"] += message_character_count
-            self.wordcount_by_datetimes_by_type["bot"].append((message.created_at, message_word_count))
+            self.wordcount_by_datetimes_by_type["bot"].append((created_at, message_word_count))
 
-    def determine_if_green_check_present(self, message: Message) -> bool:
-        reactions = message.reactions
+    def determine_if_green_check_present(self, reaction_emojis: List[Any], content: str) -> bool:
         green_check_emoji_present = False
 
-        if len(reactions) > 0:
-            for reaction in reactions:
-                if reaction.emoji == '✅':
+        if len(reaction_emojis) > 0:
+            for reaction_emoji in reaction_emojis:
+                if reaction_emoji == '✅':
                     green_check_emoji_present = True
                     break
 
-        if "Successfully sent summary" in message.content:
+        if "Successfully sent summary" in content:
             green_check_emoji_present = False
 
         return green_check_emoji_present
+
+
+def build_thread_stats_fields(thread_stats: ThreadStats, normalized_messages: bool = False) -> Dict[str, Any]:
+    thread_stats_dict = thread_stats.dict(exclude={'thread_as_list_of_strings', 'thread_as_one_string'})
+    if normalized_messages:
+        return {"thread_statistics": thread_stats_dict}
+    return {"thread_as_list_of_strings": list(thread_stats.thread_as_list_of_strings),
+            "thread_as_one_string": thread_stats.thread_as_one_string,
+            "thread_statistics": thread_stats_dict,
+            }
@@ -3,11 +3,14 @@ import logging as logging
 import os
 
 import discord
+from pymongo import IndexModel
 
+from chatbot.ai.llm_client_registry import open_shared_aiosession, close_shared_aiosession
 from chatbot.discord_bot.cogs.summary_sender_cog import SummarySenderCog
 from chatbot.discord_bot.cogs.thread_scraper_cog.thread_scraper_cog import ThreadScraperCog
 from chatbot.discord_bot.cogs.video_chatter_cog import VideoChatterCog
 from chatbot.mongo_database.mongo_database_manager import MongoDatabaseManager
+from chatbot.student_info.guild_member_index import get_guild_member_index
 from chatbot.system.logging.configure_logging import configure_logging
 
 configure_logging(entry_point="discord")
@@ -24,6 +27,11 @@ load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# messages are logged in buckets of (at most) this many messages per channel
+MESSAGE_BUCKET_SIZE = 200
+MESSAGE_BUCKET_INDEXES = [IndexModel([("channel_id", 1), ("first_timestamp", 1)]),
+                          IndexModel([("channel_id", 1), ("count", 1)])]
+
 
 class DiscordBot(discord.Bot):
     def __init__(self,
@@ -35,6 +43,28 @@ class DiscordBot(discord.Bot):
     async def on_ready(self):
         logger.info("Bot is ready!")
         print(f"{self.user} is ready and online!")
+        for guild in self.guilds:
+            get_guild_member_index().index_guild(guild)
+
+    @discord.Cog.listener()
+    async def on_member_join(self, member: discord.Member):
+        get_guild_member_index().add_member(member)
+
+    @discord.Cog.listener()
+    async def on_member_update(self, before: discord.Member, after: discord.Member):
+        get_guild_member_index().add_member(after)
+
+    @discord.Cog.listener()
+    async def on_member_remove(self, member: discord.Member):
+        get_guild_member_index().remove_member(member)
+
+    @discord.Cog.listener()
+    async def on_user_update(self, before: discord.User, after: discord.User):
+        # username changes arrive as user updates rather than member updates
+        for guild in self.guilds:
+            member = guild.get_member(after.id)
+            if member is not None:
+                get_guild_member_index().add_member(member)
 
     @discord.Cog.listener()
     async def on_message(self, message):
@@ -49,21 +79,28 @@ class DiscordBot(discord.Bot):
             channel_name = message.channel.name
             collection_name = f"server_{message.guild.name}_messages"
 
-        await self.mongo_database.upsert(
+        await self.mongo_database.ensure_indexes(collection=collection_name,
+                                                 indexes=MESSAGE_BUCKET_INDEXES)
+        await self.mongo_database.push_to_bucket(
             collection=collection_name,
-            query={"server_name": server_name},
-            data={"$push": {"messages": {
+            bucket_query={"server_name": server_name,
+                          "channel_id": message.channel.id,
+                          "channel": channel_name},
+            entry={
                 'author': str(message.author),
                 'author_id': message.author.id,
                 'user_id': message.author.id,
+                'message_id': message.id,
                 'content': message.content,
                 'timestamp': message.created_at.isoformat(),
                 'guild': server_name,
                 'channel': channel_name,
                 'jump_url': message.jump_url,
-                'thread': message.thread if message.thread else 'None',
-                'dump': str(message)
-            }}}
+                'thread': message.thread.id if message.thread else 'None',
+            },
+            timestamp=message.created_at,
+            entries_key="messages",
+            max_bucket_size=MESSAGE_BUCKET_SIZE,
         )
 
     @discord.slash_command(name="hello", description="Say hello to the bot")
@@ -90,7 +127,12 @@ async def main():
     discord_bot.add_cog(VideoChatterCog(bot=discord_bot,
                                         mongo_database_manager=mongo_database_manager))
 
-    await discord_bot.start(os.getenv("DISCORD_TOKEN"))
+    # set before the bot starts, so every event handler's LLM calls share the one keep-alive session
+    await open_shared_aiosession()
+    try:
+        await discord_bot.start(os.getenv("DISCORD_TOKEN"))
+    finally:
+        await close_shared_aiosession()
 
 
 if __name__ == "__main__":
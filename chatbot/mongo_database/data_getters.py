@@ -1,7 +1,9 @@
-from typing import Dict
+from collections import defaultdict
+from typing import Dict, List, Any
 
 from chatbot.mongo_database.mongo_database_manager import MongoDatabaseManager
 from chatbot.student_info.student_profiles.student_profile_models import StudentProfile
+from chatbot.system.filenames_and_paths import get_thread_messages_collection_name
 
 
 async def get_student_profiles() -> Dict[str, StudentProfile]:
@@ -17,3 +19,31 @@ async def get_student_profiles() -> Dict[str, StudentProfile]:
     for student_id in to_delete:
         del student_profiles[student_id]
     return student_profiles
+
+
+async def load_thread_messages(mongo_database_manager: MongoDatabaseManager,
+                               thread_entries: List[Dict[str, Any]],
+                               thread_collection_name: str) -> List[Dict[str, Any]]:
+    # Thread backups scraped with `normalized_messages` keep their messages in a separate collection, so fill in
+    # the `messages`, `thread_as_list_of_strings` and `thread_as_one_string` fields that embedded threads already have
+    normalized_thread_ids = [thread_entry["thread_id"] for thread_entry in thread_entries
+                             if "messages" not in thread_entry]
+    if len(normalized_thread_ids) == 0:
+        return thread_entries
+
+    messages_collection = mongo_database_manager.get_collection(
+        get_thread_messages_collection_name(thread_collection_name))
+    messages_by_thread_id = defaultdict(list)
+    async for message in messages_collection.find({"thread_id": {"$in": normalized_thread_ids}}).sort(
+            [("thread_id", 1), ("created_at", 1)]):
+        messages_by_thread_id[message["thread_id"]].append(message)
+
+    for thread_entry in thread_entries:
+        if "messages" in thread_entry:
+            continue
+        thread_entry["messages"] = messages_by_thread_id[thread_entry["thread_id"]]
+        thread_entry["thread_as_list_of_strings"] = [f"{message['author']} said: '{message['content']}'"
+                                                     for message in thread_entry["messages"]]
+        thread_entry["thread_as_one_string"] = "\n".join(thread_entry["thread_as_list_of_strings"])
+
+    return thread_entries
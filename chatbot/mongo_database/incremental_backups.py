@@ -0,0 +1,139 @@
+import asyncio
+import logging
+import os
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional, Union
+
+from dotenv import load_dotenv
+from pydantic import BaseModel, Field
+
+from chatbot.mongo_database.json_backup_files import NDJSON_FORMAT, GZIP_COMPRESSION
+from chatbot.mongo_database.mongo_database_manager import MongoDatabaseManager
+from chatbot.system.filenames_and_paths import DATABASE_BACKUP, get_base_data_folder_path, clean_path_string, \
+    get_current_date_time_string, get_thread_backups_collection_name
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+
+class BackupManifestEntry(BaseModel):
+    file_name: str
+    kind: str  # "base" or "delta"
+    started_at: datetime
+    changed_since: Optional[datetime] = None
+    document_count: int = 0
+
+
+class BackupManifest(BaseModel):
+    collection_name: str
+    backups: List[BackupManifestEntry] = Field(default_factory=list)
+
+
+def get_backup_folder(backup_folder: Union[str, Path] = None) -> Path:
+    if backup_folder is None:
+        backup_folder = os.getenv("PATH_TO_COURSE_DATABASE_BACKUPS")
+    if backup_folder is None:
+        backup_folder = Path(get_base_data_folder_path()) / DATABASE_BACKUP
+    return Path(backup_folder)
+
+
+def get_backup_manifest_path(collection_name: str, backup_folder: Union[str, Path] = None) -> Path:
+    return get_backup_folder(backup_folder) / f"{clean_path_string(collection_name)}_backup_manifest.json"
+
+
+def load_backup_manifest(manifest_path: Union[str, Path]) -> Optional[BackupManifest]:
+    if not Path(manifest_path).exists():
+        return None
+    return BackupManifest.parse_file(manifest_path)
+
+
+def save_backup_manifest(manifest: BackupManifest, manifest_path: Union[str, Path]):
+    # write to a temp file and rename it into place, so a crash never leaves a half-written manifest
+    manifest_path = Path(manifest_path)
+    manifest_path.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile('w', dir=manifest_path.parent, prefix=f".{manifest_path.name}.",
+                                     delete=False) as file:
+        file.write(manifest.json(indent=4))
+    os.replace(file.name, manifest_path)
+
+
+async def backup_collection(mongo_database_manager: MongoDatabaseManager,
+                            collection_name: str,
+                            backup_folder: Union[str, Path] = None,
+                            incremental: bool = True) -> Path:
+    """
+    Backs up `collection_name` next to a manifest of the backups taken so far. The first backup (or any with
+    `incremental=False`) is a full `base` dump, after that only the documents whose `updated_at` changed since the
+    previous backup are saved as a `delta`. Deleted documents aren't recorded, restores only add and replace
+    """
+    backup_folder = get_backup_folder(backup_folder)
+    manifest_path = get_backup_manifest_path(collection_name, backup_folder)
+    manifest = load_backup_manifest(manifest_path)
+    if manifest is None:
+        manifest = BackupManifest(collection_name=collection_name)
+
+    # anything written after this point will be picked up by the next delta
+    started_at = datetime.now()
+    changed_since = None
+    kind = "base"
+    query = None
+    if incremental and len(manifest.backups) > 0:
+        kind = "delta"
+        changed_since = manifest.backups[-1].started_at
+        query = {"updated_at": {"$gte": changed_since}}
+
+    save_path, document_count = await mongo_database_manager.save_json(
+        collection_name=collection_name,
+        query=query,
+        save_path=backup_folder / f"{collection_name}_{kind}_{get_current_date_time_string()}",
+        file_format=NDJSON_FORMAT,
+        compression=GZIP_COMPRESSION,
+        extended_json=True)
+
+    manifest.backups.append(BackupManifestEntry(file_name=Path(save_path).name,
+                                                kind=kind,
+                                                started_at=started_at,
+                                                changed_since=changed_since,
+                                                document_count=document_count))
+    save_backup_manifest(manifest, manifest_path)
+    logger.info(f"Saved {kind} backup of {collection_name} ({document_count} documents) to {save_path}")
+    return Path(save_path)
+
+
+async def restore_collection(mongo_database_manager: MongoDatabaseManager,
+                             manifest_path: Union[str, Path],
+                             collection_name: str = None,
+                             until: datetime = None) -> int:
+    """
+    Replays the latest base backup in the manifest (taken at or before `until`, if given) and every delta after
+    it into `collection_name` (the backed up collection by default). Returns the number of documents written
+    """
+    manifest_path = Path(manifest_path)
+    manifest = load_backup_manifest(manifest_path)
+    if manifest is None:
+        raise FileNotFoundError(f"No backup manifest at {manifest_path}")
+    if collection_name is None:
+        collection_name = manifest.collection_name
+
+    backups = [backup for backup in manifest.backups if until is None or backup.started_at <= until]
+    base_indices = [index for index, backup in enumerate(backups) if backup.kind == "base"]
+    if len(base_indices) == 0:
+        raise ValueError(f"No base backup for {manifest.collection_name} in {manifest_path}")
+
+    document_count = 0
+    for backup in backups[base_indices[-1]:]:
+        logger.info(f"Restoring {backup.kind} backup {backup.file_name} into {collection_name}")
+        document_count += await mongo_database_manager.load_json(collection_name=collection_name,
+                                                                 load_path=manifest_path.parent / backup.file_name)
+    return document_count
+
+
+if __name__ == "__main__":
+    thread_collection_name = get_thread_backups_collection_name(
+        server_name="Neural Control of Real World Human Movement 2023 Summer1")
+    asyncio.run(restore_collection(mongo_database_manager=MongoDatabaseManager(),
+                                   manifest_path=get_backup_manifest_path(thread_collection_name),
+                                   collection_name=f"restored_{thread_collection_name}"))
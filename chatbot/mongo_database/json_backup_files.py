@@ -0,0 +1,119 @@
+import gzip
+import io
+import json
+from pathlib import Path
+from typing import Any, Dict, IO, Iterator, Optional, Tuple, Union
+
+from bson import ObjectId, json_util
+from bson.errors import InvalidId
+
+JSON_ARRAY_FORMAT = "json"
+NDJSON_FORMAT = "ndjson"
+BACKUP_FILE_FORMATS = [JSON_ARRAY_FORMAT, NDJSON_FORMAT]
+
+GZIP_COMPRESSION = "gzip"
+ZSTD_COMPRESSION = "zstd"
+COMPRESSION_SUFFIXES = {GZIP_COMPRESSION: ".gz",
+                        ZSTD_COMPRESSION: ".zst"}
+
+READ_CHUNK_SIZE = 1024 * 1024
+
+
+def get_backup_file_suffix(file_format: str = JSON_ARRAY_FORMAT, compression: Optional[str] = None) -> str:
+    if file_format not in BACKUP_FILE_FORMATS:
+        raise ValueError(f"Unknown backup file format: {file_format}, should be one of {BACKUP_FILE_FORMATS}")
+    if compression is not None and compression not in COMPRESSION_SUFFIXES:
+        raise ValueError(f"Unknown compression: {compression}, should be one of {list(COMPRESSION_SUFFIXES)}")
+    return f".{file_format}" + (COMPRESSION_SUFFIXES[compression] if compression is not None else "")
+
+
+def strip_backup_file_suffix(file_name: str) -> str:
+    for suffix in list(COMPRESSION_SUFFIXES.values()) + [f".{file_format}" for file_format in BACKUP_FILE_FORMATS]:
+        if file_name.endswith(suffix):
+            file_name = file_name[:-len(suffix)]
+    return file_name
+
+
+def detect_backup_file_format(path: Union[str, Path]) -> Tuple[str, Optional[str]]:
+    """Works out the (file format, compression) of a backup from its file name"""
+    file_name = Path(path).name
+    compression = None
+    for this_compression, suffix in COMPRESSION_SUFFIXES.items():
+        if file_name.endswith(suffix):
+            compression = this_compression
+            file_name = file_name[:-len(suffix)]
+    file_format = NDJSON_FORMAT if file_name.endswith(f".{NDJSON_FORMAT}") else JSON_ARRAY_FORMAT
+    return file_format, compression
+
+
+def open_backup_file(path: Union[str, Path], mode: str, compression: Optional[str] = None) -> IO[str]:
+    # `mode` is "r" or "w", the files are always utf-8 text
+    if compression is None:
+        return open(path, mode, encoding="utf-8")
+    if compression == GZIP_COMPRESSION:
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    if compression == ZSTD_COMPRESSION:
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError("zstd compressed backups need the `zstandard` package - `poetry install --extras zstd`")
+        return io.TextIOWrapper(zstandard.open(path, mode + "b"), encoding="utf-8")
+    raise ValueError(f"Unknown compression: {compression}, should be one of {list(COMPRESSION_SUFFIXES)}")
+
+
+def serialize_document(document: Dict[str, Any], extended_json: bool = False, default=None) -> str:
+    # extended json keeps the bson types (ObjectIds, datetimes, ...) so the backup can be restored exactly
+    if extended_json:
+        return json_util.dumps(document, json_options=json_util.RELAXED_JSON_OPTIONS)
+    if "_id" in document:
+        document["_id"] = str(document["_id"])
+    return json.dumps(document, default=default)
+
+
+def deserialize_document(document: Dict[str, Any]) -> Dict[str, Any]:
+    # plain json backups store the `_id` as a string, so turn it back into an ObjectId if it was one
+    if isinstance(document.get("_id"), str):
+        try:
+            document["_id"] = ObjectId(document["_id"])
+        except InvalidId:
+            pass
+    return document
+
+
+def iterate_backup_documents(file: IO[str], file_format: str = JSON_ARRAY_FORMAT) -> Iterator[Dict[str, Any]]:
+    """Yields the documents in a backup file one at a time, without reading the whole file into memory"""
+    if file_format == NDJSON_FORMAT:
+        for line in file:
+            if line.strip() != "":
+                yield deserialize_document(json_util.loads(line))
+        return
+
+    decoder = json.JSONDecoder(object_hook=json_util.object_hook)
+    buffer = ""
+    position = 0
+    started = False
+    end_of_file = False
+    while True:
+        # skip the whitespace and punctuation between the documents in the array
+        while position < len(buffer) and buffer[position] in " \t\r\n,[]":
+            if buffer[position] == "[":
+                started = True
+            position += 1
+
+        if position < len(buffer):
+            if not started:
+                raise ValueError("JSON backups should contain an array of documents")
+            try:
+                document, position = decoder.raw_decode(buffer, position)
+                yield deserialize_document(document)
+                continue
+            except json.JSONDecodeError:
+                if end_of_file:
+                    raise
+
+        if end_of_file:
+            return
+        chunk = file.read(READ_CHUNK_SIZE)
+        end_of_file = chunk == ""
+        buffer = buffer[position:] + chunk
+        position = 0
@@ -1,21 +1,28 @@
-import json
 import logging
 import os
 import traceback
 from collections import defaultdict
 from datetime import datetime
 from pathlib import Path
-from typing import Union, Any
+from typing import Union, Any, List, Optional, Tuple
 
 from dotenv import load_dotenv
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import IndexModel, ReplaceOne, InsertOne
 
+from chatbot.mongo_database.json_backup_files import JSON_ARRAY_FORMAT, get_backup_file_suffix, \
+    strip_backup_file_suffix, open_backup_file, serialize_document, detect_backup_file_format, iterate_backup_documents
 from chatbot.system.filenames_and_paths import clean_path_string, get_default_database_json_save_path, \
     STUDENT_SUMMARIES_COLLECTION_NAME
 
 load_dotenv()
 
 logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKET_SIZE = 200
+DEFAULT_EXPORT_BATCH_SIZE = 500
+
+
 def get_mongo_uri() -> str:
     remote_uri = os.getenv('MONGO_URI_MONGO_CLOUD')
     if remote_uri:
@@ -53,58 +60,158 @@ def default_serialize(o: Any) -> str:
         return o.__dict__
     return str(o)
 
+
+def add_updated_at(update: Union[dict, list], updated_at: datetime) -> Union[dict, list]:
+    # every write stamps the documents it touches with `updated_at`, which is what incremental backups and the
+    # anonymized thread projection use to find what has changed. Returns a copy, the caller's `update` is left alone
+    if isinstance(update, list):
+        # aggregation pipeline update
+        return update + [{"$set": {"updated_at": updated_at}}]
+    return {**update, "$set": {**update.get("$set", {}), "updated_at": updated_at}}
+
+
 class MongoDatabaseManager:
     def __init__(self, ):
         self._client = AsyncIOMotorClient(get_mongo_uri())
         self._database = self._client.get_default_database(get_mongo_database_name())
-
+        self._indexed_collections = set()
 
     def get_collection(self, collection_name: str):
         return self._database[collection_name]
 
     def get_collection_as_dict(self, collection_name: str):
         return self._database[collection_name].find().to_dict()
+
+    # `insert`, `upsert` and `update` stamp the documents they write with `updated_at` (see `add_updated_at`)
     async def insert(self, collection, document):
+        document["updated_at"] = datetime.now()
         return await self._database[collection].insert_one(document)
 
     async def upsert(self, collection, query, data):
-        return await self._database[collection].update_one(query, data, upsert=True)
+        return await self._database[collection].update_one(query, add_updated_at(data, datetime.now()), upsert=True)
+
+    async def update(self, collection, query, data):
+        return await self._database[collection].update_one(query, add_updated_at(data, datetime.now()))
+
+    async def delete(self, collection, query):
+        return await self._database[collection].delete_one(query)
+
+    async def ensure_indexes(self, collection, indexes: List[IndexModel]):
+        # only ask the server once per collection per process, `create_indexes` is a no-op if the indexes already exist
+        if collection in self._indexed_collections:
+            return
+        await self._database[collection].create_indexes(indexes)
+        self._indexed_collections.add(collection)
+
+    async def push_to_bucket(self,
+                             collection,
+                             bucket_query: dict,
+                             entry: dict,
+                             timestamp: datetime,
+                             entries_key: str = "entries",
+                             max_bucket_size: int = DEFAULT_BUCKET_SIZE):
+        # Append `entry` to the newest bucket matching `bucket_query` that isn't full yet, or start a new one.
+        # Each bucket is a fixed size document, so writes stay cheap no matter how many entries have been logged
+        return await self._database[collection].update_one(
+            {**bucket_query, "count": {"$lt": max_bucket_size}},
+            {"$push": {entries_key: entry},
+             "$inc": {"count": 1},
+             "$min": {"first_timestamp": timestamp},
+             "$max": {"last_timestamp": timestamp},
+             "$set": {"updated_at": datetime.now()}},
+            upsert=True)
+
+    async def bulk_write(self, collection, operations, ordered: bool = True):
+        # the operations are written as they are, so build them with `add_updated_at` (a restored backup keeps the
+        # documents' own `updated_at`)
+        return await self._database[collection].bulk_write(operations, ordered=ordered)
 
     async def save_json(self,
                   collection_name: str,
                   query: dict = None,
-                  save_path: Union[str, Path] = None):
+                  save_path: Union[str, Path] = None,
+                  projection: dict = None,
+                  batch_size: int = DEFAULT_EXPORT_BATCH_SIZE,
+                  file_format: str = JSON_ARRAY_FORMAT,
+                  compression: Optional[str] = None,
+                  extended_json: bool = False) -> Tuple[str, int]:
+        """
+        Streams the documents matching `query` to a `json` array or `ndjson` file (optionally `gzip` or `zstd`
+        compressed) as they come off the cursor, so the collection is never held in memory. `extended_json` keeps the
+        bson types so the backup can be restored exactly with `load_json`. Returns the path of the saved file and the
+        number of documents written to it
+        """
         try:
             query = query if query is not None else defaultdict()
             collection = self._database[collection_name]
+            file_suffix = get_backup_file_suffix(file_format=file_format, compression=compression)
             if save_path is not None:
-                file_name = Path(save_path).name
-                if file_name.endswith(".json"):
-                    file_name = file_name[:-5]
+                file_name = strip_backup_file_suffix(Path(save_path).name)
                 file_name = clean_path_string(file_name)
                 save_path = Path(save_path).parent / file_name
             else:
-                save_path =  get_default_database_json_save_path(filename=collection_name,
-                                                    timestamp=True)
+                save_path = strip_backup_file_suffix(get_default_database_json_save_path(filename=collection_name,
+                                                                                         timestamp=True))
 
-
-            data = [doc async for doc in collection.find(query)]
-
-            save_path = str(save_path)
-            if save_path[-5:] != ".json":
-                save_path += ".json"
-
-            for document in data:
-                document["_id"] = str(document["_id"])
+            save_path = str(save_path) + file_suffix
             Path(save_path).parent.mkdir(parents=True, exist_ok=True)
-            with open(save_path, 'w') as file:
-                json.dump(data, file, indent=4, default=default_serialize)
+
+            document_count = 0
+            with open_backup_file(save_path, "w", compression=compression) as file:
+                if file_format == JSON_ARRAY_FORMAT:
+                    file.write("[")
+                async for document in collection.find(query, projection).batch_size(batch_size):
+                    document_string = serialize_document(document,
+                                                         extended_json=extended_json,
+                                                         default=default_serialize)
+                    if file_format == JSON_ARRAY_FORMAT:
+                        file.write(("\n" if document_count == 0 else ",\n") + document_string)
+                    else:
+                        file.write(document_string + "\n")
+                    document_count += 1
+                if file_format == JSON_ARRAY_FORMAT:
+                    file.write("\n]\n")
         except Exception as e:
             traceback.print_exc()
             print(f"Error saving json: {e}")
             raise e
 
-        logger.info(f"Saved {len(data)} documents to {save_path}")
+        logger.info(f"Saved {document_count} documents to {save_path}")
+        return save_path, document_count
+
+    async def load_json(self,
+                        collection_name: str,
+                        load_path: Union[str, Path],
+                        batch_size: int = DEFAULT_EXPORT_BATCH_SIZE) -> int:
+        """
+        Streams a backup written by `save_json` back into `collection_name`, replacing any documents with the same
+        `_id` and keeping their `updated_at`. The format and compression are worked out from the file name. Returns the
+        number of documents loaded
+        """
+        file_format, compression = detect_backup_file_format(load_path)
+
+        document_count = 0
+        operations = []
+        with open_backup_file(load_path, "r", compression=compression) as file:
+            for document in iterate_backup_documents(file, file_format=file_format):
+                if "_id" in document:
+                    operations.append(ReplaceOne({"_id": document["_id"]}, document, upsert=True))
+                else:
+                    operations.append(InsertOne(document))
+                if len(operations) >= batch_size:
+                    await self.bulk_write(collection=collection_name,
+                                          operations=operations,
+                                          ordered=False)
+                    document_count += len(operations)
+                    operations = []
+        if len(operations) > 0:
+            await self.bulk_write(collection=collection_name,
+                                  operations=operations,
+                                  ordered=False)
+            document_count += len(operations)
+
+        logger.info(f"Loaded {document_count} documents from {load_path} into {collection_name}")
+        return document_count
 
     async def close(self):
         self._client.close()
@@ -1,59 +1,38 @@
-import json
-import os
-import uuid
-from pathlib import Path
-
-from dotenv import load_dotenv
-
-from chatbot.student_info.load_student_info import load_student_info
+from chatbot.student_info.student_directory import StudentDirectory, get_student_directory
+from chatbot.student_info.uuid_registry import get_uuid_registry, async_get_uuid_registry
 
 
 def get_or_create_uuid(student_name:str):
-    load_dotenv()
+    return get_uuid_registry().get_or_create_uuid(student_name)
 
-    uuid_map_json_path = os.getenv("UUID_MAP_JSON_PATH")
 
-    if uuid_map_json_path is None:
-        raise ValueError("UUID_MAP_JSON_PATH environment variable is not set.")
 
-    if not Path(uuid_map_json_path).exists():
-        uuid_map = {}
-    else:
-        with open(uuid_map_json_path, 'r') as file:
-            uuid_map = json.load(file)
+def find_student_info(thread_owner_username, student_directory: StudentDirectory = None):
+    student_discord_username, student_name = find_student_name_and_username(thread_owner_username, student_directory)
+    uuid = get_or_create_uuid(student_name)
 
-    if student_name in uuid_map:
-        return uuid_map[student_name]
-    else:
-        new_uuid = str(uuid.uuid4())
-        uuid_map[student_name] = new_uuid
+    return student_discord_username, student_name, uuid
 
-        with open(uuid_map_json_path, 'w') as file:
-            json.dump(uuid_map, file, indent=4)
 
-        return new_uuid
+async def async_find_student_info(thread_owner_username, student_directory: StudentDirectory = None):
+    # same as `find_student_info`, but minting a new uuid doesn't block the event loop
+    student_discord_username, student_name = find_student_name_and_username(thread_owner_username, student_directory)
+    uuid_registry = await async_get_uuid_registry()
+    uuid = await uuid_registry.async_get_or_create_uuid(student_name)
 
+    return student_discord_username, student_name, uuid
 
 
-def find_student_info(thread_owner_username):
+def find_student_name_and_username(thread_owner_username, student_directory: StudentDirectory = None):
     student_name = None
     student_discord_username = None
-    student_info = load_student_info()
-
-
-
-    for student_key, student_dict in student_info.items():
-
-        discord_usernames_to_check = find_user_names_to_check(student_dict)
-
-        for discord_username_to_check in discord_usernames_to_check:
-            if discord_username_to_check.lower() == thread_owner_username.lower() or\
-                    discord_username_to_check.lower() in thread_owner_username.lower():
-                student_name = student_key
-                student_discord_username = student_dict['discord_username']
-                break
-
+    if student_directory is None:
+        student_directory = get_student_directory()
 
+    found_student = student_directory.find_student_by_username(thread_owner_username)
+    if found_student is not None:
+        student_name, student_dict = found_student
+        student_discord_username = student_dict['discord_username']
 
     known_exceptions = ["Jon#8343", "ProfJon#4002", "andreabuit519#2615"]
     if student_name is None:
@@ -67,9 +46,7 @@ def find_student_info(thread_owner_username):
         else:
             raise ValueError(f"Could not find a student with the discord username {thread_owner_username}")
 
-    uuid = get_or_create_uuid(student_name)
-
-    return student_discord_username, student_name, uuid
+    return student_discord_username, student_name
 
 
 def find_user_names_to_check(student_dict):
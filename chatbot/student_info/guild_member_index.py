@@ -0,0 +1,72 @@
+import logging
+from collections import defaultdict
+from typing import Dict, Optional, Set
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+_guild_member_index = None
+
+
+class GuildMemberIndex:
+    """
+    Maps each guild's member names (username, global name and the legacy `name#1234` form) to member ids, so we don't
+    have to scan `guild.members` to find someone. Built from the member cache the first time a guild is looked up,
+    then kept current by the bot's member join/update/remove events
+    """
+
+    def __init__(self):
+        self._member_ids_by_name: Dict[int, Dict[str, int]] = defaultdict(dict)
+        self._names_by_member_id: Dict[int, Dict[int, Set[str]]] = defaultdict(dict)
+        self._indexed_guild_ids: Set[int] = set()
+
+    def index_guild(self, guild: discord.Guild):
+        self._member_ids_by_name.pop(guild.id, None)
+        self._names_by_member_id.pop(guild.id, None)
+        for member in guild.members:
+            self.add_member(member)
+        self._indexed_guild_ids.add(guild.id)
+        logger.info(f"Indexed {len(guild.members)} members of guild: {guild.name}")
+
+    def add_member(self, member: discord.Member):
+        self.remove_member(member)
+        names = self.get_member_names(member)
+        for name in names:
+            self._member_ids_by_name[member.guild.id][name] = member.id
+        self._names_by_member_id[member.guild.id][member.id] = names
+
+    def remove_member(self, member: discord.Member):
+        names = self._names_by_member_id[member.guild.id].pop(member.id, set())
+        member_ids_by_name = self._member_ids_by_name[member.guild.id]
+        for name in names:
+            # global names aren't unique, so only drop the ones that still point at this member
+            if member_ids_by_name.get(name) == member.id:
+                del member_ids_by_name[name]
+
+    def find_member_id(self, guild: discord.Guild, discord_username: str) -> Optional[int]:
+        if guild.id not in self._indexed_guild_ids:
+            self.index_guild(guild)
+        member_ids_by_name = self._member_ids_by_name[guild.id]
+
+        member_id = member_ids_by_name.get(discord_username.lower())
+        if member_id is None:
+            # the roster may still have someone's old `name#1234` username from before they migrated to a new one
+            member_id = member_ids_by_name.get(discord_username.split('#')[0].lower())
+        return member_id
+
+    def get_member_names(self, member: discord.Member) -> Set[str]:
+        names = {str(member).lower(), member.name.lower()}
+        if member.discriminator not in [None, "", "0"]:
+            names.add(f"{member.name}#{member.discriminator}".lower())
+        global_name = getattr(member, "global_name", None)
+        if global_name:
+            names.add(global_name.lower())
+        return names
+
+
+def get_guild_member_index() -> GuildMemberIndex:
+    global _guild_member_index
+    if _guild_member_index is None:
+        _guild_member_index = GuildMemberIndex()
+    return _guild_member_index
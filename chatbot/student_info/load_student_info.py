@@ -9,13 +9,17 @@ import discord
 import pandas as pd
 from dotenv import load_dotenv
 
+from chatbot.student_info.guild_member_index import get_guild_member_index
+
 logger = logging.getLogger(__name__)
 
 
-def load_student_info()-> Dict[str, Any]:
+def load_student_info(student_info_csv_path: str = None)-> Dict[str, Any]:
     load_dotenv()
+    if student_info_csv_path is None:
+        student_info_csv_path = os.getenv('PATH_TO_STUDENT_INFO_CSV')
     student_info = {}
-    with open(os.getenv('PATH_TO_STUDENT_INFO_CSV'), 'r') as f:
+    with open(student_info_csv_path, 'r') as f:
         reader = csv.reader(f)
         header = next(reader)
         for row in reader:
@@ -39,15 +43,8 @@ def update_student_info(student_info: Dict[str, Any]):
 
 def find_student_discord_id(context: discord.ApplicationContext,
                             discord_username: str, ):
-    server_members = list(context.guild.members)
-    for member in server_members:
-        if str(member) == discord_username:
-            return member.id
-        if f"{str(member)}" in discord_username.split('#')[0].lower()+"#0":
-            return member.id
-        if f"{str(member)}" in discord_username.split('#')[0].lower() + "#0":
-            return member.id
-
+    return get_guild_member_index().find_member_id(guild=context.guild,
+                                                   discord_username=discord_username)
 
 
 
@@ -0,0 +1,123 @@
+import logging
+import os
+from typing import Dict, Any, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from chatbot.student_info.load_student_info import load_student_info
+
+logger = logging.getLogger(__name__)
+
+_student_directory = None
+
+
+class StudentDirectory:
+    """
+    The student roster, loaded once and indexed so we can resolve a discord user to a student without re-reading the
+    CSV or scanning every student. Call `reload_if_changed` to pick up edits to the CSV
+    """
+
+    def __init__(self, student_info_csv_path: str = None):
+        if student_info_csv_path is None:
+            load_dotenv()
+            student_info_csv_path = os.getenv('PATH_TO_STUDENT_INFO_CSV')
+        self._student_info_csv_path = student_info_csv_path
+        self._loaded_mtime_ns = None
+
+        self.student_info: Dict[str, Dict[str, Any]] = {}
+        self._student_names_by_username: Dict[str, str] = {}
+        self._student_names_by_alias: Dict[str, str] = {}
+        self._student_names_by_discord_id: Dict[int, str] = {}
+        # lowercase username -> (position in the roster, student name), for the substring fallback
+        self._substring_index: Dict[str, Tuple[int, str]] = {}
+        self._longest_username_length = 0
+
+        self.reload_if_changed()
+
+    def reload_if_changed(self) -> bool:
+        mtime_ns = os.stat(self._student_info_csv_path).st_mtime_ns
+        if mtime_ns == self._loaded_mtime_ns:
+            return False
+        self._load(load_student_info(student_info_csv_path=self._student_info_csv_path))
+        self._loaded_mtime_ns = mtime_ns
+        logger.info(f"Loaded {len(self.student_info)} students from {self._student_info_csv_path}")
+        return True
+
+    def _load(self, student_info: Dict[str, Dict[str, Any]]):
+        self.student_info = student_info
+        self._student_names_by_username = {}
+        self._student_names_by_alias = {}
+        self._student_names_by_discord_id = {}
+        self._substring_index = {}
+
+        for roster_position, (student_name, student_dict) in enumerate(student_info.items()):
+            discord_username = student_dict['discord_username'].strip().lower()
+            self._student_names_by_username[discord_username] = student_name
+            self._substring_index[discord_username] = (roster_position, student_name)
+
+            for alias in student_dict.get('other_discord_usernames', '').split(','):
+                alias = alias.strip().lower()
+                if alias == '':
+                    continue
+                self._student_names_by_alias[alias] = student_name
+                self._substring_index[alias] = (roster_position, student_name)
+
+            discord_user_id = student_dict.get('discord_user_id', '')
+            if discord_user_id.strip() != '':
+                discord_user_id = parse_discord_user_id(discord_user_id)
+                if discord_user_id is None:
+                    logger.warning(f"Ignoring the malformed discord_user_id for {student_name} in "
+                                   f"{self._student_info_csv_path}: {student_dict['discord_user_id']!r}")
+                else:
+                    self._student_names_by_discord_id[discord_user_id] = student_name
+
+        self._substring_index.pop('', None)
+        self._longest_username_length = max([len(username) for username in self._substring_index], default=0)
+
+    def find_student_by_username(self, username: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        username = username.strip().lower()
+        student_name = self._student_names_by_username.get(username)
+        if student_name is None:
+            student_name = self._student_names_by_alias.get(username)
+        if student_name is None:
+            student_name = self._find_student_name_by_substring(username)
+        if student_name is None:
+            return None
+        return student_name, self.student_info[student_name]
+
+    def find_student_by_discord_id(self, discord_user_id: int) -> Optional[Tuple[str, Dict[str, Any]]]:
+        parsed_discord_user_id = parse_discord_user_id(discord_user_id)
+        if parsed_discord_user_id is None:
+            logger.warning(f"Can't look up a student by the malformed discord user id: {discord_user_id!r}")
+            return None
+        student_name = self._student_names_by_discord_id.get(parsed_discord_user_id)
+        if student_name is None:
+            return None
+        return student_name, self.student_info[student_name]
+
+    def _find_student_name_by_substring(self, username: str) -> Optional[str]:
+        # look up every substring of `username` (which are short) rather than every username in the roster. Like the
+        # old linear scan, if more than one student matches, the one furthest down the roster wins
+        best_match = None
+        for start in range(len(username)):
+            for end in range(start + 1, min(len(username), start + self._longest_username_length) + 1):
+                match = self._substring_index.get(username[start:end])
+                if match is not None and (best_match is None or match[0] > best_match[0]):
+                    best_match = match
+        return best_match[1] if best_match is not None else None
+
+
+def parse_discord_user_id(discord_user_id: Any) -> Optional[int]:
+    try:
+        return int(str(discord_user_id).strip())
+    except ValueError:
+        return None
+
+
+def get_student_directory() -> StudentDirectory:
+    global _student_directory
+    if _student_directory is None:
+        _student_directory = StudentDirectory()
+    else:
+        _student_directory.reload_if_changed()
+    return _student_directory
@@ -0,0 +1,175 @@
+import asyncio
+import atexit
+import json
+import logging
+import os
+import tempfile
+import threading
+import uuid
+from pathlib import Path
+from typing import Dict, Optional
+
+from dotenv import load_dotenv
+from pymongo import MongoClient, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from chatbot.system.filenames_and_paths import STUDENT_UUIDS_COLLECTION_NAME
+
+logger = logging.getLogger(__name__)
+
+_uuid_registry = None
+_uuid_registry_lock = threading.Lock()
+
+
+class UuidRegistry:
+    """
+    Looking up a uuid we've already seen is a dict lookup, but minting one and flushing touch the disk or the
+    database, so the `async_` versions run those in a worker thread instead of blocking the event loop
+    """
+
+    def __init__(self):
+        self._uuids_by_student_name: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def get_or_create_uuid(self, student_name: str) -> str:
+        if student_name in self._uuids_by_student_name:
+            return self._uuids_by_student_name[student_name]
+        with self._lock:
+            # another thread may have minted it while we waited for the lock
+            if student_name not in self._uuids_by_student_name:
+                self._uuids_by_student_name[student_name] = self._create_uuid(student_name)
+            return self._uuids_by_student_name[student_name]
+
+    async def async_get_or_create_uuid(self, student_name: str) -> str:
+        if student_name in self._uuids_by_student_name:
+            return self._uuids_by_student_name[student_name]
+        return await asyncio.get_running_loop().run_in_executor(None, self.get_or_create_uuid, student_name)
+
+    def flush(self):
+        pass
+
+    async def async_flush(self):
+        await asyncio.get_running_loop().run_in_executor(None, self.flush)
+
+    def _create_uuid(self, student_name: str) -> str:
+        raise NotImplementedError
+
+
+class JsonUuidRegistry(UuidRegistry):
+    """
+    Keeps the student name -> uuid map in memory. New uuids are appended to a log next to the JSON file as soon as
+    they're minted, and `flush` folds the log back into the JSON file (written to a temp file and renamed, so the map
+    on disk is never half-written)
+    """
+
+    def __init__(self, uuid_map_json_path: str):
+        super().__init__()
+        self._uuid_map_json_path = Path(uuid_map_json_path)
+        self._log_path = Path(f"{uuid_map_json_path}.log")
+        self._has_unflushed_entries = False
+
+        if self._uuid_map_json_path.exists():
+            with open(self._uuid_map_json_path, 'r') as file:
+                self._uuids_by_student_name.update(json.load(file))
+        if self._log_path.exists():
+            # anything still in the log wasn't compacted before the last run ended
+            with open(self._log_path, 'r') as file:
+                for line in file:
+                    if line.strip() == '':
+                        continue
+                    log_entry = json.loads(line)
+                    self._uuids_by_student_name[log_entry["student_name"]] = log_entry["uuid"]
+                    self._has_unflushed_entries = True
+
+    def _create_uuid(self, student_name: str) -> str:
+        new_uuid = str(uuid.uuid4())
+        self._log_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self._log_path, 'a') as file:
+            file.write(json.dumps({"student_name": student_name, "uuid": new_uuid}) + "\n")
+            file.flush()
+            os.fsync(file.fileno())
+        self._has_unflushed_entries = True
+        return new_uuid
+
+    def flush(self):
+        with self._lock:
+            if not self._has_unflushed_entries:
+                return
+            self._uuid_map_json_path.parent.mkdir(parents=True, exist_ok=True)
+            with tempfile.NamedTemporaryFile('w',
+                                             dir=self._uuid_map_json_path.parent,
+                                             prefix=f".{self._uuid_map_json_path.name}.",
+                                             delete=False) as file:
+                json.dump(self._uuids_by_student_name, file, indent=4)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(file.name, self._uuid_map_json_path)
+            self._log_path.unlink(missing_ok=True)
+            self._has_unflushed_entries = False
+        logger.info(f"Saved {len(self._uuids_by_student_name)} student uuids to {self._uuid_map_json_path}")
+
+
+class MongoUuidRegistry(UuidRegistry):
+    """
+    Keeps the student name -> uuid map in a Mongo collection with a unique index on the student name, so several
+    processes can mint uuids at the same time and still agree on them
+    """
+
+    def __init__(self, mongo_uri: str, database_name: str, collection_name: str = STUDENT_UUIDS_COLLECTION_NAME):
+        super().__init__()
+        self._client = MongoClient(mongo_uri)
+        self._collection = self._client.get_default_database(database_name)[collection_name]
+        self._collection.create_index("student_name", unique=True)
+        self._uuids_by_student_name.update({entry["student_name"]: entry["uuid"]
+                                            for entry in self._collection.find({}, {"_id": 0})})
+
+    def _create_uuid(self, student_name: str) -> str:
+        try:
+            entry = self._collection.find_one_and_update({"student_name": student_name},
+                                                         {"$setOnInsert": {"uuid": str(uuid.uuid4())}},
+                                                         upsert=True,
+                                                         return_document=ReturnDocument.AFTER)
+        except DuplicateKeyError:
+            # another process inserted this student between our find and our insert
+            entry = self._collection.find_one({"student_name": student_name})
+        # every new uuid is written as soon as it's minted, so there's nothing to flush
+        return entry["uuid"]
+
+
+def create_uuid_registry(backend: Optional[str] = None) -> UuidRegistry:
+    load_dotenv()
+    if backend is None:
+        backend = os.getenv("UUID_REGISTRY_BACKEND", "json")
+
+    if backend == "mongo":
+        from chatbot.mongo_database.mongo_database_manager import get_mongo_uri, get_mongo_database_name
+        return MongoUuidRegistry(mongo_uri=get_mongo_uri(), database_name=get_mongo_database_name())
+
+    if backend == "json":
+        uuid_map_json_path = os.getenv("UUID_MAP_JSON_PATH")
+        if uuid_map_json_path is None:
+            raise ValueError("UUID_MAP_JSON_PATH environment variable is not set.")
+        return JsonUuidRegistry(uuid_map_json_path=uuid_map_json_path)
+
+    raise ValueError(f"Unknown UUID_REGISTRY_BACKEND: {backend}")
+
+
+def get_uuid_registry() -> UuidRegistry:
+    global _uuid_registry
+    with _uuid_registry_lock:
+        if _uuid_registry is None:
+            _uuid_registry = create_uuid_registry()
+            atexit.register(_uuid_registry.flush)
+    return _uuid_registry
+
+
+async def async_get_uuid_registry() -> UuidRegistry:
+    # loading the registry reads the JSON map or connects to mongo, so the first call happens off the event loop
+    if _uuid_registry is None:
+        return await asyncio.get_running_loop().run_in_executor(None, get_uuid_registry)
+    return _uuid_registry
+
+
+async def async_flush_uuid_registry():
+    if _uuid_registry is not None:
+        await _uuid_registry.async_flush()
@@ -13,6 +13,10 @@ STUDENT_SUMMARIES_COLLECTION_NAME = "student_summaries"
 STUDENT_STATISTICS_COLLECTION_NAME = "student_statistics"
 VIDEO_CHATTER_SUMMARIES_COLLECTION_NAME = "video_chatter_summaries"
 CLASS_SUMMARY_COLLECTION_NAME = "class_summary"
+SCRAPE_CHECKPOINTS_COLLECTION_NAME = "scrape_checkpoints"
+ANONYMIZATION_PROJECTIONS_COLLECTION_NAME = "anonymization_projections"
+STUDENT_UUIDS_COLLECTION_NAME = "student_uuids"
+CHAT_MEMORIES_COLLECTION_NAME = "chat_memories"
 
 
 def os_independent_home_dir():
@@ -69,3 +73,11 @@ def get_thread_backups_collection_name(server_name: str=None, channel_name: str
         return f"{channel_name}_threads"
 
     return f"thread_backups_for_{server_name}"
+
+
+def get_thread_messages_collection_name(thread_collection_name: str):
+    return f"{thread_collection_name}_messages"
+
+
+def get_anonymized_collection_name(collection_name: str):
+    return f"anonymized_{collection_name}"
@@ -0,0 +1,54 @@
+import asyncio
+
+from chatbot.discord_bot.cogs.chat_cog.active_chat_cache import ActiveChatCache
+
+
+def test_active_chat_cache_evicts_least_recently_used_and_idle_chats():
+    evicted = []
+
+    async def on_evict(thread_id, chat):
+        evicted.append((thread_id, chat))
+
+    async def use_cache():
+        active_chats = ActiveChatCache(on_evict=on_evict, max_size=2, max_idle_seconds=3600)
+        await active_chats.put(1, "chat 1")
+        await active_chats.put(2, "chat 2")
+        assert await active_chats.get(1) == "chat 1"
+        await active_chats.put(3, "chat 3")
+        assert evicted == [(2, "chat 2")]
+        assert await active_chats.get(2) is None
+
+        active_chats._max_idle_seconds = 0
+        await active_chats.evict_idle()
+        return active_chats
+
+    active_chats = asyncio.run(use_cache())
+
+    assert len(active_chats) == 0
+    assert [thread_id for thread_id, _ in evicted] == [2, 1, 3]
+    assert active_chats.stats == {"size": 0, "hits": 1, "misses": 1, "evictions": 3}
+
+
+def test_active_chat_cache_evicts_idle_chats_on_a_timer():
+    evicted = []
+
+    async def on_evict(thread_id, chat):
+        evicted.append(thread_id)
+
+    async def leave_cache_idle():
+        active_chats = ActiveChatCache(on_evict=on_evict, max_size=10, max_idle_seconds=0.05)
+        await active_chats.put(1, "chat 1")
+        # an idle chat that's still in the cache is handed back rather than evicted by the lookup
+        await asyncio.sleep(0.1)
+        assert 1 in active_chats
+        assert await active_chats.get(1) == "chat 1"
+
+        active_chats.start_idle_eviction(interval_seconds=0.01)
+        await asyncio.sleep(0.2)
+        active_chats.stop_idle_eviction()
+        return active_chats
+
+    active_chats = asyncio.run(leave_cache_idle())
+
+    assert evicted == [1]
+    assert active_chats.stats == {"size": 0, "hits": 1, "misses": 0, "evictions": 1}
@@ -0,0 +1,42 @@
+from datetime import datetime
+
+from chatbot.discord_bot.cogs.thread_scraper_cog.anonymized_thread_projector import anonymize_thread_entry
+from chatbot.discord_bot.cogs.thread_scraper_cog.message_anonymizer import MessageAnonymizer
+
+
+def test_anonymize_thread_entry_redacts_thread_and_messages():
+    thread_entry = {"_id": "raw_id",
+                    "_student_name": "Alice Smith",
+                    "_student_username": "alice#1234",
+                    "thread_title": "alice's thread",
+                    "thread_id": 1,
+                    "normalized_messages": False,
+                    "messages": [{"author": "alice#1234",
+                                  "author_id": 2,
+                                  "user_id": 2,
+                                  "content": "Hi bot, my name is Alice",
+                                  "created_at": datetime(2023, 6, 1),
+                                  "reactions": [],
+                                  "id": 10}],
+                    "thread_as_one_string": "alice#1234 said: 'Hi bot, my name is Alice'",
+                    "summary": {"summary": "Alice Smith said hi",
+                                "thread_chunks": [{"text": "alice#1234 said: 'Hi bot, my name is Alice'"}]}}
+
+    anonymized_thread_entry, anonymized_messages = anonymize_thread_entry(thread_entry=thread_entry,
+                                                                          bot_id=3,
+                                                                          message_anonymizer=MessageAnonymizer())
+
+    assert "_id" not in anonymized_thread_entry
+    assert "summary" not in anonymized_thread_entry
+    assert anonymized_thread_entry["thread_id"] == 1
+    assert anonymized_thread_entry["_student_name"] == "REDACTED"
+    assert anonymized_thread_entry["thread_title"] == "REDACTED"
+    assert anonymized_thread_entry["messages"] == anonymized_messages
+    assert anonymized_messages[0]["author"] == "REDACTED"
+    assert anonymized_messages[0]["content"] == "Hi REDACTED my name is REDACTED"
+    for anonymized_string in [anonymized_thread_entry["thread_as_one_string"],
+                              *anonymized_thread_entry["thread_as_list_of_strings"]]:
+        assert "alice" not in anonymized_string.lower()
+        assert "#1234" not in anonymized_string
+    assert anonymized_thread_entry["thread_statistics"]["message_count_for_this_thread"]["student"] == 1
+    assert thread_entry["messages"][0]["content"] == "Hi bot, my name is Alice"
@@ -0,0 +1,29 @@
+from types import SimpleNamespace
+
+from chatbot.student_info.guild_member_index import GuildMemberIndex
+
+
+class FakeMember(SimpleNamespace):
+    def __str__(self):
+        return f"{self.name}#{self.discriminator}"
+
+
+def test_guild_member_index_tracks_member_events():
+    guild = SimpleNamespace(id=1, name="guild", members=[])
+    alice = FakeMember(id=10, name="alice", discriminator="1234", global_name="Alice S", guild=guild)
+    bob = FakeMember(id=20, name="bob_new", discriminator="0", global_name=None, guild=guild)
+    guild.members = [alice, bob]
+    guild_member_index = GuildMemberIndex()
+
+    assert guild_member_index.find_member_id(guild, "alice#1234") == 10
+    assert guild_member_index.find_member_id(guild, "Alice S") == 10
+    # roster still has bob's username from before the migration away from discriminators
+    assert guild_member_index.find_member_id(guild, "bob_new#4321") == 20
+
+    renamed_alice = FakeMember(id=10, name="alice_2", discriminator="0", global_name="Alice S", guild=guild)
+    guild_member_index.add_member(renamed_alice)
+    assert guild_member_index.find_member_id(guild, "alice#1234") is None
+    assert guild_member_index.find_member_id(guild, "alice_2") == 10
+
+    guild_member_index.remove_member(bob)
+    assert guild_member_index.find_member_id(guild, "bob_new") is None
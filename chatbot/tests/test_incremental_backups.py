@@ -0,0 +1,30 @@
+from datetime import datetime
+
+from chatbot.mongo_database.incremental_backups import BackupManifest, BackupManifestEntry, save_backup_manifest, \
+    load_backup_manifest
+from chatbot.mongo_database.mongo_database_manager import add_updated_at
+
+
+def test_add_updated_at_keeps_existing_update():
+    updated_at = datetime(2023, 6, 1)
+    update = {"$set": {"a": 1}, "$inc": {"b": 1}}
+    assert add_updated_at(update, updated_at) == {"$set": {"a": 1, "updated_at": updated_at}, "$inc": {"b": 1}}
+    assert update == {"$set": {"a": 1}, "$inc": {"b": 1}}
+
+    assert add_updated_at({"$push": {"c": 2}}, updated_at) == {"$push": {"c": 2}, "$set": {"updated_at": updated_at}}
+    assert add_updated_at([{"$set": {"a": 1}}], updated_at) == [{"$set": {"a": 1}}, {"$set": {"updated_at": updated_at}}]
+
+
+def test_backup_manifest_round_trip(tmp_path):
+    manifest_path = tmp_path / "collection_backup_manifest.json"
+    assert load_backup_manifest(manifest_path) is None
+
+    manifest = BackupManifest(collection_name="collection",
+                              backups=[BackupManifestEntry(file_name="base.ndjson.gz",
+                                                           kind="base",
+                                                           started_at=datetime(2023, 6, 1),
+                                                           document_count=3)])
+    save_backup_manifest(manifest, manifest_path)
+
+    assert load_backup_manifest(manifest_path) == manifest
+    assert [path.name for path in tmp_path.iterdir()] == [manifest_path.name]
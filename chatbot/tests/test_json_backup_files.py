@@ -0,0 +1,33 @@
+import io
+import json
+
+from bson import ObjectId
+
+from chatbot.mongo_database import json_backup_files
+from chatbot.mongo_database.json_backup_files import iterate_backup_documents, detect_backup_file_format
+
+
+def test_iterate_backup_documents_streams_indented_json_arrays(monkeypatch):
+    # backups written by the old `save_json` are a single indented array
+    documents = [{"_id": str(ObjectId()), "thread_id": thread_id, "content": "a, [b] {c}" * thread_id}
+                 for thread_id in range(20)]
+    monkeypatch.setattr(json_backup_files, "READ_CHUNK_SIZE", 7)
+
+    loaded_documents = list(iterate_backup_documents(io.StringIO(json.dumps(documents, indent=4))))
+
+    assert [document["thread_id"] for document in loaded_documents] == list(range(20))
+    assert loaded_documents[3]["content"] == documents[3]["content"]
+    assert isinstance(loaded_documents[0]["_id"], ObjectId)
+
+
+def test_iterate_backup_documents_reads_ndjson():
+    ndjson = '{"a": 1}\n\n{"a": 2, "when": {"$date": "2023-06-01T00:00:00Z"}}\n'
+    loaded_documents = list(iterate_backup_documents(io.StringIO(ndjson), file_format="ndjson"))
+    assert [document["a"] for document in loaded_documents] == [1, 2]
+    assert loaded_documents[1]["when"].year == 2023
+
+
+def test_detect_backup_file_format():
+    assert detect_backup_file_format("backup.json") == ("json", None)
+    assert detect_backup_file_format("backup.ndjson.gz") == ("ndjson", "gzip")
+    assert detect_backup_file_format("/some/path/backup.json.zst") == ("json", "zstd")
@@ -0,0 +1,12 @@
+from chatbot.ai.llm_client_registry import get_llm_client, OPENAI_CHAT_PROVIDER, OPENAI_PROVIDER
+
+
+def test_llm_clients_are_shared_per_provider_model_temperature_and_streaming(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+
+    chat_llm = get_llm_client(provider=OPENAI_CHAT_PROVIDER, model_name="gpt-4", temperature=0.8, streaming=True)
+
+    assert get_llm_client(provider=OPENAI_CHAT_PROVIDER, model_name="gpt-4", temperature=0.8, streaming=True) is chat_llm
+    assert get_llm_client(provider=OPENAI_CHAT_PROVIDER, model_name="gpt-4", temperature=0, streaming=True) is not chat_llm
+    assert get_llm_client(provider=OPENAI_PROVIDER, temperature=0) is not \
+           get_llm_client(provider=OPENAI_PROVIDER, temperature=0, max_tokens=1000)
@@ -0,0 +1,49 @@
+from types import SimpleNamespace
+
+from chatbot.discord_bot.cogs.thread_scraper_cog.message_anonymizer import MessageAnonymizer
+from chatbot.discord_bot.cogs.thread_scraper_cog.roster_name_redactor import RosterNameRedactor
+
+
+def test_anonymize_text_redacts_introductions_and_greetings():
+    message_anonymizer = MessageAnonymizer()
+    assert message_anonymizer.anonymize_text("Hi Alice! My name is Bob") == "Hi REDACTED My name is REDACTED"
+    assert message_anonymizer.anonymize_text("hey bot, my name's Carl.") == "hey REDACTED my name's REDACTED."
+    assert message_anonymizer.anonymize_text("nothing to see here") == "nothing to see here"
+
+
+def test_anonymize_text_drops_thread_owner_messages():
+    assert MessageAnonymizer().anonymize_text("Alice is the thread owner") == ""
+
+
+def test_anonymize_message_does_not_mutate_message():
+    message = SimpleNamespace(id=1, content="Hello Dana, how are you?")
+    message_anonymizer = MessageAnonymizer()
+
+    assert message_anonymizer.anonymize_message(message) == "Hello REDACTED how are you?"
+    assert message.content == "Hello Dana, how are you?"
+
+
+def test_roster_name_redactor_redacts_whole_names_only():
+    roster_name_redactor = RosterNameRedactor(names=["Alice Smith", "Alice", "alice_s#1234", "alice_s", "Bo"])
+    message_anonymizer = MessageAnonymizer(roster_name_redactor=roster_name_redactor)
+
+    assert message_anonymizer.anonymize_text("I talked to ALICE SMITH and alice_s about it") == \
+           "I talked to REDACTED and REDACTED about it"
+    assert message_anonymizer.anonymize_text("Malice toward none, Bob") == "Malice toward none, Bob"
+
+
+def test_roster_first_names_that_are_ordinary_words_only_match_capitalized():
+    student_info = {"Will Turner": {"discord_username": "wturner#4321", "other_discord_usernames": "will_t"},
+                    "Mark Jones": {"discord_username": "mjones", "other_discord_usernames": ""}}
+    roster_name_redactor = RosterNameRedactor.from_student_info(student_info)
+
+    assert roster_name_redactor.redact("I will mark this as done, Will.") == "I will mark this as done, REDACTED."
+    assert roster_name_redactor.redact("ask will turner, Mark, WTURNER#4321 or Will_T") == \
+           "ask REDACTED, REDACTED, REDACTED or REDACTED"
+
+
+def test_roster_lowercase_usernames_match_in_any_case():
+    student_info = {"Jane Smith": {"discord_username": "jsmith", "other_discord_usernames": ""}}
+    roster_name_redactor = RosterNameRedactor.from_student_info(student_info)
+
+    assert roster_name_redactor.redact("thanks jsmith and Jsmith") == "thanks REDACTED and REDACTED"
@@ -1,4 +1,7 @@
+import asyncio
 import os
+from datetime import datetime, timedelta
+
 import mongomock
 import pytest
 
@@ -32,3 +35,32 @@ def test_find(mock_db_manager):
     mock_db_manager.insert('test', test_document)
     result = mock_db_manager.find('test', {'name': 'Test'})
     assert list(result) == [test_document]
+
+
+def test_push_to_bucket_fills_fixed_size_buckets(monkeypatch):
+    mongomock_motor = pytest.importorskip("mongomock_motor")
+    monkeypatch.delenv('MONGO_URI_MONGO_CLOUD', raising=False)
+    monkeypatch.delenv('IS_DOCKER', raising=False)
+    monkeypatch.setenv('MONGO_URI_LOCAL', 'mongodb://localhost:27017')
+    monkeypatch.setenv('MONGODB_DATABASE_NAME', 'test_db')
+
+    db_manager = MongoDatabaseManager()
+    db_manager._client = mongomock_motor.AsyncMongoMockClient()
+    db_manager._database = db_manager._client["test_db"]
+
+    async def push_messages():
+        for message_number in range(5):
+            await db_manager.push_to_bucket(collection="messages",
+                                            bucket_query={"channel_id": 1},
+                                            entry={"content": f"message {message_number}"},
+                                            timestamp=datetime(2023, 6, 1) + timedelta(minutes=message_number),
+                                            entries_key="messages",
+                                            max_bucket_size=2)
+        return await db_manager.get_collection("messages").find().sort("first_timestamp", 1).to_list(None)
+
+    buckets = asyncio.run(push_messages())
+
+    assert [bucket["count"] for bucket in buckets] == [2, 2, 1]
+    assert [len(bucket["messages"]) for bucket in buckets] == [2, 2, 1]
+    assert buckets[1]["first_timestamp"] == datetime(2023, 6, 1, 0, 2)
+    assert buckets[1]["last_timestamp"] == datetime(2023, 6, 1, 0, 3)
@@ -0,0 +1,43 @@
+import asyncio
+
+from chatbot.discord_bot.cogs.thread_scraper_cog.scrape_progress_reporter import ScrapeProgressReporter
+
+
+class FakeStatusMessage:
+    def __init__(self, content: str):
+        self.content = content
+        self.edit_count = 0
+
+    async def edit(self, content: str):
+        self.content = content
+        self.edit_count += 1
+        return self
+
+
+def test_progress_reporter_batches_edits_and_rolls_over():
+    first_status_message = FakeStatusMessage("Starting thread scraping process")
+    sent_messages = [first_status_message]
+
+    async def send_message(content: str):
+        sent_messages.append(FakeStatusMessage(content))
+        return sent_messages[-1]
+
+    async def report_threads():
+        progress_reporter = ScrapeProgressReporter(status_message=first_status_message,
+                                                   send_message=send_message,
+                                                   total_thread_count=100,
+                                                   flush_interval_seconds=3600,
+                                                   flush_every_n_threads=10)
+        for thread_number in range(100):
+            await progress_reporter.record_thread(status_line=f"{thread_number}: " + "x" * 50, message_count=3)
+        await progress_reporter.finish("Finished saving 100 threads")
+        return progress_reporter
+
+    progress_reporter = asyncio.run(report_threads())
+
+    assert progress_reporter.message_count == 300
+    assert sum(message.edit_count for message in sent_messages) < 20
+    assert all(len(message.content) <= 2000 for message in sent_messages)
+    assert len(sent_messages) > 1
+    assert sent_messages[-1].content.endswith("Finished saving 100 threads")
+    assert "99: " in sent_messages[-1].content
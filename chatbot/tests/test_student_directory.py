@@ -0,0 +1,47 @@
+import os
+
+from chatbot.student_info.student_directory import StudentDirectory
+
+
+def write_roster(path, rows):
+    with open(path, "w") as file:
+        file.write("full_name,discord_username,other_discord_usernames,discord_user_id\n")
+        for row in rows:
+            file.write(",".join(row) + "\n")
+
+
+def test_student_directory_lookups(tmp_path):
+    roster_path = str(tmp_path / "students.csv")
+    write_roster(roster_path, [("Alice Smith", "alice#1234", '"al_s, alice_smith"', "111"),
+                               ("Bob Jones", "bobby#0001", "", "")])
+    student_directory = StudentDirectory(student_info_csv_path=roster_path)
+
+    assert student_directory.find_student_by_username("ALICE#1234")[0] == "Alice Smith"
+    assert student_directory.find_student_by_username("alice_smith")[0] == "Alice Smith"
+    assert student_directory.find_student_by_username("not_bobby#0001_at_all")[0] == "Bob Jones"
+    assert student_directory.find_student_by_discord_id(111)[0] == "Alice Smith"
+    assert student_directory.find_student_by_username("carol") is None
+
+
+def test_student_directory_reloads_when_roster_changes(tmp_path):
+    roster_path = str(tmp_path / "students.csv")
+    write_roster(roster_path, [("Alice Smith", "alice#1234", "", "")])
+    student_directory = StudentDirectory(student_info_csv_path=roster_path)
+    assert not student_directory.reload_if_changed()
+
+    write_roster(roster_path, [("Carol King", "carol#5678", "", "")])
+    os.utime(roster_path, ns=(0, os.stat(roster_path).st_mtime_ns + 1_000_000))
+    assert student_directory.reload_if_changed()
+    assert student_directory.find_student_by_username("carol#5678")[0] == "Carol King"
+    assert student_directory.find_student_by_username("alice#1234") is None
+
+
+def test_student_directory_skips_malformed_discord_user_ids(tmp_path):
+    roster_path = str(tmp_path / "students.csv")
+    write_roster(roster_path, [("Alice Smith", "alice#1234", "", "not an id"),
+                               ("Bob Jones", "bobby#0001", "", " 222 ")])
+    student_directory = StudentDirectory(student_info_csv_path=roster_path)
+
+    assert student_directory.find_student_by_username("alice#1234")[0] == "Alice Smith"
+    assert student_directory.find_student_by_discord_id(222)[0] == "Bob Jones"
+    assert student_directory.find_student_by_discord_id("not an id") is None
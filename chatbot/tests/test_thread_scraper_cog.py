@@ -0,0 +1,273 @@
+import asyncio
+
+import pytest
+from bson import json_util
+
+pytest.importorskip("mongomock_motor")
+
+from chatbot.benchmarks.benchmark_thread_scraper import create_mongo_database_manager, set_up_benchmark_environment
+from chatbot.benchmarks.fake_discord import FakeApplicationContext, FakeBot, build_fake_guild
+from chatbot.discord_bot.cogs.thread_scraper_cog.thread_scraper_cog import ThreadScraperCog
+from chatbot.student_info import student_directory, uuid_registry
+
+BENCHMARK_ENVIRONMENT_VARIABLES = ["PATH_TO_STUDENT_INFO_CSV", "UUID_MAP_JSON_PATH", "UUID_REGISTRY_BACKEND",
+                                   "PATH_TO_COURSE_DATABASE_BACKUPS", "ADMIN_USER_IDS", "MONGODB_DATABASE_NAME"]
+THREAD_COLLECTION_PREFIXES = ("thread_backups_for_", "anonymized_thread_backups_for_")
+
+
+@pytest.fixture
+def students(tmp_path, monkeypatch):
+    # set (and so restore afterwards) everything the benchmark environment overwrites
+    for environment_variable in BENCHMARK_ENVIRONMENT_VARIABLES:
+        monkeypatch.setenv(environment_variable, "")
+    monkeypatch.setattr(student_directory, "_student_directory", None)
+    monkeypatch.setattr(uuid_registry, "_uuid_registry", None)
+    return set_up_benchmark_environment(str(tmp_path))
+
+
+def build_guild(students, threads_per_channel: int = 3, messages_per_thread: int = 5):
+    return build_fake_guild(students=students,
+                            number_of_channels=2,
+                            threads_per_channel=threads_per_channel,
+                            messages_per_thread=messages_per_thread,
+                            reactions_per_message=1,
+                            words_per_message=3)
+
+
+async def scrape(guild, mongo_database_manager=None, **scrape_options):
+    if mongo_database_manager is None:
+        mongo_database_manager = await create_mongo_database_manager(use_mock_mongo=True)
+    cog = ThreadScraperCog(bot=FakeBot(guild), mongo_database_manager=mongo_database_manager)
+    context = FakeApplicationContext(guild)
+    await cog.scrape_threads.callback(cog, context, **scrape_options)
+    return mongo_database_manager, context
+
+
+async def dump_thread_collections(mongo_database_manager) -> dict:
+    # the stored thread and message documents, as the bytes a backup would hold, minus the per-write fields
+    database = mongo_database_manager._database._database
+    collections = {}
+    for collection_name in sorted(await database.list_collection_names()):
+        if not collection_name.startswith(THREAD_COLLECTION_PREFIXES):
+            continue
+        documents = await database[collection_name].find({}, {"_id": 0, "updated_at": 0}).to_list(None)
+        collections[collection_name] = sorted(json_util.dumps(document) for document in documents)
+    return collections
+
+
+@pytest.mark.parametrize("normalized_messages", [False, True])
+def test_concurrent_scrape_matches_sequential_scrape(students, normalized_messages):
+    guild = build_guild(students)
+
+    async def scrape_both_ways():
+        sequential_database, _ = await scrape(guild, max_concurrent_threads=1, normalized_messages=normalized_messages)
+        concurrent_database, _ = await scrape(guild, max_concurrent_threads=8, normalized_messages=normalized_messages)
+        return (await dump_thread_collections(sequential_database),
+                await dump_thread_collections(concurrent_database))
+
+    sequential_collections, concurrent_collections = asyncio.run(scrape_both_ways())
+
+    assert len(sequential_collections) == (4 if normalized_messages else 2)
+    assert sequential_collections == concurrent_collections
+
+
+def reset_history_request_counts(guild):
+    for thread in guild.threads:
+        thread.history_request_count = 0
+
+
+def get_stored_thread(collections: dict, thread) -> dict:
+    thread_collection_name = next(name for name in collections if name.startswith("thread_backups_for_")
+                                  and not name.endswith("_messages"))
+    return next(json_util.loads(document) for document in collections[thread_collection_name]
+                if json_util.loads(document)["thread_id"] == thread.id)
+
+
+def test_rescrape_only_fetches_messages_after_the_high_water_mark(students):
+    guild = build_guild(students)
+    changed_thread = guild.threads[0]
+
+    async def scrape_twice():
+        mongo_database_manager, _ = await scrape(guild)
+        new_message = changed_thread.add_message(author=guild.bot_user, content="one more message")
+        reset_history_request_counts(guild)
+        await scrape(guild, mongo_database_manager=mongo_database_manager)
+        return new_message, await dump_thread_collections(mongo_database_manager)
+
+    new_message, collections = asyncio.run(scrape_twice())
+
+    assert [thread.history_request_count for thread in guild.threads] == [1] + [0] * (len(guild.threads) - 1)
+    stored_thread = get_stored_thread(collections, changed_thread)
+    assert [message["id"] for message in stored_thread["messages"]] == [message.id for message in
+                                                                         changed_thread._messages]
+    assert stored_thread["high_water_mark"]["message_id"] == new_message.id
+    assert stored_thread["thread_statistics"]["message_count_for_this_thread"]["total"] == 6
+
+
+def test_rescrape_after_a_rename_updates_the_existing_thread_document(students):
+    guild = build_guild(students)
+    renamed_thread = guild.threads[0]
+
+    async def scrape_rename_and_rescrape():
+        mongo_database_manager, _ = await scrape(guild)
+        renamed_thread.name = renamed_thread.name + " (renamed)"
+        renamed_thread.add_message(author=guild.bot_user, content="one more message")
+        await scrape(guild, mongo_database_manager=mongo_database_manager)
+        return await dump_thread_collections(mongo_database_manager)
+
+    collections = asyncio.run(scrape_rename_and_rescrape())
+
+    for collection_name in THREAD_COLLECTION_PREFIXES:
+        stored_thread_ids = [json_util.loads(document)["thread_id"]
+                             for document in collections[collection_name + "Benchmark_Server"]]
+        assert sorted(stored_thread_ids) == sorted(thread.id for thread in guild.threads)
+    stored_thread = get_stored_thread(collections, renamed_thread)
+    assert stored_thread["thread_title"] == renamed_thread.name
+    assert len(stored_thread["messages"]) == 6
+
+
+def test_full_rescan_refetches_everything_without_duplicating(students):
+    guild = build_guild(students)
+
+    async def scrape_twice():
+        mongo_database_manager, _ = await scrape(guild)
+        first_collections = await dump_thread_collections(mongo_database_manager)
+        reset_history_request_counts(guild)
+        await scrape(guild, mongo_database_manager=mongo_database_manager, full_rescan=True)
+        return first_collections, await dump_thread_collections(mongo_database_manager)
+
+    first_collections, second_collections = asyncio.run(scrape_twice())
+
+    assert all(thread.history_request_count == 1 for thread in guild.threads)
+    assert first_collections == second_collections
+
+
+def test_scrape_writes_each_thread_document_once(students):
+    guild = build_guild(students, messages_per_thread=20)
+
+    async def scrape_and_count():
+        mongo_database_manager = await create_mongo_database_manager(use_mock_mongo=True)
+        await scrape(guild, mongo_database_manager=mongo_database_manager)
+        return mongo_database_manager._database.counts
+
+    counts = asyncio.run(scrape_and_count())
+
+    # one raw and one anonymized thread document per thread, no matter how many messages it has
+    assert counts["bulk_write_operations"] == 2 * len(guild.threads)
+
+
+def test_thread_discovery_combines_active_and_archived_threads(students):
+    guild = build_guild(students)
+    archived_and_active_thread = guild.threads[0]
+    active_only_thread = guild.channels[0].threads_in_channel.pop()
+
+    async def active_threads():
+        return [archived_and_active_thread, active_only_thread]
+
+    guild.active_threads = active_threads
+
+    async def scrape_once():
+        mongo_database_manager, _ = await scrape(guild)
+        return await dump_thread_collections(mongo_database_manager)
+
+    collections = asyncio.run(scrape_once())
+
+    stored_thread_ids = [json_util.loads(document)["thread_id"]
+                         for document in collections["thread_backups_for_Benchmark_Server"]]
+    assert sorted(stored_thread_ids) == sorted(thread.id for thread in guild.threads + [active_only_thread])
+
+
+def test_resume_picks_up_after_the_last_completed_thread(students):
+    guild = build_guild(students)
+    failing_thread = guild.threads[3]
+    iterate_history = failing_thread._iterate_history
+
+    async def fail_to_iterate_history(after=None):
+        raise RuntimeError("bot restarted")
+        yield
+
+    async def crash_then_resume():
+        failing_thread._iterate_history = fail_to_iterate_history
+        mongo_database_manager = await create_mongo_database_manager(use_mock_mongo=True)
+        with pytest.raises(RuntimeError):
+            await scrape(guild, mongo_database_manager=mongo_database_manager, max_concurrent_threads=1)
+
+        failing_thread._iterate_history = iterate_history
+        reset_history_request_counts(guild)
+        # `full_rescan` so that only the checkpoint (and not the unchanged-thread check) skips threads
+        await scrape(guild, mongo_database_manager=mongo_database_manager, resume=True, full_rescan=True)
+        return await dump_thread_collections(mongo_database_manager)
+
+    collections = asyncio.run(crash_then_resume())
+
+    assert [thread.history_request_count for thread in guild.threads] == [0, 0, 0, 1, 1, 1]
+    assert len(collections["thread_backups_for_Benchmark_Server"]) == len(guild.threads)
+
+
+def test_rescrape_skips_unchanged_threads(students):
+    guild = build_guild(students)
+
+    async def scrape_twice():
+        mongo_database_manager, _ = await scrape(guild)
+        guild.threads[0].add_message(author=guild.bot_user, content="one more message")
+        reset_history_request_counts(guild)
+        _, context = await scrape(guild, mongo_database_manager=mongo_database_manager)
+        return context
+
+    context = asyncio.run(scrape_twice())
+
+    assert sum(thread.history_request_count for thread in guild.threads) == 1
+    assert context.author.sent_messages[-1].content.endswith(
+        f"Finished saving 1 threads (1 new messages), skipped {len(guild.threads) - 1} unchanged threads")
+
+
+def test_live_messages_append_without_reading_the_thread_back(students):
+    guild = build_guild(students)
+    thread = guild.threads[0]
+
+    async def scrape_then_post_messages():
+        mongo_database_manager, _ = await scrape(guild)
+        cog = ThreadScraperCog(bot=FakeBot(guild), mongo_database_manager=mongo_database_manager)
+        round_trips_per_message = []
+        for message_number in range(3):
+            message = thread.add_message(author=guild.bot_user, content=f"live message {message_number}")
+            round_trips_before = mongo_database_manager._database.counts["round_trips"]
+            await cog.on_message(message)
+            round_trips_per_message.append(mongo_database_manager._database.counts["round_trips"] - round_trips_before)
+        return await dump_thread_collections(mongo_database_manager), round_trips_per_message
+
+    collections, round_trips_per_message = asyncio.run(scrape_then_post_messages())
+
+    # the first message reads both thread documents to catch the thread up, the rest only write them
+    assert round_trips_per_message == [4, 2, 2]
+    stored_thread = get_stored_thread(collections, thread)
+    assert len(stored_thread["messages"]) == thread.message_count
+    assert stored_thread["thread_statistics"]["message_count_for_this_thread"]["total"] == thread.message_count
+    assert stored_thread["thread_as_list_of_strings"][-1] == f"{guild.bot_user} said: 'live message 2'"
+
+
+def test_threads_of_unknown_students_are_skipped(students):
+    guild = build_guild(students)
+    unknown_student_thread = guild.channels[0].threads_in_channel[0]
+    unknown_student_thread.name = "not_on_the_roster#0001's chat with bot"
+
+    async def scrape_then_post_message():
+        mongo_database_manager, context = await scrape(guild)
+        cog = ThreadScraperCog(bot=FakeBot(guild), mongo_database_manager=mongo_database_manager)
+        thread_updates = await cog.build_thread_updates(
+            thread=unknown_student_thread,
+            channel=unknown_student_thread.parent,
+            server_name=guild.name,
+            collection_name="thread_backups_for_Benchmark_Server",
+            anonymized_collection_name="anonymized_thread_backups_for_Benchmark_Server",
+            new_messages=[unknown_student_thread.add_message(author=guild.bot_user, content="live message")])
+        return await dump_thread_collections(mongo_database_manager), context, thread_updates
+
+    collections, context, thread_updates = asyncio.run(scrape_then_post_message())
+
+    assert thread_updates is None
+    assert len(collections["thread_backups_for_Benchmark_Server"]) == len(guild.threads) - 1
+    # the rest of the scrape carries on without it
+    assert context.author.sent_messages[-1].content.endswith(
+        f"Finished saving {len(guild.threads)} threads ({5 * (len(guild.threads) - 1)} new messages), "
+        f"skipped 0 unchanged threads")
@@ -0,0 +1,53 @@
+import json
+from datetime import datetime
+from types import SimpleNamespace
+
+from chatbot.discord_bot.cogs.thread_scraper_cog.thread_stats import ThreadStats
+
+BOT_ID = 1
+STUDENT_ID = 2
+
+
+def make_message_package(author_id: int, content: str, reactions=None):
+    return {'author': "bot#0" if author_id == BOT_ID else "student#0",
+            'author_id': author_id,
+            'content': content,
+            'created_at': datetime(2023, 6, 1),
+            'reactions': reactions if reactions is not None else []}
+
+
+def test_update_counts_messages_by_type():
+    thread_stats = ThreadStats(bot_id=BOT_ID)
+    thread_stats.update_from_message_package(make_message_package(STUDENT_ID, "hello there bot"))
+    thread_stats.update_from_message_package(make_message_package(BOT_ID, "hi"))
+    thread_stats.update_from_message_package(make_message_package(STUDENT_ID, ""))
+
+    assert thread_stats.message_count_for_this_thread == {"total": 2, "student": 1, "bot": 1}
+    assert thread_stats.word_count_for_this_thread == {"total": 4, "student": 3, "bot": 1}
+    assert len(thread_stats.wordcount_by_datetimes_by_type["student"]) == 1
+
+
+def test_thread_as_one_string_is_always_current():
+    thread_stats = ThreadStats(bot_id=BOT_ID)
+    thread_stats.update_from_message_package(make_message_package(STUDENT_ID, "hello"))
+    thread_stats.update_from_message_package(make_message_package(BOT_ID, "hi", reactions=['✅']))
+
+    thread_as_one_string = "student#0 said: 'hello'\nbot#0 said: 'hi'"
+    assert thread_stats.thread_as_one_string == thread_as_one_string
+    thread_stats_dict = thread_stats.dict()
+    assert thread_stats_dict["thread_as_one_string"] == thread_as_one_string
+    assert thread_stats_dict["green_check_emoji_present"]
+    assert json.loads(thread_stats.json())["thread_as_one_string"] == thread_as_one_string
+    assert "thread_as_one_string" not in thread_stats.dict(exclude={"thread_as_one_string"})
+    assert thread_stats.copy().thread_as_one_string == thread_as_one_string
+
+
+def test_update_can_replace_the_author():
+    message = SimpleNamespace(author=SimpleNamespace(id=STUDENT_ID),
+                              content="hello",
+                              created_at=datetime(2023, 6, 1),
+                              reactions=[])
+    thread_stats = ThreadStats(bot_id=BOT_ID)
+    thread_stats.update(message, content="REDACTED", author_str="REDACTED")
+
+    assert thread_stats.thread_as_list_of_strings == ["REDACTED said: 'REDACTED'"]
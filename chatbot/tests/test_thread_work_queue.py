@@ -0,0 +1,65 @@
+import asyncio
+
+from chatbot.discord_bot.cogs.chat_cog.thread_work_queue import SingleFlight, ThreadWorkQueue
+
+
+def test_single_flight_runs_concurrent_callers_once():
+    build_count = 0
+
+    async def build_chat():
+        nonlocal build_count
+        build_count += 1
+        await asyncio.sleep(0.01)
+        return f"chat {build_count}"
+
+    async def build_concurrently():
+        single_flight = SingleFlight()
+        return await asyncio.gather(*[single_flight.run(1, build_chat) for _ in range(5)])
+
+    assert asyncio.run(build_concurrently()) == ["chat 1"] * 5
+    assert build_count == 1
+
+
+def test_thread_work_queue_keeps_order_within_a_thread():
+    handled = []
+
+    async def handle(thread_id, message_number, delay):
+        await asyncio.sleep(delay)
+        handled.append((thread_id, message_number))
+        if message_number == 1:
+            raise ValueError("failed message")
+        return message_number
+
+    async def submit_messages():
+        thread_work_queue = ThreadWorkQueue()
+        results = await asyncio.gather(
+            *[thread_work_queue.run(thread_id, lambda thread_id=thread_id, message_number=message_number:
+                                    handle(thread_id, message_number, delay=0.03 - message_number * 0.01))
+              for thread_id in ("a", "b") for message_number in range(3)],
+            return_exceptions=True)
+        assert "a" not in thread_work_queue
+        return results
+
+    results = asyncio.run(submit_messages())
+
+    assert [message_number for thread_id, message_number in handled if thread_id == "a"] == [0, 1, 2]
+    assert [message_number for thread_id, message_number in handled if thread_id == "b"] == [0, 1, 2]
+    assert isinstance(results[1], ValueError) and results[2] == 2
+
+
+def test_thread_work_queue_cancels_waiting_callers_when_cancelled():
+    async def handle_slowly():
+        await asyncio.sleep(3600)
+
+    async def submit_then_cancel():
+        thread_work_queue = ThreadWorkQueue()
+        callers = [asyncio.ensure_future(thread_work_queue.run("a", handle_slowly)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        thread_work_queue.cancel()
+        results = await asyncio.wait_for(asyncio.gather(*callers, return_exceptions=True), timeout=1)
+        assert "a" not in thread_work_queue
+        return results
+
+    results = asyncio.run(submit_then_cancel())
+
+    assert all(isinstance(result, asyncio.CancelledError) for result in results)
@@ -0,0 +1,66 @@
+import asyncio
+
+from chatbot.discord_bot.cogs.chat_cog.update_discord_message_callback_manager import UpdateDiscordMessageHandler
+
+
+class FakeMessage:
+    def __init__(self, content: str):
+        self.content = content
+        self.edit_count = 0
+
+    async def edit(self, content: str):
+        self.content = content
+        self.edit_count += 1
+        return self
+
+
+def test_handler_coalesces_edits_and_overflows_into_follow_up_messages():
+    response_message = FakeMessage("`Awaiting bot response...`")
+    sent_messages = [response_message]
+
+    async def send_message(content: str):
+        sent_messages.append(FakeMessage(content))
+        return sent_messages[-1]
+
+    tokens = [f"word{token_number} " for token_number in range(1000)]
+
+    async def stream_tokens():
+        handler = UpdateDiscordMessageHandler(response_message=response_message,
+                                              send_message=send_message,
+                                              edit_interval_seconds=3600,
+                                              edit_every_n_characters=200)
+        for token in tokens:
+            await handler.on_llm_new_token(token)
+            await asyncio.sleep(0)
+        await handler.finish(final_text="".join(tokens))
+
+    asyncio.run(stream_tokens())
+
+    assert len(sent_messages) > 1
+    assert all(len(message.content) <= 2000 for message in sent_messages)
+    assert "".join(message.content for message in sent_messages) == "".join(tokens)
+    assert sum(message.edit_count for message in sent_messages) < len(tokens) / 10
+
+
+def test_cancel_stops_in_flight_edits_from_overwriting_the_message():
+    class SlowFakeMessage(FakeMessage):
+        async def edit(self, content: str):
+            await asyncio.sleep(0.01)
+            return await super().edit(content)
+
+    response_message = SlowFakeMessage("`Awaiting bot response...`")
+
+    async def stream_then_fail():
+        handler = UpdateDiscordMessageHandler(response_message=response_message,
+                                              send_message=None,
+                                              edit_interval_seconds=0)
+        await handler.on_llm_new_token("partial response")
+        await asyncio.sleep(0)
+        await handler.cancel()
+        await response_message.edit(content="error")
+        await handler.on_llm_new_token(" more")
+        await asyncio.sleep(0.05)
+
+    asyncio.run(stream_then_fail())
+
+    assert response_message.content == "error"
@@ -0,0 +1,35 @@
+import asyncio
+import json
+
+from chatbot.student_info.uuid_registry import JsonUuidRegistry
+
+
+def test_json_uuid_registry_logs_new_uuids_and_compacts_on_flush(tmp_path):
+    uuid_map_json_path = tmp_path / "uuid_map.json"
+    uuid_map_json_path.write_text(json.dumps({"Alice Smith": "alice-uuid"}))
+
+    uuid_registry = JsonUuidRegistry(uuid_map_json_path=str(uuid_map_json_path))
+    assert uuid_registry.get_or_create_uuid("Alice Smith") == "alice-uuid"
+    bob_uuid = uuid_registry.get_or_create_uuid("Bob Jones")
+    assert uuid_registry.get_or_create_uuid("Bob Jones") == bob_uuid
+
+    # before a flush, the new uuid is only in the log, but a fresh registry still finds it
+    assert "Bob Jones" not in json.loads(uuid_map_json_path.read_text())
+    assert JsonUuidRegistry(uuid_map_json_path=str(uuid_map_json_path)).get_or_create_uuid("Bob Jones") == bob_uuid
+
+    uuid_registry.flush()
+    assert json.loads(uuid_map_json_path.read_text()) == {"Alice Smith": "alice-uuid", "Bob Jones": bob_uuid}
+    assert not (tmp_path / "uuid_map.json.log").exists()
+    assert [path.name for path in tmp_path.iterdir()] == ["uuid_map.json"]
+
+
+def test_json_uuid_registry_mints_one_uuid_per_student_from_concurrent_tasks(tmp_path):
+    uuid_registry = JsonUuidRegistry(uuid_map_json_path=str(tmp_path / "uuid_map.json"))
+
+    async def get_uuids_concurrently():
+        return await asyncio.gather(*[uuid_registry.async_get_or_create_uuid("Bob Jones") for _ in range(10)])
+
+    bob_uuids = asyncio.run(get_uuids_concurrently())
+
+    assert len(set(bob_uuids)) == 1
+    assert len((tmp_path / "uuid_map.json.log").read_text().splitlines()) == 1